@@ -0,0 +1,4 @@
+"""
+Benchmarks for RumourEval. Run each with `python3 -m benchmarks.<name>` from the repository
+root.
+"""
@@ -0,0 +1,143 @@
+"""Compare building Tweet trees recursively and iteratively, on deep and wide synthetic threads."""
+
+import argparse
+import sys
+from time import time
+from rumoureval.util.data import build_thread
+from rumoureval.util.lists import filter_none
+
+
+def make_tweet(tweet_id, parent_id):
+    """Create the raw JSON of a synthetic tweet.
+
+    :param tweet_id:
+        ID of the tweet
+    :type tweet_id:
+        `int`
+    :param parent_id:
+        ID of the tweet being replied to
+    :type parent_id:
+        `int` or None
+    :rtype:
+        `dict`
+    """
+    return {
+        'id': tweet_id,
+        'id_str': str(tweet_id),
+        'text': 'reply {}'.format(tweet_id),
+        'in_reply_to_status_id_str': None if parent_id is None else str(parent_id),
+    }
+
+
+def make_deep_thread(depth):
+    """Create a thread which is a single chain of replies.
+
+    :param depth:
+        number of replies in the chain
+    :type depth:
+        `int`
+    :rtype:
+        `dict`
+    """
+    structure = []
+    for tweet_id in range(depth, 0, -1):
+        structure = {str(tweet_id): structure}
+    return {
+        'source': make_tweet(0, None),
+        'replies': {str(tweet_id): make_tweet(tweet_id, tweet_id - 1)
+                    for tweet_id in range(1, depth + 1)},
+        'structure': {'0': structure},
+    }
+
+
+def make_wide_thread(width):
+    """Create a thread whose replies all reply to the source tweet.
+
+    :param width:
+        number of replies
+    :type width:
+        `int`
+    :rtype:
+        `dict`
+    """
+    return {
+        'source': make_tweet(0, None),
+        'replies': {str(tweet_id): make_tweet(tweet_id, 0) for tweet_id in range(1, width + 1)},
+        'structure': {'0': {str(tweet_id): [] for tweet_id in range(1, width + 1)}},
+    }
+
+
+class RecursiveTweet(object):
+    """A Tweet holding its raw JSON and its children, as Tweets once did."""
+    # pylint:disable=too-few-public-methods
+
+    def __init__(self, raw_tweet, children=None, is_source=False):
+        self.raw_tweet = raw_tweet
+        self.children = children
+        self.parent = None
+        self.is_source = is_source
+        for child in self.children:
+            child.parent = self
+
+
+def build_recursive(tweet_data, tweet_id, structure, is_source=False):
+    """Build a Tweet tree by recursive descent, as the import once did."""
+    children = filter_none([
+        build_recursive(tweet_data, child_tweet_id, structure[child_tweet_id])
+        for child_tweet_id in structure
+    ])
+    if is_source:
+        return RecursiveTweet(tweet_data['source'], children=children, is_source=True)
+    if tweet_id in tweet_data['replies']:
+        return RecursiveTweet(tweet_data['replies'][tweet_id], children=children)
+    return None
+
+
+def build_thread_recursive(thread):
+    """Build the Tweet tree of a thread by recursive descent."""
+    return build_recursive(thread, '0', thread['structure']['0'], is_source=True)
+
+
+def build_thread_iterative(thread):
+    """Build the Tweet tree of a thread in a single pass, into a :class:`ThreadStore`."""
+    return build_thread(thread)[0]
+
+
+BUILDERS = [
+    ('recursive', build_thread_recursive),
+    ('iterative', build_thread_iterative),
+]
+
+
+def main(args=None):
+    """Run the benchmark."""
+    if args is None:
+        args = sys.argv[1:]
+
+    parser = argparse.ArgumentParser(description='Benchmark building Tweet trees')
+    parser.add_argument('--depth', type=int, default=1000, help='replies in the deep thread')
+    parser.add_argument('--width', type=int, default=10000, help='replies in the wide thread')
+    parser.add_argument('--repeat', type=int, default=20, help='builds of each thread')
+    parsed_args = parser.parse_args(args)
+
+    threads = [
+        ('deep', make_deep_thread(parsed_args.depth)),
+        ('wide', make_wide_thread(parsed_args.width)),
+    ]
+    print('recursion limit {}'.format(sys.getrecursionlimit()))
+    print('{:<8} {:<10} {:>14}'.format('thread', 'builder', 'ms per build'))
+    for thread_name, thread in threads:
+        for builder_name, builder in BUILDERS:
+            start_time = time()
+            try:
+                for _ in range(parsed_args.repeat):
+                    builder(thread)
+            except RecursionError:
+                print('{:<8} {:<10} {:>14}'.format(thread_name, builder_name, 'RecursionError'))
+                continue
+            elapsed = (time() - start_time) / parsed_args.repeat
+            print('{:<8} {:<10} {:>14.2f}'.format(thread_name, builder_name, elapsed * 1000))
+
+
+if __name__ == '__main__':
+    main()
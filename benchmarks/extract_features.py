@@ -0,0 +1,74 @@
+"""Compare extracting the features of a datasource with different numbers of processes."""
+
+import argparse
+import os
+import sys
+from time import time
+from rumoureval.pipeline.tweet_detail_extractor import TWEET_DETAIL_CACHE, TweetDetailExtractor
+from rumoureval.util.data import import_data
+
+
+def default_jobs():
+    """Get powers of two up to the number of CPUs, and at least one parallel run.
+
+    :rtype:
+        `list` of `int`
+    """
+    jobs = [1, 2]
+    while jobs[-1] * 2 <= (os.cpu_count() or 1):
+        jobs.append(jobs[-1] * 2)
+    return jobs
+
+
+def time_extraction(tweets, n_jobs, repeat):
+    """Time extracting the features of tweets, starting from an empty cache each time.
+
+    :param tweets:
+        tweets to extract the features of
+    :type tweets:
+        `list` of :class:`Tweet`
+    :param n_jobs:
+        number of processes
+    :type n_jobs:
+        `int`
+    :param repeat:
+        number of extractions
+    :type repeat:
+        `int`
+    :rtype:
+        `float` seconds per extraction
+    """
+    elapsed = 0
+    for _ in range(repeat):
+        TWEET_DETAIL_CACHE.clear()
+        start_time = time()
+        TweetDetailExtractor(task='A', n_jobs=n_jobs).transform(tweets)
+        elapsed += time() - start_time
+    return elapsed / repeat
+
+
+def main(args=None):
+    """Run the benchmark."""
+    if args is None:
+        args = sys.argv[1:]
+
+    parser = argparse.ArgumentParser(description='Benchmark parallel feature extraction')
+    parser.add_argument('--datasource', default='train', help='datasource to extract')
+    parser.add_argument('--jobs', type=int, nargs='+', default=None, metavar='N',
+                        help='numbers of processes to compare. defaults to powers of two')
+    parser.add_argument('--repeat', type=int, default=3, help='extractions with each setting')
+    parsed_args = parser.parse_args(args)
+
+    tweets = import_data(parsed_args.datasource, include_context=False)
+    print('{} tweets, {} CPUs'.format(len(tweets), os.cpu_count()))
+
+    print('{:>6} {:>10} {:>8}'.format('n_jobs', 's', 'speedup'))
+    serial = None
+    for n_jobs in parsed_args.jobs or default_jobs():
+        elapsed = time_extraction(tweets, n_jobs, parsed_args.repeat)
+        serial = serial or elapsed
+        print('{:>6} {:>10.2f} {:>8.2f}'.format(n_jobs, elapsed, serial / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Compare importing a datasource from its compressed archive with importing its extracted
+folder.
+"""
+
+import argparse
+import os
+import sys
+from time import time
+from rumoureval.util.data import (
+    get_datasource_archive, get_datasource_path, import_thread, import_tweet_data
+)
+from rumoureval.util.thread_files import iter_archive_threads
+
+
+def folder_size(folder):
+    """Get the total size of the files in a folder, in bytes.
+
+    :param folder:
+        the folder
+    :type folder:
+        `str`
+    :rtype:
+        `int`
+    """
+    return sum(
+        os.path.getsize(os.path.join(dirpath, filename))
+        for dirpath, _, filenames in os.walk(folder)
+        for filename in filenames
+    )
+
+
+def best_time(function, repeat):
+    """Run a function several times, returning its fastest time and last result.
+
+    :param function:
+        function to time
+    :type function:
+        `function`
+    :param repeat:
+        number of runs
+    :type repeat:
+        `int`
+    :rtype:
+        `tuple` of `float` and the function's result
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        start_time = time()
+        result = function()
+        elapsed = time() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(args=None):
+    """Run the benchmark."""
+    if args is None:
+        args = sys.argv[1:]
+
+    parser = argparse.ArgumentParser(description='Benchmark archive against folder import')
+    parser.add_argument('--datasource', default='test',
+                        help='datasource with both an extracted folder and an archive')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of runs of each import')
+    parsed_args = parser.parse_args(args)
+
+    folder = get_datasource_path(parsed_args.datasource)
+    archive = get_datasource_archive(parsed_args.datasource)
+    if not os.path.isdir(folder) or archive is None:
+        sys.exit('`{}` needs both an extracted folder and an archive'.format(
+            parsed_args.datasource))
+
+    folder_time, folder_threads = best_time(
+        lambda: import_tweet_data(folder), parsed_args.repeat)
+    archive_time, archive_threads = best_time(
+        lambda: [import_thread(thread) for thread in iter_archive_threads(archive)],
+        parsed_args.repeat)
+
+    extracted_mb = folder_size(folder) / 1e6
+    archive_mb = os.path.getsize(archive) / 1e6
+    print('{:<8} {:>8} {:>10} {:>12} {:>14}'.format(
+        'source', 'threads', 'seconds', 'threads/s', 'extracted MB/s'))
+    for name, elapsed, threads in [('folder', folder_time, folder_threads),
+                                   ('archive', archive_time, archive_threads)]:
+        print('{:<8} {:>8} {:>10.3f} {:>12.1f} {:>14.1f}'.format(
+            name, len(threads), elapsed, len(threads) / elapsed, extracted_mb / elapsed))
+    print('extracted size: {:.1f} MB, archive size: {:.1f} MB'.format(extracted_mb, archive_mb))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Compare serial and asyncio thread import on a cold page cache."""
+
+import argparse
+import os
+import sys
+from time import time
+from rumoureval.util.data import find_thread_folders, get_datasource_path, import_threads
+
+
+def evict_page_cache(folder):
+    """Ask the kernel to drop the cached pages of every file in a folder.
+
+    :param folder:
+        the folder
+    :type folder:
+        `str`
+    :rtype:
+        `bool`
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return False
+
+    for dirpath, _, filenames in os.walk(folder):
+        for filename in filenames:
+            descriptor = os.open(os.path.join(dirpath, filename), os.O_RDONLY)
+            try:
+                os.fdatasync(descriptor)
+                os.posix_fadvise(descriptor, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(descriptor)
+    return True
+
+
+def main(args=None):
+    """Run the benchmark."""
+    if args is None:
+        args = sys.argv[1:]
+
+    parser = argparse.ArgumentParser(description='Benchmark asyncio thread import')
+    parser.add_argument('--datasource', default='train', help='datasource to import')
+    parser.add_argument('--in-flight', type=int, nargs='+', default=[8, 32, 128],
+                        help='numbers of reads in flight to benchmark')
+    parser.add_argument('--repeat', type=int, default=3, help='number of runs of each import')
+    parsed_args = parser.parse_args(args)
+
+    folder = get_datasource_path(parsed_args.datasource)
+    thread_folders = find_thread_folders(folder)
+    cold = evict_page_cache(folder)
+    if not cold:
+        print('posix_fadvise is unavailable, so the page cache is warm')
+
+    print('{:<12} {:>10}'.format('reads', 'seconds'))
+    for in_flight in [None] + parsed_args.in_flight:
+        best = None
+        for _ in range(parsed_args.repeat):
+            evict_page_cache(folder)
+            start_time = time()
+            import_threads(thread_folders, include_context=False, async_reads=in_flight)
+            elapsed = time() - start_time
+            best = elapsed if best is None else min(best, elapsed)
+        print('{:<12} {:>10.3f}'.format('serial' if in_flight is None else in_flight, best))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Report import time and memory held with context documents read eagerly, lazily, or skipped."""
+
+import argparse
+import sys
+import tracemalloc
+from time import time
+from rumoureval.util.data import import_datasource_threads
+
+
+def read_context(threads):
+    """Read every context document of a set of threads, as the import once did eagerly.
+
+    :param threads:
+        imported threads
+    :type threads:
+        `list` of `dict`
+    :rtype:
+        `list` of `str`
+    """
+    documents = []
+    for thread in threads:
+        if 'wiki' in thread:
+            documents.append(thread['wiki'].read())
+        for key in ['context/urls', 'urls-content']:
+            if thread[key] is not None:
+                documents += [document.read() for document in thread[key].values()]
+    return documents
+
+
+def import_eager(datasource):
+    """Import a datasource and read all of its context documents."""
+    threads = import_datasource_threads(datasource)
+    return threads, read_context(threads)
+
+
+def import_lazy(datasource):
+    """Import a datasource with handles to its context documents."""
+    return import_datasource_threads(datasource)
+
+
+def import_skipped(datasource):
+    """Import a datasource without its context documents."""
+    return import_datasource_threads(datasource, include_context=False)
+
+
+MODES = [
+    ('eager', import_eager),
+    ('lazy', import_lazy),
+    ('skipped', import_skipped),
+]
+
+
+def main(args=None):
+    """Run the benchmark."""
+    if args is None:
+        args = sys.argv[1:]
+
+    parser = argparse.ArgumentParser(description='Benchmark context document import')
+    parser.add_argument('--datasource', default='train', help='datasource to import')
+    parsed_args = parser.parse_args(args)
+
+    print('{:<8} {:>10} {:>12}'.format('context', 'seconds', 'held MB'))
+    for mode, importer in MODES:
+        start_time = time()
+        importer(parsed_args.datasource)
+        elapsed = time() - start_time
+
+        # Measure memory on a separate run, since tracing allocations slows the import
+        tracemalloc.start()
+        imported = importer(parsed_args.datasource)
+        held = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del imported
+
+        print('{:<8} {:>10.3f} {:>12.1f}'.format(mode, elapsed, held / 1e6))
+
+
+if __name__ == '__main__':
+    main()
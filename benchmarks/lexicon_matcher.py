@@ -0,0 +1,90 @@
+"""
+Compare matching the stemmed tokens of tweets against each lexicon in turn with matching them
+against every lexicon in a single pass.
+"""
+
+import argparse
+import sys
+from time import time
+from rumoureval.corpus.opinion import LEXICONS
+from rumoureval.pipeline.lexicon_matcher import LexiconMatcher
+from rumoureval.pipeline.tweet_detail_extractor import STEMMER, TweetDetailExtractor
+from rumoureval.util.data import import_data
+
+
+def match_each(stemmed_lexicons, tokens):
+    """Match tokens against each lexicon in turn, one list comprehension per lexicon.
+
+    :param stemmed_lexicons:
+        stemmed words of each lexicon
+    :type stemmed_lexicons:
+        `list` of `frozenset` of `str`
+    :param tokens:
+        stemmed tokens
+    :type tokens:
+        `list` of `str`
+    :rtype:
+        `list` of `list` of `str`
+    """
+    return [[token for token in tokens if token in words] for words in stemmed_lexicons]
+
+
+def time_matching(match, token_lists, repeat):
+    """Time matching the tokens of every tweet.
+
+    :param match:
+        function matching the tokens of a tweet
+    :type match:
+        `callable`
+    :param token_lists:
+        stemmed tokens of each tweet
+    :type token_lists:
+        `list` of `list` of `str`
+    :param repeat:
+        number of passes over the tweets
+    :type repeat:
+        `int`
+    :rtype:
+        `float` seconds per pass
+    """
+    start_time = time()
+    for _ in range(repeat):
+        for tokens in token_lists:
+            match(tokens)
+    return (time() - start_time) / repeat
+
+
+def main(args=None):
+    """Run the benchmark."""
+    # pylint:disable=protected-access
+    if args is None:
+        args = sys.argv[1:]
+
+    parser = argparse.ArgumentParser(description='Benchmark matching tokens against lexicons')
+    parser.add_argument('--datasource', default='train', help='datasource to match')
+    parser.add_argument('--repeat', type=int, default=20, help='passes over the tweets')
+    parsed_args = parser.parse_args(args)
+
+    tweets = import_data(parsed_args.datasource, include_context=False)
+    extractor = TweetDetailExtractor(task='A')
+    token_lists = [
+        extractor._tokenize(TweetDetailExtractor.get_parseable_tweet_text(tweet))
+        for tweet in tweets
+    ]
+    tokens = sum(len(token_list) for token_list in token_lists)
+    print('{} tweets, {} tokens, {} lexicons'.format(len(tweets), tokens, len(LEXICONS)))
+
+    stemmed_lexicons = [frozenset(STEMMER.stem(word) for word in words) for _, words in LEXICONS]
+    matcher = LexiconMatcher(LEXICONS, normalize=STEMMER.stem)
+    assert all(match_each(stemmed_lexicons, token_list) == matcher.match(token_list)
+               for token_list in token_lists)
+
+    print('{:<12} {:>10} {:>14}'.format('matching', 'ms', 'ns per token'))
+    for name, match in [('each', lambda token_list: match_each(stemmed_lexicons, token_list)),
+                        ('single pass', matcher.match)]:
+        elapsed = time_matching(match, token_lists, parsed_args.repeat)
+        print('{:<12} {:>10.2f} {:>14.0f}'.format(name, elapsed * 1000, elapsed * 1e9 / tokens))
+
+
+if __name__ == '__main__':
+    main()
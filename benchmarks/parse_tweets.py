@@ -0,0 +1,74 @@
+"""Measure tweet parse time and bytes retained per tweet, with and without field projection."""
+
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+from time import time
+from rumoureval.util.data import find_thread_folders, get_datasource_path
+from rumoureval.util.tweet_json import JSON_BACKEND, TWEET_FIELDS, loads_tweet, project
+
+
+def read_tweet_files(datasource):
+    """Read the raw JSON of every tweet in a datasource.
+
+    :param datasource:
+        datasource to read
+    :type datasource:
+        `str`
+    :rtype:
+        `list` of `bytes`
+    """
+    documents = []
+    for thread_folder in find_thread_folders(get_datasource_path(datasource)):
+        for subfolder in ['source-tweet', 'replies']:
+            folder = os.path.join(thread_folder, subfolder)
+            if not os.path.isdir(folder):
+                continue
+            for filename in os.listdir(folder):
+                with open(os.path.join(folder, filename), 'rb') as tweet_file:
+                    documents.append(tweet_file.read())
+    return documents
+
+
+PARSERS = [
+    ('json', json.loads),
+    ('json projected', lambda document: project(json.loads(document), TWEET_FIELDS)),
+    (JSON_BACKEND, loads_tweet),
+    ('{} projected'.format(JSON_BACKEND), lambda document: loads_tweet(document, True)),
+]
+
+
+def main(args=None):
+    """Run the benchmark."""
+    if args is None:
+        args = sys.argv[1:]
+
+    parser = argparse.ArgumentParser(description='Benchmark tweet parsing')
+    parser.add_argument('--datasource', default='train', help='datasource to parse')
+    parsed_args = parser.parse_args(args)
+
+    documents = read_tweet_files(parsed_args.datasource)
+    print('{} tweets, {:.0f} bytes of JSON per tweet'.format(
+        len(documents), sum(len(document) for document in documents) / len(documents)))
+    print('{:<20} {:>10} {:>18}'.format('parser', 'seconds', 'bytes per tweet'))
+    for name, parse in PARSERS:
+        # Keep the parsed tweets, as an import does, so retained size shows in parse time
+        start_time = time()
+        tweets = [parse(document) for document in documents]
+        elapsed = time() - start_time
+        del tweets
+
+        # Measure memory on a separate run, since tracing allocations slows parsing
+        tracemalloc.start()
+        tweets = [parse(document) for document in documents]
+        retained = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del tweets
+
+        print('{:<20} {:>10.3f} {:>18.0f}'.format(name, elapsed, retained / len(documents)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Report the memory held by the tweets of a datasource before and after sharing their users and
+interning their repeated strings.
+"""
+
+import argparse
+import gc
+import sys
+import tracemalloc
+from rumoureval.util.data import import_datasource_threads
+from rumoureval.util.shared_records import share_records
+
+
+def count_tweets(threads):
+    """Count the tweets of a set of threads.
+
+    :param threads:
+        imported threads
+    :type threads:
+        `list` of `dict`
+    :rtype:
+        `int`
+    """
+    return sum(len(thread['replies']) + 1 for thread in threads)
+
+
+def main(args=None):
+    """Run the benchmark."""
+    if args is None:
+        args = sys.argv[1:]
+
+    parser = argparse.ArgumentParser(description='Benchmark sharing users and strings')
+    parser.add_argument('--datasource', default='train', help='datasource to import')
+    parser.add_argument('--project-fields', action='store_true',
+                        help='keep only the tweet fields used by feature extraction')
+    parsed_args = parser.parse_args(args)
+
+    tracemalloc.start()
+    threads = import_datasource_threads(parsed_args.datasource,
+                                        include_context=False,
+                                        project_fields=parsed_args.project_fields)
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+
+    records = share_records(threads)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tweets = count_tweets(threads)
+    print('{} tweets by {} users ({} versions) in {} threads'.format(
+        tweets, len(records.users), records.count_versions(), len(threads)))
+    print('{:<8} {:>10} {:>16}'.format('records', 'MB', 'bytes per tweet'))
+    for name, held in [('before', before), ('after', after)]:
+        print('{:<8} {:>10.1f} {:>16.0f}'.format(name, held / 1024 / 1024, held / tweets))
+
+
+if __name__ == '__main__':
+    main()
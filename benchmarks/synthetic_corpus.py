@@ -0,0 +1,551 @@
+"""
+Generate a synthetic RumourEval corpus for load testing, in the layout read by `import_thread`.
+
+Thread shapes, tweet lengths, words, users and labels are sampled from an existing datasource,
+so a corpus of any size keeps the character of the real data. For example, to write a corpus
+ten times the size of the training data to `data/synthetic` and `data/synthetic-annotations`:
+
+    python3 -m benchmarks.synthetic_corpus --name synthetic --scale 10
+
+Context documents are not generated.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import time
+from collections import Counter
+from rumoureval.util.data import (
+    get_datasource_path, import_datasource_threads, read_annotation_data
+)
+
+
+# First ID given to synthetic tweets, after the IDs of tweets in the real data
+FIRST_TWEET_ID = 900000000000000000
+
+# First ID given to synthetic users
+FIRST_USER_ID = 5000000000
+
+# Format of the `created_at` field of tweets and users
+CREATED_AT_FORMAT = '%a %b %d %H:%M:%S +0000 %Y'
+
+# Range of times at which events start, and users are created, in seconds since the epoch
+EVENT_START_RANGE = (1388534400, 1483228800)
+ACCOUNT_CREATED_RANGE = (1167609600, 1388534400)
+
+# Mean delay between a tweet and a reply to it, in seconds
+MEAN_REPLY_DELAY = 600
+
+
+class Distribution(object):
+    """A distribution of non-negative integers, such as the number of replies to a tweet."""
+
+    def __init__(self, kind, value):
+        """Initialize Distribution.
+
+        :param kind:
+            one of 'fixed', 'poisson', 'geometric' or 'empirical'
+        :type kind:
+            `str`
+        :param value:
+            the fixed value or mean, or the observed samples of an empirical distribution
+        :type value:
+            `float` or `list` of `int`
+        """
+        self.kind = kind
+        self.value = value
+
+    @classmethod
+    def parse(cls, spec, samples):
+        """
+        Parse a distribution from the command line, as `empirical`, `fixed:N`, `poisson:MEAN`
+        or `geometric:MEAN`.
+
+        :param spec:
+            the distribution
+        :type spec:
+            `str`
+        :param samples:
+            samples observed in the real data, for an empirical distribution
+        :type samples:
+            `list` of `int`
+        :rtype:
+            :class:`Distribution`
+        """
+        if spec == 'empirical':
+            return cls('empirical', samples if samples else [0])
+
+        kind, _, value = spec.partition(':')
+        if kind not in ['fixed', 'poisson', 'geometric'] or not value:
+            raise ValueError('Unknown distribution: {}'.format(spec))
+        return cls(kind, float(value))
+
+    def sample(self, rng):
+        """
+        Draw a value from the distribution.
+
+        :param rng:
+            source of randomness
+        :type rng:
+            :class:`random.Random`
+        :rtype:
+            `int`
+        """
+        if self.kind == 'empirical':
+            return rng.choice(self.value)
+        if self.kind == 'fixed':
+            return int(self.value)
+        if self.kind == 'geometric':
+            if self.value <= 0:
+                return 0
+            return int(math.log(1.0 - rng.random()) / math.log(self.value / (self.value + 1)))
+
+        # Poisson, approximated by a normal distribution for large means
+        if self.value >= 30:
+            return max(0, int(round(rng.gauss(self.value, math.sqrt(self.value)))))
+        limit = math.exp(-self.value)
+        count = 0
+        product = rng.random()
+        while product > limit:
+            count += 1
+            product *= rng.random()
+        return count
+
+    def __str__(self):
+        if self.kind == 'empirical':
+            return 'empirical (mean {:.2f})'.format(sum(self.value) / len(self.value))
+        return '{}:{}'.format(self.kind, self.value)
+
+
+class CorpusStatistics(object):
+    """Shapes, words, users and labels observed in a datasource."""
+    # pylint:disable=too-few-public-methods,too-many-instance-attributes
+
+    def __init__(self, datasource):
+        """Initialize CorpusStatistics.
+
+        :param datasource:
+            the datasource to sample from
+        :type datasource:
+            `str`
+        """
+        threads = import_datasource_threads(datasource, include_context=False)
+        if not threads:
+            raise ValueError('No threads found for `{}` data'.format(datasource))
+
+        self.thread_count = len(threads)
+        self.depths = []
+        self.source_fanouts = []
+        self.reply_fanouts = []
+        words = Counter()
+        self.lengths = []
+        users = {}
+        for thread in threads:
+            self._measure_structure(thread)
+            for tweet in [thread['source']] + list(thread['replies'].values()):
+                tokens = tweet['text'].split()
+                words.update(tokens)
+                self.lengths.append(len(tokens))
+                users[tweet['user']['screen_name']] = (
+                    tweet['user']['verified'], tweet['user']['created_at'])
+
+        self.words = list(words)
+        self.word_weights = []
+        total = 0
+        for word in self.words:
+            total += words[word]
+            self.word_weights.append(total)
+        self.users = sorted(users.items())
+
+        task_a_annotations, task_b_annotations = read_annotation_data(datasource)
+        source_ids = set(thread['source']['id_str'] for thread in threads)
+        self.source_labels = [label for tweet_id, label in sorted(task_a_annotations.items())
+                              if tweet_id in source_ids] or ['support']
+        self.reply_labels = [label for tweet_id, label in sorted(task_a_annotations.items())
+                             if tweet_id not in source_ids] or ['comment']
+        self.veracity_labels = [label for _, label in sorted(task_b_annotations.items())] or \
+            ['unverified']
+
+    def _measure_structure(self, thread):
+        """Record the depth of a thread, and the number of replies to each of its tweets."""
+        source_id = thread['source']['id_str']
+        structure = thread['structure'][source_id]
+        self.source_fanouts.append(len(structure))
+
+        replies = []
+        pending = [(structure, 1)]
+        while pending:
+            children, depth = pending.pop()
+            for child_id in children:
+                replies.append((depth, len(children[child_id])))
+                pending.append((children[child_id], depth + 1))
+        depth = max([reply_depth for reply_depth, _ in replies] or [0])
+        self.depths.append(depth)
+
+        # Replies at the maximum depth cannot have replies of their own, which the depth of
+        # a synthetic thread already accounts for
+        self.reply_fanouts += [fanout for reply_depth, fanout in replies if reply_depth < depth]
+
+
+class CorpusGenerator(object):
+    """Writes synthetic threads and their annotations."""
+    # pylint:disable=too-few-public-methods,too-many-instance-attributes,too-many-arguments
+
+    def __init__(self, statistics, depth, source_fanout, reply_fanout, max_replies, url_rate,
+                 seed):
+        """Initialize CorpusGenerator.
+
+        :param statistics:
+            statistics of the real data to sample from
+        :type statistics:
+            :class:`CorpusStatistics`
+        :param depth:
+            distribution of the maximum depth of replies in a thread
+        :type depth:
+            :class:`Distribution`
+        :param source_fanout:
+            distribution of the number of direct replies to a source tweet
+        :type source_fanout:
+            :class:`Distribution`
+        :param reply_fanout:
+            distribution of the number of direct replies to a reply
+        :type reply_fanout:
+            :class:`Distribution`
+        :param max_replies:
+            maximum number of replies in a thread
+        :type max_replies:
+            `int`
+        :param url_rate:
+            fraction of source tweets which link to a url
+        :type url_rate:
+            `float`
+        :param seed:
+            seed for the random choices, so corpora are reproducible
+        :type seed:
+            `int`
+        """
+        self._statistics = statistics
+        self._depth = depth
+        self._source_fanout = source_fanout
+        self._reply_fanout = reply_fanout
+        self._max_replies = max_replies
+        self._url_rate = url_rate
+        self._rng = random.Random(seed)
+        self._next_tweet_id = FIRST_TWEET_ID
+        self._users = [self._make_user(i, screen_name, verified)
+                       for i, (screen_name, (verified, _)) in enumerate(statistics.users)]
+
+    def _make_user(self, index, screen_name, verified):
+        """Create the JSON of a user."""
+        user_id = FIRST_USER_ID + index
+        return {
+            'id': user_id,
+            'id_str': str(user_id),
+            'name': screen_name,
+            'screen_name': screen_name,
+            'created_at': self._format_time(self._rng.randint(*ACCOUNT_CREATED_RANGE)),
+            'verified': verified,
+            'followers_count': self._rng.randint(0, 100000),
+            'friends_count': self._rng.randint(0, 5000),
+            'statuses_count': self._rng.randint(1, 50000),
+            'lang': 'en',
+            'protected': False,
+        }
+
+    @staticmethod
+    def _format_time(timestamp):
+        """Format a time as in the `created_at` field of a tweet."""
+        return time.strftime(CREATED_AT_FORMAT, time.gmtime(timestamp))
+
+    def _new_tweet_id(self):
+        """Allocate the next tweet ID."""
+        tweet_id = self._next_tweet_id
+        self._next_tweet_id += 1
+        return tweet_id
+
+    def _make_text(self, prefix):
+        """Sample the words of a tweet from the vocabulary of the real data."""
+        statistics = self._statistics
+        length = max(1, self._rng.choice(statistics.lengths))
+        words = self._rng.choices(statistics.words, cum_weights=statistics.word_weights,
+                                  k=length)
+        return ' '.join(prefix + words)
+
+    def _make_tweet(self, tweet_id, user, timestamp, parent=None, url=None):
+        """Create the JSON of a tweet, with entities found in its text."""
+        prefix = ['@{}'.format(parent['user']['screen_name'])] if parent is not None else []
+        text = self._make_text(prefix)
+        if url is not None:
+            text += ' ' + url['short']
+
+        hashtags = []
+        user_mentions = []
+        position = 0
+        for word in text.split(' '):
+            indices = [position, position + len(word)]
+            if word.startswith('#') and len(word) > 1:
+                hashtags.append({'text': word[1:], 'indices': indices})
+            elif word.startswith('@') and len(word) > 1:
+                user_mentions.append({'screen_name': word[1:], 'name': word[1:],
+                                      'indices': indices})
+            position += len(word) + 1
+        urls = []
+        if url is not None:
+            urls.append({'url': url['short'], 'expanded_url': url['full'],
+                         'display_url': url['full'], 'indices': [len(text) - len(url['short']),
+                                                                 len(text)]})
+
+        return {
+            'id': tweet_id,
+            'id_str': str(tweet_id),
+            'created_at': self._format_time(timestamp),
+            'text': text,
+            'lang': 'en',
+            'truncated': False,
+            'source': 'synthetic',
+            'in_reply_to_status_id': parent['id'] if parent is not None else None,
+            'in_reply_to_status_id_str': parent['id_str'] if parent is not None else None,
+            'in_reply_to_user_id': parent['user']['id'] if parent is not None else None,
+            'in_reply_to_user_id_str': parent['user']['id_str'] if parent is not None else None,
+            'in_reply_to_screen_name':
+                parent['user']['screen_name'] if parent is not None else None,
+            'retweet_count': int(self._rng.expovariate(0.1)),
+            'favorite_count': int(self._rng.expovariate(0.2)),
+            'retweeted': False,
+            'favorited': False,
+            'geo': None,
+            'coordinates': None,
+            'place': None,
+            'contributors': None,
+            'entities': {
+                'hashtags': hashtags,
+                'user_mentions': user_mentions,
+                'urls': urls,
+                'symbols': [],
+            },
+            'user': user,
+        }
+
+    def make_thread(self, event_start):
+        """
+        Create a thread, with its structure, tweets, urls and labels.
+
+        :param event_start:
+            time the event of the thread started, in seconds since the epoch
+        :type event_start:
+            `int`
+        :rtype:
+            `dict`
+        """
+        # pylint:disable=too-many-locals
+        rng = self._rng
+        url = None
+        if rng.random() < self._url_rate:
+            url_hash = hashlib.md5(str(rng.random()).encode('utf-8')).hexdigest()
+            url = {
+                'hash': url_hash,
+                'short': 'http://t.co/{}'.format(url_hash[:10]),
+                'full': 'http://example.com/{}'.format(url_hash),
+            }
+
+        source_id = self._new_tweet_id()
+        source = self._make_tweet(source_id, rng.choice(self._users),
+                                  event_start + rng.randint(0, 86400), url=url)
+        structure = {}
+        thread = {
+            'source': source,
+            'replies': [],
+            'structure': {source['id_str']: structure},
+            'urls': [url] if url is not None else [],
+            'labels': {source['id_str']: rng.choice(self._statistics.source_labels)},
+            'veracity': rng.choice(self._statistics.veracity_labels),
+        }
+
+        max_depth = self._depth.sample(rng)
+        pending = [(source, structure, 0)]
+        timestamps = {source_id: event_start}
+        while pending and len(thread['replies']) < self._max_replies:
+            parent, children, depth = pending.pop(0)
+            if depth >= max_depth:
+                continue
+            fanout = self._source_fanout if depth == 0 else self._reply_fanout
+            for _ in range(fanout.sample(rng)):
+                if len(thread['replies']) >= self._max_replies:
+                    break
+                reply_id = self._new_tweet_id()
+                timestamps[reply_id] = timestamps[parent['id']] + \
+                    int(rng.expovariate(1.0 / MEAN_REPLY_DELAY))
+                reply = self._make_tweet(reply_id, rng.choice(self._users),
+                                         timestamps[reply_id], parent=parent)
+                thread['replies'].append(reply)
+                thread['labels'][reply['id_str']] = rng.choice(self._statistics.reply_labels)
+                children[reply['id_str']] = {}
+                pending.append((reply, children[reply['id_str']], depth + 1))
+
+        _replace_empty_children(structure)
+        return thread
+
+
+def _replace_empty_children(structure):
+    """Write tweets without replies as `[]`, as `structure.json` does."""
+    pending = [structure]
+    while pending:
+        children = pending.pop()
+        for child_id in children:
+            if children[child_id]:
+                pending.append(children[child_id])
+            else:
+                children[child_id] = []
+
+
+def _write_json(path, value):
+    """Write a JSON file."""
+    with open(path, 'w') as json_file:
+        json.dump(value, json_file)
+
+
+def write_thread(folder, thread):
+    """
+    Write a thread in the layout read by `import_thread`.
+
+    :param folder:
+        root folder of the thread
+    :type folder:
+        `str`
+    :param thread:
+        a thread created by :meth:`CorpusGenerator.make_thread`
+    :type thread:
+        `dict`
+    """
+    os.makedirs(os.path.join(folder, 'source-tweet'))
+    _write_json(os.path.join(folder, 'structure.json'), thread['structure'])
+    _write_json(os.path.join(folder, 'source-tweet', '{}.json'.format(thread['source']['id_str'])),
+                thread['source'])
+    if thread['replies']:
+        os.makedirs(os.path.join(folder, 'replies'))
+    for reply in thread['replies']:
+        _write_json(os.path.join(folder, 'replies', '{}.json'.format(reply['id_str'])), reply)
+    with open(os.path.join(folder, 'urls.dat'), 'w') as urls_file:
+        for url in thread['urls']:
+            urls_file.write('{}\t{}\t{}\n'.format(url['hash'], url['short'], url['full']))
+
+
+def generate_corpus(generator, name, events, threads, seed):
+    """
+    Write a synthetic datasource and its annotations.
+
+    :param generator:
+        generator of threads
+    :type generator:
+        :class:`CorpusGenerator`
+    :param name:
+        name of the datasource to write, under `data`
+    :type name:
+        `str`
+    :param events:
+        number of events to spread threads across
+    :type events:
+        `int`
+    :param threads:
+        number of threads to write
+    :type threads:
+        `int`
+    :param seed:
+        seed for assigning threads to events
+    :type seed:
+        `int`
+    :rtype:
+        `tuple` of `int`, the number of threads and tweets written
+    """
+    rng = random.Random(seed)
+    event_names = ['event{:03d}'.format(i) for i in range(events)]
+    event_starts = {event: rng.randint(*EVENT_START_RANGE) for event in event_names}
+
+    folder = get_datasource_path(name)
+    task_a_annotations = {}
+    task_b_annotations = {}
+    tweets = 0
+    for _ in range(threads):
+        event = rng.choice(event_names)
+        thread = generator.make_thread(event_starts[event])
+        write_thread(os.path.join(folder, event, thread['source']['id_str']), thread)
+        task_a_annotations.update(thread['labels'])
+        task_b_annotations[thread['source']['id_str']] = thread['veracity']
+        tweets += 1 + len(thread['replies'])
+
+    annotation_folder = get_datasource_path(name, annotations=True)
+    os.makedirs(annotation_folder)
+    _write_json(os.path.join(annotation_folder, 'subtaskA.json'), task_a_annotations)
+    _write_json(os.path.join(annotation_folder, 'subtaskB.json'), task_b_annotations)
+    return threads, tweets
+
+
+def main(args=None):
+    """Generate the corpus."""
+    if args is None:
+        args = sys.argv[1:]
+
+    parser = argparse.ArgumentParser(description='Generate a synthetic RumourEval corpus')
+    parser.add_argument('--name', default='synthetic', help='datasource to write under data/')
+    parser.add_argument('--sample-from', default='train', help='datasource to sample from')
+    parser.add_argument('--events', type=int, default=8, help='number of events')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='number of threads. Defaults to --scale times the sampled threads')
+    parser.add_argument('--scale', type=float, default=10,
+                        help='size relative to the sampled datasource')
+    parser.add_argument('--depth', default='empirical',
+                        help='distribution of thread depth: empirical, fixed:N, poisson:MEAN '
+                             'or geometric:MEAN')
+    parser.add_argument('--source-fanout', default='empirical',
+                        help='distribution of the number of replies to a source tweet')
+    parser.add_argument('--reply-fanout', default='empirical',
+                        help='distribution of the number of replies to a reply')
+    parser.add_argument('--max-replies', type=int, default=10000,
+                        help='maximum number of replies in a thread')
+    parser.add_argument('--url-rate', type=float, default=0.3,
+                        help='fraction of source tweets which link to a url')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument('--overwrite', action='store_true',
+                        help='replace the datasource if it exists')
+    parsed_args = parser.parse_args(args)
+
+    for annotations in [False, True]:
+        folder = get_datasource_path(parsed_args.name, annotations=annotations)
+        if os.path.exists(folder):
+            if not parsed_args.overwrite:
+                parser.error('{} exists, pass --overwrite to replace it'.format(folder))
+            shutil.rmtree(folder)
+
+    statistics = CorpusStatistics(parsed_args.sample_from)
+    depth = Distribution.parse(parsed_args.depth, statistics.depths)
+    source_fanout = Distribution.parse(parsed_args.source_fanout, statistics.source_fanouts)
+    reply_fanout = Distribution.parse(parsed_args.reply_fanout, statistics.reply_fanouts)
+    print('depth {}, source fan-out {}, reply fan-out {}'.format(
+        depth, source_fanout, reply_fanout))
+    generator = CorpusGenerator(
+        statistics,
+        depth=depth,
+        source_fanout=source_fanout,
+        reply_fanout=reply_fanout,
+        max_replies=parsed_args.max_replies,
+        url_rate=parsed_args.url_rate,
+        seed=parsed_args.seed
+    )
+    threads = parsed_args.threads
+    if threads is None:
+        threads = int(round(statistics.thread_count * parsed_args.scale))
+    start_time = time.time()
+    threads, tweets = generate_corpus(generator, parsed_args.name, parsed_args.events, threads,
+                                      parsed_args.seed)
+    print('Wrote {} threads and {} tweets to {} in {:.1f}s'.format(
+        threads, tweets, os.path.normpath(get_datasource_path(parsed_args.name)),
+        time.time() - start_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Report the memory held for each tweet by a tree of Tweet objects and by a ThreadStore, and
+the time to find the root and depth of every tweet in a datasource by walking parents,
+by reading them from each Tweet and by reading the arrays of the ThreadStore.
+"""
+
+import argparse
+import sys
+import tracemalloc
+from time import time
+from rumoureval.objects.thread_store import ThreadStore
+from rumoureval.util.data import import_datasource_threads
+
+
+class DictTweet(object):
+    """A Tweet with an instance `__dict__` holding its children, as Tweets once were."""
+
+    def __init__(self, raw_tweet, children=None, parent=None, is_source=False):
+        self._raw_tweet = raw_tweet
+        self._children = children
+        self._parent = parent
+        self.is_source = is_source
+        for child in self._children:
+            child._parent = self  # pylint:disable=W0212
+
+    def children(self):
+        """Get the child tweets of this tweet."""
+        return iter(self._children)
+
+    def parent(self):
+        """Get the parent tweet of this tweet."""
+        return self._parent
+
+
+def build_dict_tweet(thread, tweet_id, structure, is_source=False):
+    """Build a tree of DictTweets by recursive descent."""
+    children = []
+    for child_tweet_id in structure:
+        if child_tweet_id in thread['replies']:
+            children.append(build_dict_tweet(thread, child_tweet_id, structure[child_tweet_id]))
+    raw_tweet = thread['source'] if is_source else thread['replies'][tweet_id]
+    return DictTweet(raw_tweet, children=children, is_source=is_source)
+
+
+def build_dict_tweets(threads):
+    """Build the DictTweets of every thread, flattened.
+
+    :param threads:
+        imported threads
+    :type threads:
+        `list` of `dict`
+    :rtype:
+        `list` of :class:`DictTweet`
+    """
+    tweets = []
+    for thread in threads:
+        source_id = thread['source']['id_str']
+        tweets.append(build_dict_tweet(thread, source_id, thread['structure'][source_id],
+                                       is_source=True))
+    for tweet in tweets:
+        tweets += list(tweet.children())
+    return tweets
+
+
+def bytes_per_tweet(build, threads):
+    """Measure the memory held by the tweets of a set of threads, without their raw JSON.
+
+    :param build:
+        function building the tweets of the threads
+    :type build:
+        `callable`
+    :param threads:
+        imported threads
+    :type threads:
+        `list` of `dict`
+    :rtype:
+        `tuple` of `float` and the tweets built
+    """
+    tracemalloc.start()
+    tweets = build(threads)
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return held / len(tweets), tweets
+
+
+def walk_parents(tweets):
+    """Find the root and depth of each tweet by walking its parents, summing the depths."""
+    total_depth = 0
+    for tweet in tweets:
+        root = tweet
+        while root.parent() is not None:
+            total_depth += 1
+            root = root.parent()
+    return total_depth
+
+
+def read_store(store):
+    """Read the root and depth of every tweet from the arrays of a store, summing depths."""
+    roots = store.roots  # pylint:disable=W0612
+    return int(store.depths.sum())
+
+
+def read_positions(tweets):
+    """Read the root and depth of each tweet from its view of a store, summing depths."""
+    total_depth = 0
+    for tweet in tweets:
+        root = tweet.root  # pylint:disable=W0612
+        total_depth += tweet.depth
+    return total_depth
+
+
+def main(args=None):
+    """Run the benchmark."""
+    if args is None:
+        args = sys.argv[1:]
+
+    parser = argparse.ArgumentParser(description='Benchmark Tweet objects')
+    parser.add_argument('--datasource', default='train', help='datasource to build')
+    parser.add_argument('--repeat', type=int, default=5, help='runs of each lookup')
+    parsed_args = parser.parse_args(args)
+
+    threads = import_datasource_threads(parsed_args.datasource, include_context=False)
+
+    print('{:<12} {:>16}'.format('tweets', 'bytes per tweet'))
+    held, dict_tweets = bytes_per_tweet(build_dict_tweets, threads)
+    print('{:<12} {:>16.0f}'.format('__dict__', held))
+    held, store = bytes_per_tweet(ThreadStore.from_threads, threads)
+    print('{:<12} {:>16.0f}'.format('ThreadStore', held))
+    print('{} tweets in {} threads'.format(len(store), len(threads)))
+
+    print('{:<12} {:>16}'.format('root, depth', 'ms per corpus'))
+    lookups = [
+        ('parent walk', walk_parents, dict_tweets),
+        ('views', read_positions, store.tweets),
+        ('arrays', read_store, store),
+    ]
+    for name, lookup, tweets in lookups:
+        start_time = time()
+        for _ in range(parsed_args.repeat):
+            lookup(tweets)
+        elapsed = (time() - start_time) / parsed_args.repeat
+        print('{:<12} {:>16.2f}'.format(name, elapsed * 1000))
+
+
+if __name__ == '__main__':
+    main()
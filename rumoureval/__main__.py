@@ -1,27 +1,37 @@
 """RumourEval: Determining rumour veracity and support for rumours."""
 
 import argparse
+import os
 import sys
 from .classification.sdqc import sdqc
 from .classification.veracity_prediction import veracity_prediction
+from .objects.thread_store import slim_tweets
+from .pipeline.tweet_detail_extractor import TWEET_DETAIL_CACHE
 from .scoring.Scorer import Scorer
-from .util.data import import_data, import_annotation_data, output_data_by_class
+from .util.data import (
+    convert_to_jsonl, get_datasource_delta, get_datasource_events, get_datasource_jsonl,
+    get_output_path, import_data, import_annotation_data, output_data_by_class
+)
 from .util.log import setup_logger
 
 
-def main(args=None):
-    """The main routine."""
-    if args is None:
-        args = sys.argv[1:]
+def parse_args(args):
+    """
+    Parse the command line arguments.
 
-    ######################
-    # Set up Environment #
-    ######################
+    :param args:
+        command line arguments
+    :type args:
+        `list` of `str`
+    :rtype:
+        :class:`argparse.Namespace`
+    """
     parser = argparse.ArgumentParser(description='RumourEval, by Tong Liu and Joseph Roque')
     parser.add_argument('--test', action='store_true',
                         help='run with test data. defaults to run with dev data')
     parser.add_argument('--trump', action='store_true',
-                        help='run with trump data. defaults to run with dev data. overridden by --test')
+                        help='run with trump data. defaults to run with dev data. '
+                        'overridden by --test')
     parser.add_argument('--verbose', action='store_true',
                         help='enable verbose logging')
     parser.add_argument('--osorted', action='store_true',
@@ -30,27 +40,250 @@ def main(args=None):
                         help='disable cached classifier')
     parser.add_argument('--plot', action='store_true',
                         help='plot confusion matrices')
-    parsed_args = parser.parse_args()
+    parser.add_argument('--import-workers', type=int, default=None, metavar='N',
+                        help='import data with N processes. defaults to a serial import')
+    parser.add_argument('--async-reads', type=int, default=None, metavar='N',
+                        help='import data with up to N file reads in flight through asyncio')
+    parser.add_argument('--extract-jobs', type=int, default=None, metavar='N',
+                        help='extract tweet features with N processes, or -1 for one per CPU')
+    parser.add_argument('--disable-feature-cache', action='store_true',
+                        help='disable extracted tweet features cached between runs')
+    parser.add_argument('--detail-cache-entries', type=int, default=None, metavar='N',
+                        help='keep the features of up to N tweets in memory. defaults to no limit')
+    parser.add_argument('--detail-cache-mb', type=int, default=None, metavar='MB',
+                        help='keep up to MB megabytes of tweet features in memory')
+    parser.add_argument('--disable-snapshot', action='store_true',
+                        help='disable packed snapshots of imported data')
+    parser.add_argument('--skip-context', action='store_true',
+                        help='skip importing the context documents of each thread')
+    parser.add_argument('--project-fields', action='store_true',
+                        help='keep only the tweet fields used by feature extraction')
+    parser.add_argument('--share-records', action='store_true',
+                        help='share user objects and intern repeated strings across tweets')
+    parser.add_argument('--import-delta', action='store_true',
+                        help='report threads changed since the last snapshot, then exit')
+    parser.add_argument('--events', nargs='+', default=None, metavar='EVENT',
+                        help='import only the threads and annotations of these events')
+    parser.add_argument('--convert-jsonl', action='store_true',
+                        help='convert data to JSON lines files, one thread per line, then exit')
+    parser.add_argument('--gzip', action='store_true',
+                        help='gzip converted JSON lines files')
+    return parser.parse_args(args)
+
+
+def report_import_delta(datasources, parsed_args, logger):
+    """
+    Report the threads of each data source which would be re-imported.
+
+    :param datasources:
+        data sources to report
+    :type datasources:
+        `list` of `str`
+    :param parsed_args:
+        command line arguments
+    :type parsed_args:
+        :class:`argparse.Namespace`
+    :param logger:
+        logger to report to
+    :type logger:
+        :class:`logging.Logger`
+    """
+    for datasource in datasources:
+        jsonl = get_datasource_jsonl(datasource)
+        delta = get_datasource_delta(datasource,
+                                     include_context=not parsed_args.skip_context,
+                                     project_fields=parsed_args.project_fields,
+                                     jsonl=jsonl)
+        if delta is None:
+            if jsonl is not None:
+                logger.info('`%s` data is read from its JSON lines file %s, so its delta '
+                            'is unavailable', datasource, jsonl)
+            else:
+                logger.info('`%s` data is not extracted', datasource)
+            continue
+        logger.info('`%s` data: %d added, %d changed, %d removed threads', datasource,
+                    len(delta['added']), len(delta['changed']), len(delta['removed']))
+        for change in ['added', 'changed', 'removed']:
+            for key in delta[change]:
+                logger.info('\t%s\t%s', change, key)
+
+
+def convert_datasources(datasources, parsed_args, logger):
+    """
+    Convert each data source to a JSON lines file.
+
+    :param datasources:
+        data sources to convert
+    :type datasources:
+        `list` of `str`
+    :param parsed_args:
+        command line arguments
+    :type parsed_args:
+        :class:`argparse.Namespace`
+    :param logger:
+        logger to report to
+    :type logger:
+        :class:`logging.Logger`
+    """
+    for datasource in datasources:
+        if convert_to_jsonl(datasource,
+                            compress=parsed_args.gzip,
+                            include_context=not parsed_args.skip_context) is None:
+            logger.info('`%s` data does not exist', datasource)
+
+
+def select_events(datasources, events, logger):
+    """
+    Select the events each data source has, of those given on the command line.
+
+    :param datasources:
+        data sources to select events from
+    :type datasources:
+        `list` of `str`
+    :param events:
+        events to select, or None to import every event
+    :type events:
+        `list` of `str` or None
+    :param logger:
+        logger to report to
+    :type logger:
+        :class:`logging.Logger`
+    :rtype:
+        `dict` of `str` to `list` of `str` or None
+    """
+    selected = {}
+    for datasource in datasources:
+        selected[datasource] = None
+        if events:
+            selected[datasource] = get_datasource_events(datasource, events) or None
+            if selected[datasource] is None:
+                logger.info('`%s` data has none of the selected events, importing all events',
+                            datasource)
+    return selected
+
+
+def import_datasource(datasource, parsed_args, events):
+    """
+    Import the tweets and annotations of a data source.
+
+    :param datasource:
+        data source to import
+    :type datasource:
+        `str`
+    :param parsed_args:
+        command line arguments
+    :type parsed_args:
+        :class:`argparse.Namespace`
+    :param events:
+        events to import, or None to import every event
+    :type events:
+        `list` of `str` or None
+    :rtype:
+        `tuple` of `list` of :class:`Tweet` and `tuple` of `dict`
+    """
+    use_snapshot = not parsed_args.disable_snapshot
+    tweets = import_data(datasource,
+                         workers=parsed_args.import_workers,
+                         use_snapshot=use_snapshot,
+                         include_context=not parsed_args.skip_context,
+                         project_fields=parsed_args.project_fields,
+                         async_reads=parsed_args.async_reads,
+                         events=events,
+                         share=parsed_args.share_records)
+    annotations = import_annotation_data(datasource, use_snapshot=use_snapshot, events=events)
+    return tweets, annotations
+
+
+def setup_feature_caches(parsed_args):
+    """
+    Bound the tweet features kept in memory, and find the folder to cache extracted tweet
+    features in between runs.
+
+    :param parsed_args:
+        command line arguments
+    :type parsed_args:
+        :class:`argparse.Namespace`
+    :rtype:
+        `str` or None
+    """
+    TWEET_DETAIL_CACHE.resize(
+        max_entries=parsed_args.detail_cache_entries,
+        max_bytes=parsed_args.detail_cache_mb * 1024 * 1024 if parsed_args.detail_cache_mb else None
+    )
+    if parsed_args.disable_feature_cache:
+        return None
+    return os.path.join(get_output_path(), 'features')
+
+
+def score_tasks(eval_datasource, eval_annotations, task_a_results, task_b_results):
+    """
+    Score the results of both tasks and output them.
+
+    :param eval_datasource:
+        data source the tasks were evaluated on
+    :type eval_datasource:
+        `str`
+    :param eval_annotations:
+        annotations of the selected events of the data source, or None to score against
+        the annotations of every event
+    :type eval_annotations:
+        `tuple` of `dict` or None
+    :param task_a_results:
+        classification of each tweet for task A
+    :type task_a_results:
+        `dict`
+    :param task_b_results:
+        classification of each source tweet for task B
+    :type task_b_results:
+        `dict`
+    """
+    scored_annotations = eval_annotations or (None, None)
+    task_a_scorer = Scorer('A', eval_datasource, annotations=scored_annotations[0])
+    task_a_scorer.score(task_a_results)
+
+    task_b_scorer = Scorer('B', eval_datasource, annotations=scored_annotations[1])
+    task_b_scorer.score(task_b_results)
+
+
+def main(args=None):
+    """The main routine."""
+    if args is None:
+        args = sys.argv[1:]
+
+    ######################
+    # Set up Environment #
+    ######################
+    parsed_args = parse_args(args)
     eval_datasource = 'test' if parsed_args.test else ('trump' if parsed_args.trump else 'dev')
+    datasources = ['train', eval_datasource]
 
     # Setup logger
     logger = setup_logger(parsed_args.verbose)
 
+    # Report threads which would be re-imported
+    if parsed_args.import_delta:
+        report_import_delta(datasources, parsed_args, logger)
+        return
+
+    # Convert data to JSON lines files
+    if parsed_args.convert_jsonl:
+        convert_datasources(datasources, parsed_args, logger)
+        return
+
     ########################
     # Begin classification #
     ########################
 
-    # Import training and evaluation datasets
-    tweets_train = import_data('train')
-    tweets_eval = import_data(eval_datasource)
+    # Select events from the datasets which have them
+    events = select_events(datasources, parsed_args.events, logger)
 
-    # Import annotation data for training and evaluation datasets
-    train_annotations = import_annotation_data('train')
-    eval_annotations = import_annotation_data(eval_datasource)
+    # Import training and evaluation datasets, and their annotations
+    tweets_train, train_annotations = import_datasource('train', parsed_args, events['train'])
+    tweets_eval, eval_annotations = import_datasource(eval_datasource, parsed_args,
+                                                      events[eval_datasource])
 
-    # Get the root tweets for each dataset for veracity prediction
+    # Get the root tweets of the training dataset for veracity prediction
     root_tweets_train = [x for x in tweets_train if x.is_source]
-    root_tweets_eval = [x for x in tweets_eval if x.is_source]
 
     # Output tweets sorted by class
     if parsed_args.osorted:
@@ -58,13 +291,26 @@ def main(args=None):
         output_data_by_class(root_tweets_train, train_annotations[0], 'A', prefix='root')
         output_data_by_class(root_tweets_train, train_annotations[1], 'B')
 
+    # Bound the tweet features kept in memory, and cache them between runs
+    feature_cache_folder = setup_feature_caches(parsed_args)
+
     # Perform sdqc task
     task_a_results = sdqc(tweets_train,
                           tweets_eval,
                           train_annotations[0],
                           eval_annotations[0],
                           not parsed_args.disable_cache,
-                          parsed_args.plot)
+                          parsed_args.plot,
+                          n_jobs=parsed_args.extract_jobs,
+                          feature_cache_folder=feature_cache_folder)
+
+    # Replies are only used by sdqc, so release the raw JSON fields which no details are
+    # extracted from. The lists of every tweet are dropped too, as they would keep the replies
+    # alive once their stores only hold them weakly
+    root_tweets_eval = [x for x in tweets_eval if x.is_source]
+    logger.debug('Released the raw JSON of %d replies',
+                 slim_tweets([x for x in tweets_train + tweets_eval if not x.is_source]))
+    del tweets_train, tweets_eval
 
     # Perform veracity prediction task
     task_b_results = veracity_prediction(root_tweets_train,
@@ -72,14 +318,20 @@ def main(args=None):
                                          train_annotations[1],
                                          eval_annotations[1],
                                          task_a_results,
-                                         parsed_args.plot)
+                                         parsed_args.plot,
+                                         n_jobs=parsed_args.extract_jobs,
+                                         feature_cache_folder=feature_cache_folder)
 
     # Score tasks and output results
-    task_a_scorer = Scorer('A', eval_datasource)
-    task_a_scorer.score(task_a_results)
+    # Selected events are scored against their own annotations
+    score_tasks(eval_datasource,
+                eval_annotations if events[eval_datasource] else None,
+                task_a_results,
+                task_b_results)
 
-    task_b_scorer = Scorer('B', eval_datasource)
-    task_b_scorer.score(task_b_results)
+    stats = TWEET_DETAIL_CACHE.stats()
+    logger.debug('Tweet detail cache: %d hits, %d misses, %d evictions, %d entries',
+                 stats.hits, stats.misses, stats.evictions, stats.entries)
 
     logger.info('')
 
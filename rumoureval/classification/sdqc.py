@@ -7,7 +7,6 @@ import numpy as np
 import matplotlib.pyplot as plt
 from sklearn import metrics
 from sklearn.externals import joblib
-from sklearn.feature_extraction import DictVectorizer
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.svm import SVC
@@ -16,6 +15,7 @@ from ..pipeline.item_selector import ItemSelector
 from ..pipeline.feature_counter import FeatureCounter
 from ..pipeline.pipelinize import pipelinize
 from ..pipeline.tweet_detail_extractor import TweetDetailExtractor
+from ..util.annotations import AnnotationIndex, get_tweet_ids
 from ..util.lists import list_to_str
 from ..util.log import get_log_separator
 from ..util.data import get_output_path
@@ -25,6 +25,9 @@ from ..util.plot import plot_confusion_matrix
 LOGGER = logging.getLogger()
 CLASSES = ['comment', 'deny', 'query', 'support']
 
+# Version of the pipelines, so cached pipelines built differently are not loaded
+PIPELINE_CACHE_VERSION = 4
+
 
 def filter_tweets(tweets, filter_short=False, similarity_threshold=0.9):
     """Filter tweets which are believed to cause additional confusion in the classifier.
@@ -49,12 +52,10 @@ def filter_tweets(tweets, filter_short=False, similarity_threshold=0.9):
 
     filtered_tweets = []
     for tweet in tweets:
-        root_tweet = tweet
-        while root_tweet.parent() is not None:
-            root_tweet = root_tweet.parent()
+        root_tweet = tweet.root
 
         # Root tweets should not be filtered
-        if root_tweet == tweet:
+        if root_tweet is tweet:
             filtered_tweets.append(tweet)
             continue
 
@@ -81,7 +82,50 @@ def filter_tweets(tweets, filter_short=False, similarity_threshold=0.9):
     return filtered_tweets
 
 
-def sdqc(tweets_train, tweets_eval, train_annotations, eval_annotations, use_cache, plot):
+def get_pipeline_cache_path(name):
+    """
+    Get the path of a cached pipeline.
+
+    :param name:
+        name of the pipeline, such as 'base'
+    :type name:
+        `str`
+    :rtype:
+        `str`
+    """
+    return os.path.join(get_output_path(),
+                        '{}_pipeline.v{}.pickle'.format(name, PIPELINE_CACHE_VERSION))
+
+
+def load_cached_pipeline(name, n_jobs=None, feature_cache_folder=None):
+    """
+    Load a cached pipeline. Its tweet detail extractor is given the settings of this run, rather
+    than those of the run which cached it.
+
+    :param name:
+        name of the pipeline, such as 'base'
+    :type name:
+        `str`
+    :param n_jobs:
+        number of processes to extract tweet details with, or -1 for one per CPU
+    :type n_jobs:
+        `int` or None
+    :param feature_cache_folder:
+        folder to keep extracted tweet details in between runs, or None to extract them on
+        every run
+    :type feature_cache_folder:
+        `str` or None
+    :rtype:
+        :class:`Pipeline`
+    """
+    pipeline = joblib.load(get_pipeline_cache_path(name))
+    pipeline.set_params(extract_tweets__n_jobs=n_jobs,
+                        extract_tweets__cache_folder=feature_cache_folder)
+    return pipeline
+
+
+def sdqc(tweets_train, tweets_eval, train_annotations, eval_annotations, use_cache, plot,
+         n_jobs=None, feature_cache_folder=None):
     """
     Classify tweets into one of four categories - support (s), deny (d), query(q), comment (c).
 
@@ -109,10 +153,19 @@ def sdqc(tweets_train, tweets_eval, train_annotations, eval_annotations, use_cac
         true to plot confusion matrix
     :type plot:
         `bool`
+    :param n_jobs:
+        number of processes to extract tweet details with, or -1 for one per CPU
+    :type n_jobs:
+        `int` or None
+    :param feature_cache_folder:
+        folder to keep extracted tweet details in between runs, or None to extract them on
+        every run
+    :type feature_cache_folder:
+        `str` or None
     :rtype:
         `dict`
     """
-    # pylint:disable=too-many-locals
+    # pylint:disable=too-many-locals,too-many-arguments,too-many-statements
     LOGGER.info(get_log_separator())
     LOGGER.info('Beginning SDQC Task (Task A)')
 
@@ -122,37 +175,45 @@ def sdqc(tweets_train, tweets_eval, train_annotations, eval_annotations, use_cac
     LOGGER.info('Initializing pipeline')
 
     LOGGER.info('Query pipeline')
-    query_pipeline = build_query_pipeline()
+    query_pipeline = build_query_pipeline(n_jobs=n_jobs, feature_cache_folder=feature_cache_folder)
+    train_annotations = AnnotationIndex.from_dict(train_annotations)
+    eval_annotations = AnnotationIndex.from_dict(eval_annotations)
     query_annotations = generate_one_vs_rest_annotations(train_annotations, 'query')
     eval_annotations_query = generate_one_vs_rest_annotations(eval_annotations, 'query')
     LOGGER.info(query_pipeline)
 
     LOGGER.info('Base pipeline')
-    base_pipeline = build_base_pipeline()
+    base_pipeline = build_base_pipeline(n_jobs=n_jobs, feature_cache_folder=feature_cache_folder)
     LOGGER.info(base_pipeline)
 
-    y_train_base = [train_annotations[x['id_str']] for x in tweets_train]
-    y_train_query = [query_annotations[x['id_str']] for x in tweets_train]
-    y_eval_base = [eval_annotations[x['id_str']] for x in tweets_eval]
-    y_eval_query = [eval_annotations_query[x['id_str']] for x in tweets_eval]
+    train_ids = get_tweet_ids(tweets_train)
+    eval_ids = get_tweet_ids(tweets_eval)
+    y_train_base = train_annotations.labels_for(train_ids)
+    y_train_query = query_annotations.labels_for(train_ids)
+    y_eval_base = eval_annotations.labels_for(eval_ids)
+    y_eval_query = eval_annotations_query.labels_for(eval_ids)
 
     LOGGER.info('Beginning training')
 
     # Training on tweets_train
     start_time = time()
-    if use_cache and os.path.exists(os.path.join(get_output_path(), 'base_pipeline.pickle')):
-        base_pipeline = joblib.load(os.path.join(get_output_path(), 'base_pipeline.pickle'))
+    if use_cache and os.path.exists(get_pipeline_cache_path('base')):
+        base_pipeline = load_cached_pipeline('base',
+                                             n_jobs=n_jobs,
+                                             feature_cache_folder=feature_cache_folder)
     else:
         base_pipeline.fit(tweets_train, y_train_base)
-        joblib.dump(base_pipeline, os.path.join(get_output_path(), 'base_pipeline.pickle'))
+        joblib.dump(base_pipeline, get_pipeline_cache_path('base'))
     LOGGER.info("base_pipeline training:  %0.3fs", time() - start_time)
 
     start_time = time()
-    if use_cache and os.path.exists(os.path.join(get_output_path(), 'query_pipeline.pickle')):
-        query_pipeline = joblib.load(os.path.join(get_output_path(), 'query_pipeline.pickle'))
+    if use_cache and os.path.exists(get_pipeline_cache_path('query')):
+        query_pipeline = load_cached_pipeline('query',
+                                              n_jobs=n_jobs,
+                                              feature_cache_folder=feature_cache_folder)
     else:
         query_pipeline.fit(tweets_train, y_train_query)
-        joblib.dump(query_pipeline, os.path.join(get_output_path(), 'query_pipeline.pickle'))
+        joblib.dump(query_pipeline, get_pipeline_cache_path('query'))
     LOGGER.info("query_pipeline training: %0.3fs", time() - start_time)
 
     LOGGER.info("")
@@ -182,9 +243,7 @@ def sdqc(tweets_train, tweets_eval, train_annotations, eval_annotations, use_cac
     # Print misclassified query vs not_query
     for i, prediction in enumerate(query_predictions):
         if (prediction == 'query' and y_eval_base[i] != 'query') or (prediction == 'not_query' and y_eval_base[i] == 'query'):
-            root = tweets_eval[i]
-            while root.parent() != None:
-                root = root.parent()
+            root = tweets_eval[i].root
             LOGGER.debug('{}\t{}\t{}\n\t\t{}'.format(
                 y_eval_base[i],
                 prediction,
@@ -236,24 +295,35 @@ def generate_one_vs_rest_annotations(annotations, one):
     :param annotations:
         set of annotations for tweet IDs
     :type annotations
-        `dict`
+        :class:`AnnotationIndex`
     :param one:
         the one annotation vs rest
     :type one:
         `str`
+    :rtype:
+        :class:`AnnotationIndex`
     """
-    one_vs_rest_annotations = {}
-    for tweet_id in annotations:
-        one_vs_rest_annotations[tweet_id] = \
-                annotations[tweet_id] if annotations[tweet_id] == one else 'not_{}'.format(one)
-    return one_vs_rest_annotations
+    return annotations.one_vs_rest(one)
+
 
+def build_query_pipeline(n_jobs=None, feature_cache_folder=None):
+    """Build a pipeline for predicting if a tweet is classified as query or not.
 
-def build_query_pipeline():
-    """Build a pipeline for predicting if a tweet is classified as query or not."""
+    :param n_jobs:
+        number of processes to extract tweet details with, or -1 for one per CPU
+    :type n_jobs:
+        `int` or None
+    :param feature_cache_folder:
+        folder to keep extracted tweet details in between runs, or None to extract them on
+        every run
+    :type feature_cache_folder:
+        `str` or None
+    """
     return Pipeline([
         # Extract useful features from tweets
-        ('extract_tweets', TweetDetailExtractor(task='A', strip_hashtags=False, strip_mentions=False)),
+        ('extract_tweets', TweetDetailExtractor(task='A', strip_hashtags=False,
+                                                strip_mentions=False, n_jobs=n_jobs,
+                                                cache_folder=feature_cache_folder)),
 
         # Combine processing of features
         ('union', FeatureUnion(
@@ -263,47 +333,40 @@ def build_query_pipeline():
                 ('count_depth', Pipeline([
                     ('selector', ItemSelector(keys='depth')),
                     ('count', FeatureCounter(names='depth')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 # Boolean features
                 ('is_news', Pipeline([
                     ('selector', ItemSelector(keys='is_news')),
                     ('count', FeatureCounter(names='is_news')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 ('is_root', Pipeline([
                     ('selector', ItemSelector(keys='is_root')),
                     ('count', FeatureCounter(names='is_root')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 ('ends_with_question', Pipeline([
                     ('selector', ItemSelector(keys='ends_with_question')),
                     ('count', FeatureCounter(names='ends_with_question')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 # Punctuation
                 ('count_question_marks', Pipeline([
                     ('selector', ItemSelector(keys='question_mark_count')),
                     ('count', FeatureCounter(names='question_mark_count')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 # Count positive and negative words in the tweets
                 ('pos_neg_sentiment', Pipeline([
                     ('selector', ItemSelector(keys=['positive_words', 'negative_words'])),
                     ('count', FeatureCounter(names=['positive_words', 'negative_words'])),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 # Count querying words in the tweets
                 ('querying_words', Pipeline([
                     ('selector', ItemSelector(keys='querying_words')),
                     ('count', FeatureCounter(names='querying_words')),
-                    ('vect', DictVectorizer()),
                 ])),
 
             ],
@@ -330,11 +393,24 @@ def build_query_pipeline():
     ])
 
 
-def build_base_pipeline():
-    """Build a pipeline for predicting all 4 SDQC classes."""
+def build_base_pipeline(n_jobs=None, feature_cache_folder=None):
+    """Build a pipeline for predicting all 4 SDQC classes.
+
+    :param n_jobs:
+        number of processes to extract tweet details with, or -1 for one per CPU
+    :type n_jobs:
+        `int` or None
+    :param feature_cache_folder:
+        folder to keep extracted tweet details in between runs, or None to extract them on
+        every run
+    :type feature_cache_folder:
+        `str` or None
+    """
     return Pipeline([
         # Extract useful features from tweets
-        ('extract_tweets', TweetDetailExtractor(task='A', strip_hashtags=False, strip_mentions=False)),
+        ('extract_tweets', TweetDetailExtractor(task='A', strip_hashtags=False,
+                                                strip_mentions=False, n_jobs=n_jobs,
+                                                cache_folder=feature_cache_folder)),
 
         # Combine processing of features
         ('union', FeatureUnion(
@@ -351,109 +427,92 @@ def build_base_pipeline():
                 ('is_news', Pipeline([
                     ('selector', ItemSelector(keys='is_news')),
                     ('count', FeatureCounter(names='is_news')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 ('is_root', Pipeline([
                     ('selector', ItemSelector(keys='is_root')),
                     ('count', FeatureCounter(names='is_root')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 ('verified', Pipeline([
                     ('selector', ItemSelector(keys='verified')),
                     ('count', FeatureCounter(names='verified')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 ('ends_with_question', Pipeline([
                     ('selector', ItemSelector(keys='ends_with_question')),
                     ('count', FeatureCounter(names='ends_with_question')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 # Punctuation
                 ('count_periods', Pipeline([
                     ('selector', ItemSelector(keys='period_count')),
                     ('count', FeatureCounter(names='period_count')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 ('count_question_marks', Pipeline([
                     ('selector', ItemSelector(keys='question_mark_count')),
                     ('count', FeatureCounter(names='question_mark_count')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 ('count_exclamations', Pipeline([
                     ('selector', ItemSelector(keys='exclamation_count')),
                     ('count', FeatureCounter(names='exclamation_count')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 ('count_ellipsis', Pipeline([
                     ('selector', ItemSelector(keys='ellipsis_count')),
                     ('count', FeatureCounter(names='ellipsis_count')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 ('count_chars', Pipeline([
                     ('selector', ItemSelector(keys='char_count')),
                     ('count', FeatureCounter(names='char_count')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 # Count features
                 ('count_depth', Pipeline([
                     ('selector', ItemSelector(keys='depth')),
                     ('count', FeatureCounter(names='depth')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 ('count_hashtags', Pipeline([
                     ('selector', ItemSelector(keys='hashtags')),
                     ('count', FeatureCounter(names='hashtags')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 ('count_mentions', Pipeline([
                     ('selector', ItemSelector(keys='user_mentions')),
                     ('count', FeatureCounter(names='user_mentions')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 ('count_retweets', Pipeline([
                     ('selector', ItemSelector(keys='retweet_count')),
                     ('count', FeatureCounter(names='retweet_count')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 # Count positive and negative words in the tweets
                 ('pos_neg_sentiment', Pipeline([
                     ('selector', ItemSelector(keys=['positive_words', 'negative_words'])),
                     ('count', FeatureCounter(names=['positive_words', 'negative_words'])),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 # Count denying words in the tweets
                 ('denying_words', Pipeline([
                     ('selector', ItemSelector(keys='denying_words')),
                     ('count', FeatureCounter(names='denying_words')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 # Count querying words in the tweets
                 ('querying_words', Pipeline([
                     ('selector', ItemSelector(keys='querying_words')),
                     ('count', FeatureCounter(names='querying_words')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 # Count swear words and personal attacks
                 ('offensiveness', Pipeline([
                     ('selector', ItemSelector(keys=['swear_words', 'personal_words'])),
                     ('count', FeatureCounter(names=['swear_words', 'personal_words'])),
-                    ('vect', DictVectorizer()),
                 ])),
 
             ],
@@ -5,7 +5,6 @@ from time import time
 import numpy as np
 import matplotlib.pyplot as plt
 from sklearn import metrics
-from sklearn.feature_extraction import DictVectorizer
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.svm import SVC
 from sklearn.pipeline import FeatureUnion, Pipeline
@@ -14,6 +13,7 @@ from ..pipeline.item_selector import ItemSelector
 from ..pipeline.feature_counter import FeatureCounter
 from ..pipeline.tweet_detail_extractor import TweetDetailExtractor
 from ..pipeline.pipelinize import pipelinize
+from ..util.annotations import AnnotationIndex, get_tweet_ids
 from ..util.lists import list_to_str
 from ..util.log import get_log_separator
 from ..util.plot import plot_confusion_matrix
@@ -31,22 +31,18 @@ def filter_tweets(tweets, annotations):
     :type tweets:
         `list` of :class:`Tweet`
     :param annotations:
-        Mapping of tweet id to their annotations
+        Index of tweet id to their annotations
     :type annotations:
-        `dict`
+        :class:`AnnotationIndex`
     :rtype:
         `list` of :class:`Tweet`
     """
-    filtered_tweets = []
-    for tweet in tweets:
-        if annotations[tweet['id_str']] == 'unverified':
-            continue
-        filtered_tweets.append(tweet)
-
-    return filtered_tweets
+    labels = annotations.labels_for(tweets)
+    return [tweet for tweet, label in zip(tweets, labels) if label != 'unverified']
 
 
-def veracity_prediction(tweets_train, tweets_eval, train_annotations, eval_annotations, task_a_results, plot):
+def veracity_prediction(tweets_train, tweets_eval, train_annotations, eval_annotations,
+                        task_a_results, plot, n_jobs=None, feature_cache_folder=None):
     """
     Predict the veracity of tweets.
 
@@ -61,11 +57,11 @@ def veracity_prediction(tweets_train, tweets_eval, train_annotations, eval_annot
     :param train_annotations:
         veracity prediction task annotations for training data
     :type train_annotations:
-        `list` of `str`
+        `dict`
     :param eval_annotations:
         veracity prediction task annotations for evaluation data
     :type eval_annotations:
-        `list` of `str`
+        `dict`
     :param task_a_results:
         classification results from task A
     :type task_a_results:
@@ -74,20 +70,36 @@ def veracity_prediction(tweets_train, tweets_eval, train_annotations, eval_annot
         true to plot confusion matrix
     :type plot:
         `bool`
+    :param n_jobs:
+        number of processes to extract tweet details with, or -1 for one per CPU
+    :type n_jobs:
+        `int` or None
+    :param feature_cache_folder:
+        folder to keep extracted tweet details in between runs, or None to extract them on
+        every run
+    :type feature_cache_folder:
+        `str` or None
     :rtype:
         `dict`
     """
-    # pylint:disable=too-many-locals
+    # pylint:disable=too-many-locals,too-many-arguments
     LOGGER.info(get_log_separator())
     LOGGER.info('Beginning Veracity Prediction Task (Task B)')
 
+    train_annotations = AnnotationIndex.from_dict(train_annotations)
+    eval_annotations = AnnotationIndex.from_dict(eval_annotations)
+
     LOGGER.info('Filter tweets from training set')
     tweets_train = filter_tweets(tweets_train, train_annotations)
 
     LOGGER.info('Initializing pipeline')
     pipeline = Pipeline([
         # Extract useful features from tweets
-        ('extract_tweets', TweetDetailExtractor(task='B', strip_hashtags=False, strip_mentions=False, classifications=task_a_results)),
+        ('extract_tweets', TweetDetailExtractor(task='B', strip_hashtags=False,
+                                                strip_mentions=False,
+                                                classifications=task_a_results,
+                                                n_jobs=n_jobs,
+                                                cache_folder=feature_cache_folder)),
 
         # Combine processing of features
         ('union', FeatureUnion(
@@ -104,51 +116,43 @@ def veracity_prediction(tweets_train, tweets_eval, train_annotations, eval_annot
                 ('percentage_of_support', Pipeline([
                     ('selector', ItemSelector(keys='support_percentage')),
                     ('count', FeatureCounter(names='support_percentage')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 ('percentage_of_denies', Pipeline([
                     ('selector', ItemSelector(keys='denies_percentage')),
                     ('count', FeatureCounter(names='denies_percentage')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 ('percentage_of_queries', Pipeline([
                     ('selector', ItemSelector(keys='queries_percentage')),
                     ('count', FeatureCounter(names='queries_percentage')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 # Count features
                 ('number_count', Pipeline([
                     ('selector', ItemSelector(keys='number_count')),
                     ('count', FeatureCounter(names='number_count')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 ('count_chars', Pipeline([
                     ('selector', ItemSelector(keys='char_count')),
                     ('count', FeatureCounter(names='char_count')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 # Boolean features
                 ('verified', Pipeline([
                     ('selector', ItemSelector(keys='verified')),
                     ('count', FeatureCounter(names='verified')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 ('is_root', Pipeline([
                     ('selector', ItemSelector(keys='is_root')),
                     ('count', FeatureCounter(names='is_root')),
-                    ('vect', DictVectorizer()),
                 ])),
 
                 ('has_url', Pipeline([
                     ('selector', ItemSelector(keys='has_url')),
                     ('count', FeatureCounter(names='has_url')),
-                    ('vect', DictVectorizer()),
                 ])),
 
             ],
@@ -184,8 +188,8 @@ def veracity_prediction(tweets_train, tweets_eval, train_annotations, eval_annot
         ])
     LOGGER.info(pipeline)
 
-    y_train = [train_annotations[x['id_str']] for x in tweets_train]
-    y_eval = [eval_annotations[x['id_str']] for x in tweets_eval]
+    y_train = train_annotations.labels_for(get_tweet_ids(tweets_train))
+    y_eval = eval_annotations.labels_for(get_tweet_ids(tweets_eval))
 
     # Training on tweets_train
     start_time = time()
@@ -7,6 +7,9 @@ Minqing Hu and Bing Liu. "Mining and Summarizing Customer Reviews."
         Washington, USA,
 
 Denial and querying words hand-tuned.
+
+A lexicon is only matched against tweets once it is listed in `LEXICONS`, at the end of this
+module, under the name of the `<name>_words` detail it adds.
 """
 
 # Races, religions, and political parties
@@ -8322,4 +8325,16 @@ NEGATIVE_WORDS = frozenset([
     "zealous",
     "zealously",
     "zombie",
-])
\ No newline at end of file
+])
+
+
+# Lexicons matched against the stemmed tokens of each tweet. Each adds a `<name>_words` detail
+# holding the tokens it matched
+LEXICONS = [
+    ('positive', POSITIVE_WORDS),
+    ('negative', NEGATIVE_WORDS),
+    ('querying', QUERYING_WORDS),
+    ('denying', DENYING_WORDS),
+    ('swear', SWEAR_WORDS),
+    ('personal', RACES_RELIGIONS_POLITICAL),
+]
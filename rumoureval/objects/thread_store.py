@@ -0,0 +1,546 @@
+"""Columnar storage for the tweets of whole corpora"""
+
+import weakref
+from collections import namedtuple
+import numpy as np
+from .tweet import MISSING_TIMESTAMP, Tweet
+from ..util.tweet_json import project
+from ..util.tweet_time import parse_created_at
+
+
+# Fields of a tweet which details are extracted from. Creation times are parsed into the store
+# when it is built, but are kept so a store built again from slimmed tweets still has them
+EXTRACTED_TWEET_FIELDS = {
+    'id': True,
+    'id_str': True,
+    'text': True,
+    'created_at': True,
+    'retweet_count': True,
+    'favorite_count': True,
+    'hashtags': True,
+    'user_mentions': True,
+    'user': {
+        'id_str': True,
+        'screen_name': True,
+        'verified': True,
+        'created_at': True,
+    },
+    'entities': {
+        'hashtags': True,
+        'user_mentions': True,
+    },
+}
+
+
+# Facts about the subtree below each tweet of a store, computed once for the whole store
+ThreadAggregates = namedtuple('ThreadAggregates', [
+    # Tweets in the subtree, including the tweet itself
+    'subtree_sizes',
+    # Replies between the tweet and the deepest tweet in its subtree
+    'max_depths',
+    # Leaves of the subtree, so the number of reply chains ending below the tweet
+    'branch_counts',
+    # Index of each tweet in a depth first, pre-order walk of the store
+    'preorder',
+    # Positions of the tweets in pre-order, so each subtree is a contiguous slice
+    'preorder_positions',
+])
+
+
+def _timestamp(created_at):
+    """Parse a creation time for a timestamp column, marking an unknown time as missing."""
+    timestamp = parse_created_at(created_at)
+    return MISSING_TIMESTAMP if timestamp is None else timestamp
+
+
+class _Columns(object):
+    """Columns of a :class:`ThreadStore`, as lists while threads are being added."""
+    # pylint:disable=too-few-public-methods,too-many-instance-attributes
+
+    def __init__(self):
+        self.tweet_ids = []
+        self.raw_tweets = []
+        self.parents = []
+        self.roots = []
+        self.depths = []
+        self.thread_index = []
+        self.sources = []
+        self.events = []
+        self.users = []
+        self.timestamps = []
+        self.child_starts = []
+        self.child_counts = []
+        self.event_names = []
+        self.user_ids = []
+        self.user_timestamps = []
+        self._event_index = {}
+        self._user_index = {}
+
+    def _intern(self, value, index, values):
+        """Get the position of a value in a table, adding it if it is new."""
+        position = index.get(value)
+        if position is None:
+            position = index[value] = len(values)
+            values.append(value)
+        return position
+
+    def _add_user(self, user):
+        """
+        Get the position of a user in the user table, adding it if it is new. Accounts are
+        never re-created, so the creation time of each user is only parsed once.
+        """
+        user_id = user.get('id_str') or (str(user['id']) if 'id' in user else None)
+        position = self._user_index.get(user_id) if user_id is not None else None
+        if position is None:
+            # Users without an ID are never matched with one another
+            position = len(self.user_ids)
+            if user_id is not None:
+                self._user_index[user_id] = position
+            self.user_ids.append(user_id)
+            self.user_timestamps.append(_timestamp(user.get('created_at')))
+        return position
+
+    def add_tweets(self, raw_tweet, children, is_source=False):
+        """
+        Add a tweet and the trees of its replies, which are tweets of other stores, walking
+        them breadth first so the replies to each tweet are stored together.
+
+        :rtype:
+            `list` of :class:`Tweet` at each position added, or None for the added tweet
+        """
+        root = len(self.tweet_ids)
+        self._add_tweet(raw_tweet.get('id', -1), raw_tweet, -1, root, 0, 0,
+                        self._intern(None, self._event_index, self.event_names))
+        self.sources[root] = is_source
+
+        tweets = [None]
+        replies = [children]
+        position = root
+        while position < len(self.tweet_ids):
+            depth = self.depths[position] + 1
+            self.child_starts[position] = len(self.tweet_ids)
+            for child in replies[position - root]:
+                self._add_tweet(child.store.tweet_ids.item(child.position), child.raw(),
+                                position, root, depth, len(self.tweet_ids) - root,
+                                self._intern(child.event, self._event_index, self.event_names))
+                self.sources[-1] = child.is_source
+                tweets.append(child)
+                replies.append(list(child.children()))
+            self.child_counts[position] = len(self.tweet_ids) - self.child_starts[position]
+            position += 1
+        return tweets
+
+    def add_tree(self, tweet_data, tweet_id, structure, is_source=False):
+        """
+        Add the tweets of a tree to the columns, walking its structure breadth first so
+        the replies to each tweet are stored together. Replies which are missing are
+        skipped along with their own replies.
+
+        :rtype:
+            `int` position of the root of the tree, or None if the root is missing
+        """
+        replies = tweet_data['replies']
+        raw_tweet = tweet_data['source'] if is_source else replies.get(tweet_id)
+        if raw_tweet is None:
+            return None
+
+        event = self._intern(tweet_data.get('event'), self._event_index, self.event_names)
+        root = len(self.tweet_ids)
+        self._add_tweet(tweet_id, raw_tweet, -1, root, 0, 0, event)
+        self.sources[root] = is_source
+
+        subtrees = [structure]
+        position = root
+        while position < len(self.tweet_ids):
+            subtree = subtrees[position - root]
+            depth = self.depths[position] + 1
+            self.child_starts[position] = len(self.tweet_ids)
+            for child_tweet_id in subtree:
+                raw_tweet = replies.get(child_tweet_id)
+                if raw_tweet is not None:
+                    self._add_tweet(child_tweet_id, raw_tweet, position, root, depth,
+                                    len(self.tweet_ids) - root, event)
+                    subtrees.append(subtree[child_tweet_id])
+            self.child_counts[position] = len(self.tweet_ids) - self.child_starts[position]
+            position += 1
+        return root
+
+    def _add_tweet(self, tweet_id, raw_tweet, parent, root, depth, thread_index, event):
+        """Append a single tweet to the columns."""
+        # pylint:disable=too-many-arguments
+        user = raw_tweet.get('user') or {}
+        self.tweet_ids.append(int(tweet_id))
+        self.raw_tweets.append(raw_tweet)
+        self.parents.append(parent)
+        self.roots.append(root)
+        self.depths.append(depth)
+        self.thread_index.append(thread_index)
+        self.sources.append(False)
+        self.events.append(event)
+        self.users.append(self._add_user(user))
+        self.timestamps.append(_timestamp(raw_tweet.get('created_at')))
+        self.child_starts.append(0)
+        self.child_counts.append(0)
+
+
+class _WeakTweets(object):
+    """
+    The tweets of a :class:`ThreadStore`, held weakly so that neither the store nor its tweets
+    are kept alive by the other. A tweet which is no longer held elsewhere is freed, and is
+    created again the next time it is reached, so live tweets can still be compared by identity.
+    """
+
+    def __init__(self, store, tweets):
+        self._store = weakref.ref(store)
+        self._size = len(tweets)
+        self._tweets = weakref.WeakValueDictionary(enumerate(tweets))
+
+    def __getitem__(self, position):
+        tweet = self._tweets.get(position)
+        if tweet is None:
+            if not 0 <= position < self._size:
+                raise IndexError('Tweet position out of range: {}'.format(position))
+            tweet = self._tweets[position] = self._store().view(position)
+        return tweet
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for position in range(self._size):
+            yield self[position]
+
+
+class ThreadStore(object):
+    """
+    The tweets of a corpus of threads held as parallel arrays, one entry per tweet.
+
+    Each thread is stored breadth first, so a thread's root comes before its replies and
+    the replies to each tweet are stored together. Thread positions, such as parents, roots
+    and the start of each tweet's replies, are indices into the arrays. :class:`Tweet`
+    objects are views of a single position, created once so they can be compared by identity.
+    """
+    # pylint:disable=too-many-instance-attributes
+
+    def __init__(self, columns, tweets=None):
+        """Initialize ThreadStore.
+
+        :param columns:
+            columns of every thread in the store
+        :type columns:
+            :class:`_Columns`
+        :param tweets:
+            existing tweets to move into the store at each position, or None at positions
+            which need a new tweet. Defaults to new tweets at every position
+        :type tweets:
+            `list` of :class:`Tweet` or None
+        """
+        self.tweet_ids = np.array(columns.tweet_ids, dtype=np.int64)
+        self.parents = np.array(columns.parents, dtype=np.int32)
+        self.roots = np.array(columns.roots, dtype=np.int32)
+        self.depths = np.array(columns.depths, dtype=np.int32)
+        self.thread_index = np.array(columns.thread_index, dtype=np.int32)
+        self.sources = np.array(columns.sources, dtype=bool)
+        self.events = np.array(columns.events, dtype=np.int32)
+        self.users = np.array(columns.users, dtype=np.int32)
+        self.timestamps = np.array(columns.timestamps, dtype=np.int64)
+        self.child_starts = np.array(columns.child_starts, dtype=np.int32)
+        self.child_counts = np.array(columns.child_counts, dtype=np.int32)
+        self.event_names = columns.event_names
+        self.user_ids = columns.user_ids
+        self.user_timestamps = np.array(columns.user_timestamps, dtype=np.int64)
+        self.raw_tweets = columns.raw_tweets
+        self._aggregates = None
+
+        # Roots are stored before their replies, so each root is created before it is needed
+        self.tweets = []
+        for position, (root, depth) in enumerate(zip(columns.roots, columns.depths)):
+            root = self.tweets[root] if root != position else None
+            tweet = tweets[position] if tweets is not None else None
+            if tweet is None:
+                tweet = Tweet.view(self, position, root, depth)
+            else:
+                tweet.attach(self, position, root, depth)
+            self.tweets.append(tweet)
+
+    @classmethod
+    def from_threads(cls, threads):
+        """
+        Create a store of the tweets of a set of threads.
+
+        :param threads:
+            imported threads
+        :type threads:
+            iterable of `dict`
+        :rtype:
+            :class:`ThreadStore`
+        """
+        columns = _Columns()
+        for thread in threads:
+            source_id = thread['source']['id_str']
+            columns.add_tree(thread, source_id, thread['structure'][source_id], is_source=True)
+        return cls(columns)
+
+    @classmethod
+    def from_tweet(cls, tweet, raw_tweet, children, is_source=False):
+        """
+        Create a store of a tweet and the trees of its replies, which are moved into it from
+        their own stores.
+
+        :param tweet:
+            tweet to make a view of the root of the store
+        :type tweet:
+            :class:`Tweet`
+        :param raw_tweet:
+            JSON of the tweet
+        :type raw_tweet:
+            `dict`
+        :param children:
+            replies to the tweet
+        :type children:
+            `list` of :class:`Tweet`
+        :param is_source:
+            True if the tweet is the source tweet of a thread, False otherwise
+        :type is_source:
+            `bool`
+        :rtype:
+            :class:`ThreadStore`
+        """
+        columns = _Columns()
+        tweets = columns.add_tweets(raw_tweet, children, is_source=is_source)
+        tweets[0] = tweet
+        return cls(columns, tweets=tweets)
+
+    @classmethod
+    def from_tree(cls, tweet_data, tweet_id, structure, is_source=False):
+        """
+        Create a store of the tweets of a single tree within a thread.
+
+        :param tweet_data:
+            A single Twitter thread
+        :type tweet_data:
+            `dict`
+        :param tweet_id:
+            ID of the root of the tree
+        :type tweet_id:
+            `str`
+        :param structure:
+            Structure that children tweets follow
+        :type structure:
+            `list` or `dict`
+        :param is_source:
+            True if the root is the source tweet of the thread, False otherwise
+        :type is_source:
+            `bool`
+        :rtype:
+            :class:`ThreadStore`
+        """
+        columns = _Columns()
+        columns.add_tree(tweet_data, tweet_id, structure, is_source=is_source)
+        return cls(columns)
+
+    def __len__(self):
+        return len(self.raw_tweets)
+
+    def view(self, position):
+        """
+        Create a new :class:`Tweet` viewing a position of the store, such as one which was
+        freed after :meth:`release_tweets`.
+
+        :param position:
+            position of the tweet
+        :type position:
+            `int`
+        :rtype:
+            :class:`Tweet`
+        """
+        root = self.roots.item(position)
+        return Tweet.view(self, position, self.tweets[root] if root != position else None,
+                          self.depths.item(position))
+
+    def release_tweets(self):
+        """
+        Hold the tweets of the store weakly. Each tweet refers to its store, so while the store
+        holds its tweets they form a cycle, which is only freed by the garbage collector once
+        nothing else holds any of them. Afterwards, tweets are freed as soon as nothing else
+        holds them, and the store once none of its tweets are held.
+        """
+        if isinstance(self.tweets, list):
+            self.tweets = _WeakTweets(self, self.tweets)
+
+    def source_positions(self):
+        """
+        Get the positions of the roots of every thread.
+
+        :rtype:
+            `numpy.ndarray` of `int`
+        """
+        return np.flatnonzero(self.parents < 0)
+
+    def thread_positions(self, root):
+        """
+        Get the positions of the tweets of a thread, in breadth first order.
+
+        :param root:
+            position of the root of the thread
+        :type root:
+            `int`
+        :rtype:
+            `numpy.ndarray` of `int`
+        """
+        return np.flatnonzero(self.roots == root)
+
+    def thread_sizes(self):
+        """
+        Get the number of tweets in the thread of each tweet.
+
+        :rtype:
+            `numpy.ndarray` of `int`
+        """
+        return np.bincount(self.roots, minlength=len(self))[self.roots]
+
+    def breadth_first_order(self):
+        """
+        Get the positions of every tweet, ordered by depth and then by thread, as a breadth
+        first walk starting from every root at once visits them.
+
+        :rtype:
+            `numpy.ndarray` of `int`
+        """
+        return np.argsort(self.depths, kind='mergesort')
+
+    def positions(self, tweet_ids):
+        """
+        Find the positions of a set of tweets from their IDs.
+
+        :param tweet_ids:
+            IDs of the tweets
+        :type tweet_ids:
+            `numpy.ndarray` of `int`
+        :raises KeyError:
+            if any of the tweets are not in the store
+        :rtype:
+            `numpy.ndarray` of `int`
+        """
+        tweet_ids = np.asarray(tweet_ids, dtype=np.int64)
+        order = np.argsort(self.tweet_ids, kind='mergesort')
+        sorted_ids = self.tweet_ids[order]
+        found = np.minimum(np.searchsorted(sorted_ids, tweet_ids), len(sorted_ids) - 1)
+        if len(sorted_ids) == 0 or (sorted_ids[found] != tweet_ids).any():
+            raise KeyError('Tweets are not in the store')
+        return order[found]
+
+    def index(self):
+        """
+        Get every tweet in the store by its ID.
+
+        :rtype:
+            `dict` of `str` to :class:`Tweet`
+        """
+        return {raw_tweet['id_str']: tweet
+                for raw_tweet, tweet in zip(self.raw_tweets, self.tweets)}
+
+    @property
+    def aggregates(self):
+        """
+        Subtree sizes, depths, branch counts and pre-order of every tweet, computed on first
+        access in a single pass over the levels of the store.
+
+        :rtype:
+            :class:`ThreadAggregates`
+        """
+        if self._aggregates is None:
+            self._aggregates = self._aggregate()
+        return self._aggregates
+
+    def _aggregate(self):
+        """
+        Compute the aggregates of every subtree, level by level. Each level of every thread is
+        handled at once, from the deepest level up for subtree totals and from the roots down
+        for the pre-order.
+
+        :rtype:
+            :class:`ThreadAggregates`
+        """
+        # pylint:disable=too-many-locals
+        order = self.breadth_first_order()
+        max_depth = self.depths.max() if len(self) else 0
+        levels = np.searchsorted(self.depths[order], np.arange(max_depth + 2))
+
+        subtree_sizes = np.ones(len(self), dtype=np.int64)
+        max_depths = np.zeros(len(self), dtype=np.int32)
+        branch_counts = (self.child_counts == 0).astype(np.int64)
+        for depth in range(len(levels) - 2, 0, -1):
+            level = order[levels[depth]:levels[depth + 1]]
+            parents = self.parents[level]
+            np.add.at(subtree_sizes, parents, subtree_sizes[level])
+            np.maximum.at(max_depths, parents, max_depths[level] + 1)
+            np.add.at(branch_counts, parents, branch_counts[level])
+
+        # Siblings are stored together and in order within each level, so a tweet's pre-order
+        # index follows its parent's, after the subtrees of its earlier siblings
+        preorder = np.zeros(len(self), dtype=np.int64)
+        for depth in range(len(levels) - 1):
+            level = order[levels[depth]:levels[depth + 1]]
+            sizes = subtree_sizes[level]
+            earlier = np.cumsum(sizes) - sizes
+            if depth == 0:
+                preorder[level] = earlier
+                continue
+            parents = self.parents[level]
+            first = np.ones(len(level), dtype=bool)
+            first[1:] = parents[1:] != parents[:-1]
+            group_starts = np.maximum.accumulate(np.where(first, np.arange(len(level)), 0))
+            preorder[level] = preorder[parents] + 1 + earlier - earlier[group_starts]
+
+        preorder_positions = np.empty(len(self), dtype=np.int64)
+        preorder_positions[preorder] = np.arange(len(self))
+        return ThreadAggregates(subtree_sizes, max_depths, branch_counts, preorder,
+                                preorder_positions)
+
+    def descendant_positions(self, position):
+        """
+        Get the positions of the tweets below a tweet, in depth first order.
+
+        :param position:
+            position of the tweet
+        :type position:
+            `int`
+        :rtype:
+            `numpy.ndarray` of `int`
+        """
+        aggregates = self.aggregates
+        start = aggregates.preorder.item(position)
+        end = start + aggregates.subtree_sizes.item(position)
+        return aggregates.preorder_positions[start + 1:end]
+
+
+def slim_tweets(tweets, fields=None):
+    """
+    Release the raw JSON of a set of tweets, keeping only the fields which are still read, and
+    release the stores holding them with :meth:`ThreadStore.release_tweets`. Other tweets in
+    the same stores, such as the source tweets of threads, keep all of their fields. The kept
+    fields are those which details are extracted from, so details of slimmed tweets can still
+    be extracted, with any settings.
+
+    :param tweets:
+        tweets to slim
+    :type tweets:
+        `list` of :class:`Tweet`
+    :param fields:
+        fields to keep, with nested `dict`s selecting fields of nested objects. Defaults to
+        `EXTRACTED_TWEET_FIELDS`
+    :type fields:
+        `dict` or None
+    :rtype:
+        `int` number of tweets slimmed
+    """
+    if fields is None:
+        fields = EXTRACTED_TWEET_FIELDS
+    stores = {}
+    for tweet in tweets:
+        tweet.store.raw_tweets[tweet.position] = project(tweet.raw(), fields)
+        stores[id(tweet.store)] = tweet.store
+    for store in stores.values():
+        store.release_tweets()
+    return len(tweets)
@@ -1,21 +1,204 @@
 """Tweet properties and context"""
 
 
+# Timestamp of tweets and users without a known creation time, the smallest int64, which no
+# real creation time can be
+MISSING_TIMESTAMP = -2 ** 63
+
+
+def _known(timestamp):
+    """Get a timestamp read from a store, or None if it is missing."""
+    return None if timestamp == MISSING_TIMESTAMP else timestamp
+
+
 class Tweet(object):
     """
     Contains details about a single Tweet, including the poster, the context,
     and references to any parents or children.
+
+    A Tweet is a view of one position in a :class:`ThreadStore`, which holds the tweets of
+    whole corpora as arrays. The root and depth of each tweet are read by most features, so
+    they are also set on the tweet when its store is built, and are never found by walking
+    parents. Other values are read from the arrays with `ndarray.item`, which returns Python
+    scalars without creating a NumPy scalar first. Subtree aggregates are computed for the
+    whole store the first time any of them is read, so each is then a single lookup.
     """
 
+    __slots__ = ('_store', '_position', '_root', 'depth', '__weakref__')
+
 
     def __init__(self, raw_tweet, children=None, parent=None, is_source=False):
-        self._raw_tweet = raw_tweet
-        self._children = children
-        self._parent = parent
-        self.is_source = is_source
+        """Create a tweet along with the tree of its replies, in a store of their own. Imported
+        tweets are instead created by their store, with :meth:`view`.
+
+        :param raw_tweet:
+            the tweet JSON
+        :type raw_tweet:
+            `dict`
+        :param children:
+            replies to the tweet, which are moved into the store of the new tweet along with
+            their own replies
+        :type children:
+            `list` of :class:`Tweet` or None
+        :param parent:
+            unused, as the parent of a tweet is the tweet created with it among its children
+        :type parent:
+            :class:`Tweet` or None
+        :param is_source:
+            True if the tweet is the source tweet of a thread
+        :type is_source:
+            `bool`
+        """
+        # pylint:disable=unused-argument,cyclic-import
+        from .thread_store import ThreadStore
+        ThreadStore.from_tweet(self, raw_tweet, children or [], is_source=is_source)
+
+
+    @classmethod
+    def view(cls, store, position, root=None, depth=0):
+        """
+        Create a view of a position in a store.
+
+        :param store:
+            store holding the tweet
+        :type store:
+            :class:`ThreadStore`
+        :param position:
+            position of the tweet in the store
+        :type position:
+            `int`
+        :param root:
+            root of the tweet's thread, or None if the tweet is a root
+        :type root:
+            :class:`Tweet` or None
+        :param depth:
+            number of replies between the tweet and its root
+        :type depth:
+            `int`
+        :rtype:
+            :class:`Tweet`
+        """
+        tweet = cls.__new__(cls)
+        tweet.attach(store, position, root, depth)
+        return tweet
+
+
+    def attach(self, store, position, root=None, depth=0):
+        """
+        Make this tweet a view of a position in a store, such as when it is moved into another.
+
+        :param store:
+            store holding the tweet
+        :type store:
+            :class:`ThreadStore`
+        :param position:
+            position of the tweet in the store
+        :type position:
+            `int`
+        :param root:
+            root of the tweet's thread, or None if the tweet is a root. Roots do not refer to
+            themselves, so a root is freed as soon as nothing else holds it
+        :type root:
+            :class:`Tweet` or None
+        :param depth:
+            number of replies between the tweet and its root
+        :type depth:
+            `int`
+        """
+        # pylint:disable=attribute-defined-outside-init
+        self._store = store
+        self._position = position
+        self._root = root
+        self.depth = depth
+
+
+    @property
+    def store(self):
+        """:class:`ThreadStore` holding this tweet."""
+        return self._store
+
+
+    @property
+    def position(self):
+        """Position of this tweet in its :class:`ThreadStore`."""
+        return self._position
+
+
+    @property
+    def root(self):
+        """Source tweet of the thread this tweet is in, or the root of its tree."""
+        return self if self._root is None else self._root
+
+
+    @property
+    def thread_index(self):
+        """Index of this tweet in a breadth first walk of its thread."""
+        return self._store.thread_index.item(self._position)
+
+
+    @property
+    def is_source(self):
+        """True if this tweet is the source tweet of a thread."""
+        return self._store.sources.item(self._position)
+
+
+    @is_source.setter
+    def is_source(self, is_source):
+        self._store.sources[self._position] = is_source
+
+
+    @property
+    def event(self):
+        """Name of the event this tweet's thread belongs to, if known."""
+        return self._store.event_names[self._store.events.item(self._position)]
+
+
+    @property
+    def timestamp(self):
+        """Seconds since the epoch when this tweet was created, or None if unknown."""
+        return _known(self._store.timestamps.item(self._position))
+
+
+    @property
+    def account_timestamp(self):
+        """Seconds since the epoch when the author of this tweet joined, or None if unknown."""
+        return _known(self._store.user_timestamps.item(self._store.users.item(self._position)))
+
+
+    @property
+    def child_count(self):
+        """Number of direct replies to this tweet."""
+        return self._store.child_counts.item(self._position)
+
+
+    @property
+    def subtree_size(self):
+        """Number of tweets in the subtree below this tweet, including this tweet."""
+        return self._store.aggregates.subtree_sizes.item(self._position)
+
+
+    @property
+    def descendant_count(self):
+        """Number of replies below this tweet, at any depth."""
+        return self._store.aggregates.subtree_sizes.item(self._position) - 1
+
+
+    @property
+    def max_depth(self):
+        """Number of replies between this tweet and the deepest tweet below it."""
+        return self._store.aggregates.max_depths.item(self._position)
+
+
+    @property
+    def branch_count(self):
+        """Number of reply chains ending below this tweet, or 1 if it has no replies."""
+        return self._store.aggregates.branch_counts.item(self._position)
+
 
-        for child in self._children:
-            child._parent = self  # pylint:disable=W0212
+    @property
+    def descendant_ids(self):
+        """IDs of the replies below this tweet, at any depth, in depth first order."""
+        return self._store.tweet_ids[self._store.descendant_positions(self._position)]
 
 
     def children(self):
@@ -25,8 +208,9 @@ class Tweet(object):
         :rtype:
             Generator[:class:`Tweet`]
         """
-        for child in self._children:
-            yield child
+        start = self._store.child_starts.item(self._position)
+        for position in range(start, start + self._store.child_counts.item(self._position)):
+            yield self._store.tweets[position]
 
 
     def parent(self):
@@ -36,7 +220,8 @@ class Tweet(object):
         :rtype:
             :class:`Tweet` or None
         """
-        return self._parent
+        parent = self._store.parents.item(self._position)
+        return self._store.tweets[parent] if parent >= 0 else None
 
 
     def raw(self):
@@ -45,16 +230,16 @@ class Tweet(object):
         :rtype:
             json
         """
-        return self._raw_tweet
+        return self._store.raw_tweets[self._position]
 
 
     def __getitem__(self, name):
-        return self._raw_tweet[name] if name in self._raw_tweet else None
+        return self._store.raw_tweets[self._position].get(name)
 
 
     def __contains__(self, name):
-        return name in self._raw_tweet
+        return name in self._store.raw_tweets[self._position]
 
 
     def __str__(self):
-        return str(self._raw_tweet)
+        return str(self._store.raw_tweets[self._position])
@@ -1,6 +1,27 @@
 """Count properties in the text of tweets."""
 
+import numpy as np
+from scipy import sparse
 from sklearn.base import BaseEstimator, TransformerMixin
+from .tweet_features import TokenColumn
+
+
+def count_column(column):
+    """
+    Count a column of features, taking the length of lists.
+
+    :param column:
+        a column of tweet features
+    :type column:
+        `numpy.ndarray`, :class:`TokenColumn` or `list`
+    :rtype:
+        `numpy.ndarray`
+    """
+    if isinstance(column, TokenColumn):
+        return column.lengths()
+    if isinstance(column, np.ndarray):
+        return column
+    return np.array([len(value) if isinstance(value, list) else value for value in column])
 
 
 class FeatureCounter(BaseEstimator, TransformerMixin):
@@ -22,27 +43,18 @@ class FeatureCounter(BaseEstimator, TransformerMixin):
         return self
 
     def transform(self, tweets_features):
-        """Transform a list of features to a set of attributes that sklearn can utilize.
+        """Transform columns of features into a matrix that sklearn can utilize, with one
+        column per feature in order of their names. Lists are counted by their length.
 
         :param tweets_features:
-            tweet features to transform
+            a column of tweet features, or columns by name when counting several features
         :type tweets_features:
-            `list` of `dict`
+            `numpy.ndarray`, :class:`TokenColumn`, or `dict` of them
         :rtype:
-            `list`
+            :class:`scipy.sparse.csr_matrix`
         """
-        transformed = []
         if isinstance(self.names, list):
-            for name in self.names:
-                for i in range(len(tweets_features[name])):
-                    if len(transformed) <= i:
-                        transformed.append({})
-                    transformed[i][name] = len(tweets_features[name][i]) if \
-                        isinstance(tweets_features[name][i], list) else tweets_features[name][i]
+            counts = [count_column(tweets_features[name]) for name in sorted(self.names)]
         else:
-            name = self.names
-            for feature in tweets_features:
-                count = len(feature) if isinstance(feature, list) else feature
-                transformed.append({'{}_count'.format(name): count})
-
-        return transformed
+            counts = [count_column(tweets_features)]
+        return sparse.csr_matrix(np.column_stack(counts).astype(np.float64))
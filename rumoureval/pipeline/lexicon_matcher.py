@@ -0,0 +1,57 @@
+"""Match the tokens of tweets against several lexicons at once."""
+
+
+class LexiconMatcher(object):
+    """
+    Match tokens against a list of lexicons in a single pass. Each word is mapped to a bitmask
+    of the lexicons holding it, so each token is looked up once however many lexicons there are.
+    """
+    # pylint:disable=too-few-public-methods
+
+    def __init__(self, lexicons, normalize=None):
+        """Initialize LexiconMatcher.
+
+        :param lexicons:
+            name and words of each lexicon
+        :type lexicons:
+            `list` of (`str`, `frozenset` of `str`)
+        :param normalize:
+            function applied to each word of the lexicons, such as a stemmer, so they match
+            tokens normalized the same way
+        :type normalize:
+            `callable` or None
+        """
+        self.names = [name for name, _ in lexicons]
+        self._masks = {}
+        for index, (_, words) in enumerate(lexicons):
+            for word in words:
+                if normalize is not None:
+                    word = normalize(word)
+                self._masks[word] = self._masks.get(word, 0) | 1 << index
+
+        # Lexicons of each distinct bitmask, so matching does not test every bit
+        self._indices = {
+            mask: tuple(index for index in range(len(lexicons)) if mask & 1 << index)
+            for mask in set(self._masks.values())
+        }
+
+    def match(self, tokens):
+        """
+        Find the tokens in each lexicon.
+
+        :param tokens:
+            normalized tokens
+        :type tokens:
+            `list` of `str`
+        :rtype:
+            `list` of `list` of `str`, in the order of the lexicons. Each list holds the tokens
+            in that lexicon, in the order they occur, so its length is their count
+        """
+        matches = [[] for _ in self.names]
+        masks = self._masks
+        for token in tokens:
+            mask = masks.get(token)
+            if mask is not None:
+                for index in self._indices[mask]:
+                    matches[index].append(token)
+        return matches
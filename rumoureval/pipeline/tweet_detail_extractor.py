@@ -1,19 +1,27 @@
 """Extract relevant details from tweets."""
 
-import dateutil.parser
+import hashlib
+import os
 import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from html import unescape
 import numpy as np
 from nltk.stem.porter import PorterStemmer
 from nltk.tokenize.casual import TweetTokenizer, URLS
 from sklearn.base import BaseEstimator, TransformerMixin
+from .. import corpus
 from ..corpus.contractions import CONTRACTIONS
 from ..corpus.news import is_news
-from ..corpus.opinion import (
-    POSITIVE_WORDS, NEGATIVE_WORDS, QUERYING_WORDS, DENYING_WORDS,
-    SWEAR_WORDS, RACES_RELIGIONS_POLITICAL
-)
+from ..corpus.opinion import LEXICONS
 from ..corpus.stop_words import STOP_WORDS
+from ..util import tweet_time
+from ..util.detail_cache import DetailCache
+from ..util.feature_cache import FeatureCache, fingerprint_extractor
+from ..util.tweet_time import age_in_days
+from . import lexicon_matcher, tweet_features
+from .lexicon_matcher import LexiconMatcher
+from .tweet_features import TokenColumn, TweetFeatures
 
 
 URLS_RE = re.compile(r"""(%s)""" % URLS, re.VERBOSE | re.I | re.UNICODE)
@@ -22,22 +30,16 @@ NON_ALPHA_RE = re.compile(r'^[^a-z]+$', re.I)
 
 STEMMER = PorterStemmer()
 STEMMED_STOP_WORDS = frozenset([STEMMER.stem(word) for word in STOP_WORDS])
-STEMMED_LEXICON = {
-    'positive': frozenset([STEMMER.stem(word) for word in POSITIVE_WORDS]),
-    'negative': frozenset([STEMMER.stem(word) for word in NEGATIVE_WORDS]),
-    'querying': frozenset([STEMMER.stem(word) for word in QUERYING_WORDS]),
-    'denying': frozenset([STEMMER.stem(word) for word in DENYING_WORDS]),
-    'swear': frozenset([STEMMER.stem(word) for word in SWEAR_WORDS]),
-    'personal': frozenset([STEMMER.stem(word) for word in RACES_RELIGIONS_POLITICAL]),
-}
+LEXICON_MATCHER = LexiconMatcher(LEXICONS, normalize=STEMMER.stem)
 
-# Cache tweet details constructed to save computation time for multiple pipelines
-TWEET_DETAIL_CACHE = {
-    'A': {},
-    'B': {},
-}
+# Cache tweet details constructed to save computation time for multiple pipelines. Details are
+# keyed by the settings of the extractor and the tweet ID. The cache holds every tweet unless
+# it is given a budget, as each pipeline transforms the whole corpus and a budget smaller than
+# the corpus evicts details before the next pipeline reads them
+TWEET_DETAIL_CACHE = DetailCache()
 
-# Set of tweet details and the kind of detail
+# Set of tweet details and the kind of detail. The details of a tweet are a `tuple` of values in
+# this order
 TWEET_DETAILS = [
     # Text properties
     ('text', str),
@@ -60,14 +62,10 @@ TWEET_DETAILS = [
     ('retweet_count', int),
     ('account_age', int),
 
-    # Sentimental analysis
-    ('positive_words', list),
-    ('negative_words', list),
-    ('querying_words', list),
-    ('denying_words', list),
-    ('swear_words', list),
-    ('personal_words', list),
-
+    # Sentimental analysis, a list of matched words for each lexicon
+] + [
+    ('{}_words'.format(name), list) for name in LEXICON_MATCHER.names
+] + [
     # Punctuation
     ('period_count', int),
     ('question_mark_count', int),
@@ -75,7 +73,12 @@ TWEET_DETAILS = [
     ('ellipsis_count', int),
     ('char_count', int),
     ('number_count', int),
+]
 
+# Details of the tweets classified in task A, which are the same for every tweet of a batch. They
+# are added to the columns of each batch, rather than extracted and cached with each tweet, so
+# the details of a tweet do not depend on the classifications
+CHILD_DETAILS = [
     # Child tweet properties
     ('child_denies', int),
     ('child_queries', int),
@@ -88,17 +91,180 @@ TWEET_DETAILS = [
     ('queries_percentage', float),
 ]
 
+# Types of the columns of numeric and boolean details. Boolean details are 1 or -1 (or 0), so
+# they are kept as small integers rather than `numpy.bool_`, which would make -1 true. Fractions
+# are kept as float64, as every feature matrix is float64 once it is stacked with the tf-idf
+# features and fit by libsvm, so float32 columns would only round each fraction before it is
+# converted back
+COLUMN_DTYPES = {
+    bool: np.int8,
+    int: np.int32,
+    float: np.float64,
+}
+
+
+def build_columns(rows, child_details):
+    """
+    Convert the details of a batch of tweets into one typed column per detail. The rows are
+    transposed in a single pass, rather than gathering each detail from every row in turn.
+
+    :param rows:
+        details of each tweet, in the order of `TWEET_DETAILS`
+    :type rows:
+        `list` of `tuple`
+    :param child_details:
+        details shared by every tweet, in the order of `CHILD_DETAILS`
+    :type child_details:
+        `tuple`
+    :rtype:
+        :class:`TweetFeatures`
+    """
+    columns = {}
+    transposed = zip(*rows) if rows else [()] * len(TWEET_DETAILS)
+    for (name, kind), values in zip(TWEET_DETAILS, transposed):
+        if kind is list:
+            columns[name] = TokenColumn.from_lists(values)
+        elif kind is str:
+            columns[name] = np.empty(len(values), dtype=object)
+            columns[name][:] = values
+        else:
+            columns[name] = np.array(values, dtype=COLUMN_DTYPES[kind])
+    for (name, kind), value in zip(CHILD_DETAILS, child_details):
+        columns[name] = np.full(len(rows), value, dtype=COLUMN_DTYPES[kind])
+    return TweetFeatures(columns, len(rows))
+
+
+# Feature cache of each file used by this process, with the fingerprint it was last used with
+_FEATURE_CACHES = {}
+
+
+def get_extractor_source_files():
+    """
+    Get the files of the code and lexicons which tweet details are extracted with, so
+    cached details are invalidated when any of them change.
+
+    :rtype:
+        `list` of `str`
+    """
+    corpus_folder = os.path.dirname(os.path.abspath(corpus.__file__))
+    return [
+        os.path.abspath(__file__),
+        os.path.abspath(lexicon_matcher.__file__),
+        os.path.abspath(tweet_features.__file__),
+        os.path.abspath(tweet_time.__file__),
+    ] + [
+        os.path.join(corpus_folder, name) for name in sorted(os.listdir(corpus_folder))
+        if name.endswith('.py')
+    ]
+
+
+def digest_tweet(tweet):
+    """
+    Digest the fields of a tweet which its details are extracted from, so details cached on
+    disk are extracted again once the tweet is edited.
+
+    :param tweet:
+        a tweet
+    :type tweet:
+        :class:`Tweet`
+    :rtype:
+        `str`
+    """
+    user = tweet['user']
+    fields = (
+        tweet['text'],
+        tweet['entities'] if 'entities' in tweet else
+        (tweet['hashtags'], tweet['user_mentions']),
+        tweet['retweet_count'], tweet['favorite_count'],
+        user['screen_name'], user.get('verified'),
+        tweet.timestamp, tweet.account_timestamp,
+        tweet.depth, tweet.root['text'],
+    )
+    return hashlib.sha1(repr(fields).encode('utf-8')).hexdigest()[:16]
+
+
+# Chunks of tweets given to each process when extracting details in parallel, so processes
+# which finish early can take on more of the work
+CHUNKS_PER_JOB = 4
+
+# Parameters and extractor of each process in a pool, created for its first chunk of tweets
+_WORKER_EXTRACTOR = (None, None)
+
+
+class _TweetRecord(object):
+    """
+    The parts of a :class:`Tweet` read by feature extraction, without the store holding it,
+    so it can be sent to another process.
+    """
+    # pylint:disable=too-few-public-methods
+
+    __slots__ = ('_raw_tweet', 'depth', 'timestamp', 'account_timestamp', 'root')
+
+    def __init__(self, tweet, root=None):
+        self._raw_tweet = tweet.raw()
+        self.depth = tweet.depth
+        self.timestamp = tweet.timestamp
+        self.account_timestamp = tweet.account_timestamp
+        self.root = root if root is not None else self
+
+    def __getitem__(self, name):
+        return self._raw_tweet.get(name)
+
+    def __contains__(self, name):
+        return name in self._raw_tweet
+
+
+def _build_records(tweets):
+    """Detach tweets from their store, sharing a single record of each root."""
+    roots = {}
+    records = []
+    for tweet in tweets:
+        root = tweet.root
+        if id(root) not in roots:
+            roots[id(root)] = _TweetRecord(root)
+        records.append(roots[id(root)] if root is tweet else _TweetRecord(tweet, roots[id(root)]))
+    return records
+
+
+def _extract_chunk(params, records):
+    """
+    Extract the details of a chunk of tweets in a process in a pool. The extractor of the
+    process is created for its first chunk and reused for later chunks with the same
+    parameters, as pool initializers need Python 3.7.
+    """
+    global _WORKER_EXTRACTOR  # pylint:disable=global-statement
+    if _WORKER_EXTRACTOR[0] != params:
+        _WORKER_EXTRACTOR = (params, TweetDetailExtractor(**params))
+    extractor = _WORKER_EXTRACTOR[1]
+    return [extractor._extract(record) for record in records]  # pylint:disable=W0212
+
+
 class TweetDetailExtractor(BaseEstimator, TransformerMixin):
     """Extract relevant details from tweets."""
-    # pylint:disable=C0103,W0613,R0201
-
-    def __init__(self, task='A', strip_hashtags=False, strip_mentions=False, classifications=None):
-        """Initialize stemmer and tokenizer."""
+    # pylint:disable=C0103,W0613,R0201,R0913
+
+    def __init__(self, task='A', strip_hashtags=False, strip_mentions=False, classifications=None,
+                 n_jobs=None, cache_folder=None):
+        """Initialize stemmer and tokenizer.
+
+        :param n_jobs:
+            number of processes to extract the details of new tweets with, or -1 for one per
+            CPU. Defaults to a single process
+        :type n_jobs:
+            `int` or None
+        :param cache_folder:
+            folder to keep extracted details in between runs. Defaults to only caching details
+            within a run
+        :type cache_folder:
+            `str` or None
+        """
         self._task = task
         self._tokenizer = TweetTokenizer(preserve_case=False, reduce_len=True, strip_handles=True)
         self._strip_hashtags = strip_hashtags
         self._strip_mentions = strip_mentions
         self._classifications = classifications
+        self._n_jobs = n_jobs
+        self._cache_folder = cache_folder
 
 
     def get_params(self, deep=True):
@@ -108,6 +274,8 @@ class TweetDetailExtractor(BaseEstimator, TransformerMixin):
             'strip_hashtags': self._strip_hashtags,
             'strip_mentions': self._strip_mentions,
             'classifications': self._classifications,
+            'n_jobs': self._n_jobs,
+            'cache_folder': self._cache_folder,
         }
 
 
@@ -119,24 +287,17 @@ class TweetDetailExtractor(BaseEstimator, TransformerMixin):
 
 
     @staticmethod
-    def get_parseable_tweet_text(tweet, task='A'):
+    def get_parseable_tweet_text(tweet):
         """Given a tweet, return the most parseable tweet text.
 
         :param tweet:
             a tweet
         :type:
             :class:`Tweet`
-        :param task:
-            the task, 'A', or 'B'
-        :type task:
-            `str`
         :rtype:
             `str`
         """
         # Expanding tweet text for better accuracy
-        if tweet['id'] in TWEET_DETAIL_CACHE[task]:
-            return TWEET_DETAIL_CACHE[task][tweet['id']]['text']
-
         expanded_text = tweet['text'].encode('ascii', 'ignore').decode('ascii')
         expanded_text = unescape(expanded_text)
         expanded_text = expanded_text.split(' ')
@@ -231,134 +392,204 @@ class TweetDetailExtractor(BaseEstimator, TransformerMixin):
         :type tweets:
             `list` of :class:`Tweet`
         :rtype:
-            :class:`np.recarray`
+            :class:`TweetFeatures`
         """
-        features = np.recarray(shape=(len(tweets),),
-                               dtype=TWEET_DETAILS)
-
-        for i, tweet in enumerate(tweets):
-            # Check if the details have been calculated before, and pull from cache if so
-            properties = {}
-            if tweet['id'] in TWEET_DETAIL_CACHE[self._task]:
-                properties = TWEET_DETAIL_CACHE[self._task][tweet['id']]
-            else:
-                expanded_text = TweetDetailExtractor.get_parseable_tweet_text(tweet, task=self._task)
-                properties['text'] = expanded_text
-
-                # Stem, and remove stop words
-                stemmed = self._tokenize(expanded_text)
-                properties['text_stemmed'] = stemmed
-                properties['text_stemmed_stopped'] = [
-                    w for w in stemmed if w not in STEMMED_STOP_WORDS
-                    ]
-
-                # Basic features
-                properties['hashtags'] = tweet['entities']['hashtags'] if 'entities' in tweet else tweet['hashtags']
-                properties['user_mentions'] = tweet['entities']['user_mentions']  if 'entities' in tweet else tweet['user_mentions']
-                properties['retweet_count'] = tweet['retweet_count'] if 'retweet_count' in tweet else 0
-                properties['has_url'] = 1 if URLS_RE.match(tweet['text']) else -1
-                properties['favorite_count'] = tweet['favorite_count'] if 'favorite_count' in tweet else 0
-
-                account_created_at = dateutil.parser.parse(tweet['user']['created_at'])
-                tweet_created_at = dateutil.parser.parse(tweet['created_at'])
-                properties['account_age'] = (tweet_created_at - account_created_at).days
-
-                # Get parent tweet
-                depth = 0
-                root = tweet
-                while root.parent() is not None:
-                    depth += 1
-                    root = root.parent()
-                properties['depth'] = depth
-
-                # Boolean properties
-                properties['is_news'] = 1 if is_news(tweet['user']['screen_name']) else -1
-                properties['is_root'] = 1 if depth == 0 else -1
-                properties['verified'] = 1 if 'verified' in tweet['user'] and tweet['user']['verified'] else -1
-
-                # Get last term in the tweet
-                last_term = None
-                if len(properties['text_stemmed_stopped']) > 0:
-                    last_term = -1
-                    while abs(last_term - 1) < len(properties['text_stemmed_stopped']) and \
-                        (properties['text_stemmed_stopped'][last_term][0] == '#' or \
-                            NON_ALPHA_RE.match(properties['text_stemmed_stopped'][last_term][0])):
-                        last_term -= 1
-                    last_term = properties['text_stemmed_stopped'][last_term][-1]
-                properties['ends_with_question'] = 1 if len(properties['text_stemmed_stopped']) > 0 and properties['text_stemmed_stopped'][-1][-1] == '?' else -1
-
-                properties['text_minus_root'] = list(
-                    set(properties['text_stemmed_stopped']) -
-                    set(self._tokenize(TweetDetailExtractor.get_parseable_tweet_text(root, task=self._task)))
-                )
-
-                # Count the punctuations
-                punc_count = self._count_punctuation(properties['text'])
-                properties['period_count'] = punc_count['pe']
-                properties['question_mark_count'] = punc_count['qu']
-                properties['exclamation_count'] = punc_count['ex']
-                properties['ellipsis_count'] = punc_count['el']
-
-                # Count the characters in the tweet, minus spaces
-                properties['char_count'] = len(properties['text']) - punc_count['sp']
-                properties['number_count'] = len([
-                    number for number in properties['text_stemmed_stopped'] if re.match(r'[0-9]+', number)
-                ])
-
-                properties['is_news'] = 1 if is_news(tweet['user']['screen_name']) else 0
-                properties['is_root'] = 0 if depth == 0 else 1
-
-                # Sentiment analysis
-                properties['positive_words'] = [
-                    word for word in stemmed if word in STEMMED_LEXICON['positive']
-                    ]
-                properties['negative_words'] = [
-                    word for word in stemmed if word in STEMMED_LEXICON['negative']
-                    ]
-                properties['querying_words'] = [
-                    word for word in stemmed if word in STEMMED_LEXICON['querying']
-                    ]
-                properties['denying_words'] = [
-                    word for word in stemmed if word in STEMMED_LEXICON['denying']
-                    ]
-                properties['swear_words'] = [
-                    word for word in stemmed if word in STEMMED_LEXICON['swear']
-                    ]
-                properties['personal_words'] = [
-                    word for word in stemmed if word in STEMMED_LEXICON['personal']
-                    ]
-
-                if self._task == 'B':
-                    properties['child_denies'] = len([
-                        tweet for tweet in self._classifications if self._classifications[tweet] == 'deny'
-                    ])
-                    properties['child_queries'] = len([
-                        tweet for tweet in self._classifications if self._classifications[tweet] == 'query'
-                    ])
-                    properties['child_comments'] = len([
-                        tweet for tweet in self._classifications if self._classifications[tweet] == 'comment'
-                    ])
-                    properties['child_supports'] = len([
-                        tweet for tweet in self._classifications if self._classifications[tweet] == 'support'
-                    ])
-
-                    total_sdq_tweets = properties['child_supports'] + properties['child_denies'] + properties['child_queries']
-                    properties['support_percentage'] = properties['child_supports'] / total_sdq_tweets
-                    properties['denies_percentage'] = properties['child_denies'] / total_sdq_tweets
-                    properties['queries_percentage'] = properties['child_queries'] / total_sdq_tweets
-                else:
-                    properties['child_denies'] = 0
-                    properties['child_queries'] = 0
-                    properties['child_comments'] = 0
-                    properties['child_supports'] = 0
-                    properties['support_percentage'] = 0
-                    properties['denies_percentage'] = 0
-                    properties['queries_percentage'] = 0
-
-            for detail in TWEET_DETAILS:
-                features[detail[0]][i] = properties[detail[0]]
-
-            # Cache the generated details for the tweet
-            TWEET_DETAIL_CACHE[self._task][tweet['id']] = properties
-
-        return features
+        # Details are kept for this batch as well as cached, as the cache may evict them
+        settings = self._get_cache_settings()
+        details = [TWEET_DETAIL_CACHE.get((settings, tweet['id'])) for tweet in tweets]
+        missing = [index for index, properties in enumerate(details) if properties is None]
+
+        # Details on disk are keyed by a digest of the tweet too, as its JSON may be edited
+        feature_cache = self._get_feature_cache()
+        if feature_cache is not None and missing:
+            keys = {index: (tweets[index]['id'], digest_tweet(tweets[index]))
+                    for index in missing}
+            cached_details = feature_cache.read(list(keys.values()))
+            for index in missing:
+                details[index] = cached_details.get(keys[index])
+                if details[index] is not None:
+                    TWEET_DETAIL_CACHE.put((settings, tweets[index]['id']), details[index])
+            missing = [index for index in missing if details[index] is None]
+
+        # Extract the details of tweets which have not been seen before, and cache them
+        missing_tweets = [tweets[index] for index in missing]
+        n_jobs = os.cpu_count() if self._n_jobs == -1 else self._n_jobs
+        if n_jobs is not None and 1 < n_jobs < len(missing):
+            extracted = self._extract_parallel(missing_tweets, n_jobs)
+        else:
+            extracted = [self._extract(tweet) for tweet in missing_tweets]
+        for index, tweet, properties in zip(missing, missing_tweets, extracted):
+            details[index] = properties
+            TWEET_DETAIL_CACHE.put((settings, tweet['id']), properties)
+        if feature_cache is not None and missing:
+            feature_cache.update({keys[index]: details[index] for index in missing})
+
+        return build_columns(details, self._get_child_details())
+
+
+    def is_cached(self, tweet):
+        """
+        Check whether the details of a tweet extracted with the settings of this extractor
+        are held by `TWEET_DETAIL_CACHE`.
+
+        :param tweet:
+            a tweet
+        :type tweet:
+            :class:`Tweet`
+        :rtype:
+            `bool`
+        """
+        return (self._get_cache_settings(), tweet['id']) in TWEET_DETAIL_CACHE
+
+
+    def _get_cache_settings(self):
+        """
+        Get the settings which the details extracted by this extractor depend on, to key them
+        by in the cache. The classifications are not among them, as the details which depend
+        on them are added to each batch.
+
+        :rtype:
+            `tuple`
+        """
+        return (self._task, self._strip_hashtags, self._strip_mentions)
+
+
+    def _get_child_details(self):
+        """
+        Get the details of the classified tweets, which are the same for every tweet. Task B
+        details depend on the classifications only through the number of tweets with each
+        label, which are counted over every classified tweet.
+
+        :rtype:
+            `tuple` of the value of each detail, in the order of `CHILD_DETAILS`
+        """
+        if self._task != 'B':
+            return (0,) * len(CHILD_DETAILS)
+
+        classification_counts = Counter(self._classifications.values())
+        child_denies = classification_counts['deny']
+        child_queries = classification_counts['query']
+        child_comments = classification_counts['comment']
+        child_supports = classification_counts['support']
+
+        total_sdq_tweets = child_supports + child_denies + child_queries
+        return (child_denies, child_queries, child_comments, child_supports,
+                child_supports / total_sdq_tweets, child_denies / total_sdq_tweets,
+                child_queries / total_sdq_tweets)
+
+
+    def _get_feature_cache(self):
+        """
+        Get the on-disk cache of details extracted with the settings of this extractor.
+
+        :rtype:
+            :class:`FeatureCache` or None
+        """
+        if self._cache_folder is None:
+            return None
+        settings = self._get_cache_settings()
+        fingerprint = fingerprint_extractor(settings, get_extractor_source_files())
+
+        # Each combination of settings has its own file, so switching between them does not
+        # invalidate the others
+        path = os.path.join(self._cache_folder, 'tweet_details_{}_{}.cache'.format(
+            self._task, fingerprint_extractor(settings, [])[:16]))
+        feature_cache = _FEATURE_CACHES.get(path)
+        if feature_cache is None or feature_cache.fingerprint != fingerprint:
+            feature_cache = _FEATURE_CACHES[path] = FeatureCache(path, fingerprint)
+        return feature_cache
+
+
+    def _extract_parallel(self, tweets, n_jobs):
+        """
+        Extract the details of tweets in a pool of processes, a chunk of tweets at a time.
+        Each process has its own stemmer and tokenizer.
+
+        :param tweets:
+            tweets to extract the details of
+        :type tweets:
+            `list` of :class:`Tweet`
+        :param n_jobs:
+            number of processes
+        :type n_jobs:
+            `int`
+        :rtype:
+            `list` of `tuple`, in the order of `tweets`
+        """
+        records = _build_records(tweets)
+        chunk_size = -(-len(records) // (n_jobs * CHUNKS_PER_JOB))
+        chunks = [records[start:start + chunk_size]
+                  for start in range(0, len(records), chunk_size)]
+
+        params = self.get_params()
+        params.update({'classifications': None, 'n_jobs': None, 'cache_folder': None})
+        details = []
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            for chunk_details in executor.map(_extract_chunk, [params] * len(chunks), chunks):
+                details += chunk_details
+        return details
+
+
+    def _extract(self, tweet):
+        """
+        Extract the details of a single tweet.
+
+        :param tweet:
+            tweet to extract the details of
+        :type tweet:
+            :class:`Tweet`
+        :rtype:
+            `tuple` of the value of each detail, in the order of `TWEET_DETAILS`
+        """
+        # pylint:disable=too-many-locals
+        expanded_text = TweetDetailExtractor.get_parseable_tweet_text(tweet)
+
+        # Stem, and remove stop words
+        stemmed = self._tokenize(expanded_text)
+        stemmed_stopped = [w for w in stemmed if w not in STEMMED_STOP_WORDS]
+
+        # Basic features
+        entities = tweet['entities'] if 'entities' in tweet else tweet
+        retweet_count = tweet['retweet_count'] if 'retweet_count' in tweet else 0
+        has_url = 1 if URLS_RE.match(tweet['text']) else -1
+        favorite_count = tweet['favorite_count'] if 'favorite_count' in tweet else 0
+
+        # Creation times are parsed once, when the tweets are imported
+        account_age = age_in_days(tweet.account_timestamp, tweet.timestamp)
+
+        # Root and depth are fixed when the thread is built
+        depth = tweet.depth
+        root = tweet.root
+
+        # Boolean properties
+        user = tweet['user']
+        verified = 1 if 'verified' in user and user['verified'] else -1
+        ends_with_question = 1 if stemmed_stopped and stemmed_stopped[-1][-1] == '?' else -1
+
+        text_minus_root = list(
+            set(stemmed_stopped) -
+            set(self._tokenize(TweetDetailExtractor.get_parseable_tweet_text(root)))
+        )
+
+        # Count the punctuations
+        punc_count = self._count_punctuation(expanded_text)
+
+        # Count the characters in the tweet, minus spaces
+        char_count = len(expanded_text) - punc_count['sp']
+        number_count = len([number for number in stemmed_stopped if re.match(r'[0-9]+', number)])
+
+        news = 1 if is_news(user['screen_name']) else 0
+        reply = 0 if depth == 0 else 1
+
+        # Sentiment analysis, matching every lexicon in a single pass
+        lexicon_words = tuple(LEXICON_MATCHER.match(stemmed))
+
+        return (
+            expanded_text, stemmed, stemmed_stopped, text_minus_root,
+            verified, news, reply, has_url, ends_with_question,
+            entities['hashtags'], entities['user_mentions'], favorite_count, depth,
+            retweet_count, account_age,
+        ) + lexicon_words + (
+            punc_count['pe'], punc_count['qu'], punc_count['ex'], punc_count['el'],
+            char_count, number_count,
+        )
@@ -0,0 +1,105 @@
+"""Columns of tweet details, as extracted for a batch of tweets."""
+
+from itertools import chain
+import numpy as np
+
+
+class TokenColumn(object):
+    """
+    A ragged column of lists, such as the tokens of each tweet, held as a single flat array
+    of values and the offset of each row within it.
+    """
+
+    def __init__(self, values, offsets):
+        """Initialize TokenColumn.
+
+        :param values:
+            values of every row, one row after another
+        :type values:
+            `numpy.ndarray` of `object`
+        :param offsets:
+            start of each row in `values`, followed by the end of the last row
+        :type offsets:
+            `numpy.ndarray` of `int`
+        """
+        self.values = values
+        self.offsets = offsets
+
+    @classmethod
+    def from_lists(cls, rows):
+        """
+        Create a column from a list of rows.
+
+        :param rows:
+            the values of each row
+        :type rows:
+            `list` of `list`
+        :rtype:
+            :class:`TokenColumn`
+        """
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, rows), dtype=np.int64, count=len(rows)), out=offsets[1:])
+        values = np.empty(offsets[-1], dtype=object)
+        values[:] = list(chain.from_iterable(rows))
+        return cls(values, offsets)
+
+    def lengths(self):
+        """
+        Get the length of each row.
+
+        :rtype:
+            `numpy.ndarray` of `int`
+        """
+        return np.diff(self.offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return self.values[self.offsets[index]:self.offsets[index + 1]].tolist()
+
+    def __iter__(self):
+        values = self.values.tolist()
+        offsets = self.offsets.tolist()
+        for index in range(len(self)):
+            yield values[offsets[index]:offsets[index + 1]]
+
+
+class TweetFeatures(object):
+    """
+    Details of a batch of tweets, one column per detail. Numeric and boolean details are
+    typed arrays, text is an array of `str`, and lists are :class:`TokenColumn`.
+    """
+
+    def __init__(self, columns, size):
+        """Initialize TweetFeatures.
+
+        :param columns:
+            each column by the name of its detail
+        :type columns:
+            `dict`
+        :param size:
+            number of tweets
+        :type size:
+            `int`
+        """
+        self.columns = columns
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def keys(self):
+        """
+        Get the names of the details.
+
+        :rtype:
+            `list` of `str`
+        """
+        return list(self.columns)
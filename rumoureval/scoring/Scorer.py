@@ -21,13 +21,18 @@ class Scorer(object):
     and outputs results.
     """
 
-    def __init__(self, task, datasource):
+    def __init__(self, task, datasource, annotations=None):
         """Initialize Scorer.
 
         :param task:
             task to score, 'A' or 'B'
         :type task:
             `str`
+        :param annotations:
+            annotations to score against, such as those of selected events. Defaults to the
+            annotation file of the datasource
+        :type annotations:
+            `dict` or None
         """
         if task not in ['A', 'B']:
             raise ValueError('task must be A or B')
@@ -36,6 +41,10 @@ class Scorer(object):
                                          'subtask{}Results.json'.format(self._task))
         self._annotation_file = os.path.join(get_datasource_path(datasource, annotations=True),
                                              'subtask{}.json'.format(task))
+        self._annotations = annotations
+        if annotations is not None:
+            self._annotation_file = os.path.join(get_output_path(),
+                                                 'subtask{}Annotations.json'.format(self._task))
 
     def _export_results(self, results):
         """Export task results to the output directory.
@@ -65,6 +74,9 @@ class Scorer(object):
         LOGGER.info('Scoring results of task %s:', self._task)
 
         self._export_results(results)
+        if self._annotations is not None:
+            with open(self._annotation_file, 'w') as file:
+                json.dump(self._annotations, file, sort_keys=True, indent=2)
         out = subprocess.run(
             [
                 'python',
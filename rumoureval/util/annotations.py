@@ -0,0 +1,157 @@
+"""
+Indexes annotations by integer tweet ID, so the labels of any list of tweets are found with
+a single vectorized join rather than a dictionary lookup per tweet. The IDs of the tweets are
+taken from the `tweet_ids` column of their store, so no tweet ID is parsed from its JSON.
+"""
+
+from operator import attrgetter
+import numpy as np
+
+
+def get_tweet_ids(tweets):
+    """
+    Get the IDs of a list of tweets as integers, gathered from the `tweet_ids` column of the
+    :class:`ThreadStore` holding them by their positions, rather than parsed from their JSON.
+
+    :param tweets:
+        the tweets
+    :type tweets:
+        `list` of :class:`Tweet`
+    :rtype:
+        :class:`numpy.ndarray` of `int64`
+    """
+    if not tweets:
+        return np.empty(0, dtype=np.int64)
+    stores = list(map(attrgetter('store'), tweets))
+    positions = np.fromiter(map(attrgetter('position'), tweets), dtype=np.intp,
+                            count=len(tweets))
+
+    # Imported tweets are all held by a single store, whose IDs are gathered at once
+    store = stores[0]
+    if stores.count(store) == len(stores):
+        return store.tweet_ids[positions]
+    return np.fromiter((store.tweet_ids.item(position)
+                        for store, position in zip(stores, positions)),
+                       dtype=np.int64, count=len(tweets))
+
+
+class AnnotationIndex(object):
+    """
+    Annotations of tweets, held as sorted integer tweet IDs and a small integer code for the
+    label of each. Supports lookups by string tweet ID like the `dict` it is built from.
+    """
+
+    def __init__(self, tweet_ids, codes, labels):
+        """Initialize AnnotationIndex.
+
+        :param tweet_ids:
+            sorted tweet IDs
+        :type tweet_ids:
+            :class:`numpy.ndarray` of `int64`
+        :param codes:
+            code of the label of each tweet
+        :type codes:
+            :class:`numpy.ndarray` of `int8`
+        :param labels:
+            labels, indexed by their code
+        :type labels:
+            `list` of `str`
+        """
+        self.tweet_ids = tweet_ids
+        self.codes = codes
+        self.labels = labels
+        self._label_array = np.array(labels, dtype=object)
+
+    @classmethod
+    def from_dict(cls, annotations, labels=None):
+        """
+        Build an index of annotations.
+
+        :param annotations:
+            tweet IDs mapped to their labels
+        :type annotations:
+            `dict` of `str` to `str`
+        :param labels:
+            labels in the order of their codes. Defaults to the sorted labels in `annotations`
+        :type labels:
+            `list` of `str` or None
+        :rtype:
+            :class:`AnnotationIndex`
+        """
+        if labels is None:
+            labels = sorted(set(annotations.values()))
+        label_codes = {label: code for code, label in enumerate(labels)}
+
+        tweet_ids = np.fromiter((int(tweet_id) for tweet_id in annotations), dtype=np.int64,
+                                count=len(annotations))
+        codes = np.fromiter((label_codes[label] for label in annotations.values()),
+                            dtype=np.int8, count=len(annotations))
+        order = np.argsort(tweet_ids, kind='mergesort')
+        return cls(tweet_ids[order], codes[order], list(labels))
+
+    def _positions(self, tweet_ids):
+        """Find the position of each tweet ID in the index, raising `KeyError` for missing IDs."""
+        # Searching for sorted IDs walks the index in order, which is several times faster
+        # than searching in random order once the index is larger than the cache
+        order = np.argsort(tweet_ids, kind='mergesort')
+        positions = np.empty(len(tweet_ids), dtype=np.intp)
+        positions[order] = np.searchsorted(self.tweet_ids, tweet_ids[order])
+        found = positions < len(self.tweet_ids)
+        found[found] = self.tweet_ids[positions[found]] == tweet_ids[found]
+        if not found.all():
+            raise KeyError(str(tweet_ids[~found][0]))
+        return positions
+
+    def codes_for(self, tweets):
+        """
+        Get the label codes of a list of tweets.
+
+        :param tweets:
+            the tweets, or their integer IDs
+        :type tweets:
+            `list` of :class:`Tweet` or :class:`numpy.ndarray` of `int64`
+        :rtype:
+            :class:`numpy.ndarray` of `int8`
+        """
+        tweet_ids = tweets if isinstance(tweets, np.ndarray) else get_tweet_ids(tweets)
+        return self.codes[self._positions(tweet_ids)]
+
+    def labels_for(self, tweets):
+        """
+        Get the labels of a list of tweets.
+
+        :param tweets:
+            the tweets, or their integer IDs
+        :type tweets:
+            `list` of :class:`Tweet` or :class:`numpy.ndarray` of `int64`
+        :rtype:
+            :class:`numpy.ndarray` of `str`
+        """
+        return self._label_array[self.codes_for(tweets)]
+
+    def one_vs_rest(self, one):
+        """
+        Relabel the annotations as one label versus the rest, which are labelled `not_<one>`.
+
+        :param one:
+            the one label
+        :type one:
+            `str`
+        :rtype:
+            :class:`AnnotationIndex`
+        """
+        is_one = self.codes == self.labels.index(one) if one in self.labels else \
+            np.zeros(len(self.codes), dtype=bool)
+        return AnnotationIndex(self.tweet_ids, is_one.astype(np.int8),
+                               ['not_{}'.format(one), one])
+
+    def __getitem__(self, tweet_id):
+        position = self._positions(np.array([int(tweet_id)], dtype=np.int64))[0]
+        return self.labels[self.codes[position]]
+
+    def __contains__(self, tweet_id):
+        position = np.searchsorted(self.tweet_ids, int(tweet_id))
+        return position < len(self.tweet_ids) and self.tweet_ids[position] == int(tweet_id)
+
+    def __len__(self):
+        return len(self.tweet_ids)
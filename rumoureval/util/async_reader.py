@@ -0,0 +1,254 @@
+"""
+Imports twitter threads with asyncio, keeping a bounded number of file reads in flight so
+per-file latency on network filesystems and cold page caches overlaps, rather than adding up.
+"""
+
+import asyncio
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from .thread_files import ThreadFolder, decode_text
+from .tweet_json import loads, loads_tweet
+
+
+# Folders of a thread whose files are all tweets
+_TWEET_FOLDERS = ['source-tweet', 'replies']
+
+
+def _read_bytes(path):
+    """Read the contents of a file."""
+    with open(path, 'rb') as thread_file:
+        return thread_file.read()
+
+
+def _list_thread(folder):
+    """List the root of a thread and its tweet folders, skipping those which do not exist."""
+    listings = {'': os.listdir(folder)}
+    for subfolder in _TWEET_FOLDERS:
+        if subfolder in listings['']:
+            listings[subfolder] = os.listdir(os.path.join(folder, subfolder))
+    return listings
+
+
+class PrefetchedThreadFolder(ThreadFolder):
+    """
+    Files of a twitter thread extracted into a folder, whose structure, urls and tweets
+    have already been read and decoded. Context documents are still read from the folder.
+    """
+
+    def __init__(self, folder, listings, contents, mime_index=None):
+        """Initialize PrefetchedThreadFolder.
+
+        :param folder:
+            root folder of the thread
+        :type folder:
+            `str`
+        :param listings:
+            names of the entries in the root and each tweet folder of the thread, with the
+            root listed under ''
+        :type listings:
+            `dict` of `str` to `list` of `str`
+        :param contents:
+            paths relative to the thread root, mapped to their decoded contents
+        :type contents:
+            `dict`
+        :param mime_index:
+            index of previously detected MIME types
+        :type mime_index:
+            :class:`MimeIndex` or None
+        """
+        super(PrefetchedThreadFolder, self).__init__(folder, mime_index=mime_index)
+        self._listings = listings
+        self._contents = contents
+
+    def exists(self, *parts):
+        if len(parts) == 1:
+            return parts[0] in self._listings['']
+        return super(PrefetchedThreadFolder, self).exists(*parts)
+
+    def listdir(self, *parts):
+        path = '/'.join(parts)
+        if path in self._listings:
+            return self._listings[path]
+        return super(PrefetchedThreadFolder, self).listdir(*parts)
+
+    def read(self, *parts):
+        path = '/'.join(parts)
+        if path in self._contents:
+            return self._contents[path]
+        return super(PrefetchedThreadFolder, self).read(*parts)
+
+    def load_json(self, *parts):
+        path = '/'.join(parts)
+        if path in self._contents:
+            return self._contents[path]
+        return super(PrefetchedThreadFolder, self).load_json(*parts)
+
+    def load_tweet(self, *parts, project_fields=False):
+        path = '/'.join(parts)
+        if path in self._contents:
+            return self._contents[path]
+        return super(PrefetchedThreadFolder, self).load_tweet(*parts,
+                                                              project_fields=project_fields)
+
+
+class _AsyncThreadReader(object):
+    """Reads the files of threads through a thread pool, with a bounded number in flight."""
+    # pylint:disable=too-few-public-methods
+
+    def __init__(self, executor, max_in_flight, project_fields, mime_index):
+        self._executor = executor
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._project_fields = project_fields
+        self._mime_index = mime_index
+
+    async def _run(self, function, *args):
+        async with self._semaphore:
+            return await asyncio.get_event_loop().run_in_executor(
+                self._executor, function, *args)
+
+    async def _load(self, folder, path):
+        """Read a file of a thread, and decode it as soon as it arrives."""
+        contents = await self._run(_read_bytes, os.path.join(folder, *path.split('/')))
+        if path == 'urls.dat':
+            return path, decode_text(contents)
+        if path == 'structure.json':
+            return path, loads(contents)
+        return path, loads_tweet(contents, project_fields=self._project_fields)
+
+    async def load_thread(self, folder):
+        """
+        Read and decode the structure, urls and tweets of a thread.
+
+        :rtype:
+            :class:`PrefetchedThreadFolder`
+        """
+        listings = await self._run(_list_thread, folder)
+        paths = [name for name in ['structure.json', 'urls.dat'] if name in listings['']]
+        for subfolder in _TWEET_FOLDERS:
+            paths += ['{}/{}'.format(subfolder, name) for name in listings.get(subfolder, [])]
+
+        contents = await asyncio.gather(*(self._load(folder, path) for path in paths))
+        return PrefetchedThreadFolder(folder, listings, dict(contents),
+                                      mime_index=self._mime_index)
+
+
+# Put on the queue of prefetched threads once every thread has been read
+_END = object()
+
+
+class _ThreadPrefetcher(object):
+    """
+    Reads the threads of a list of folders with a fixed number of workers, in an event loop
+    on a thread of its own, and hands them over in order. A worker only starts on another
+    thread while fewer than twice `max_in_flight` threads are being read or waiting to be
+    taken, so the memory held stays flat however many threads are read.
+    """
+    # pylint:disable=too-few-public-methods,too-many-instance-attributes
+
+    def __init__(self, thread_folders, max_in_flight, project_fields, mime_index):
+        self._folders = enumerate(thread_folders)
+        self._max_in_flight = max_in_flight
+        self._project_fields = project_fields
+        self._mime_index = mime_index
+        self._prefetched = queue.Queue()
+        self._finished = {}
+        self._next_index = 0
+        self._window = None
+        self._workers = []
+
+    def __iter__(self):
+        # The reads run in an event loop on a thread of their own, so threads can also be
+        # imported from code which is already running an event loop, such as a notebook
+        loop = asyncio.new_event_loop()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            reading = executor.submit(loop.run_until_complete, self._read_all())
+            try:
+                while True:
+                    thread_files = self._prefetched.get()
+                    if thread_files is _END:
+                        break
+                    if isinstance(thread_files, Exception):
+                        raise thread_files
+                    loop.call_soon_threadsafe(self._window.release)
+                    yield thread_files
+            finally:
+                # Stop the workers if the threads were not all taken
+                if not reading.done():
+                    loop.call_soon_threadsafe(self._cancel)
+                reading.result()
+                loop.close()
+
+    def _cancel(self):
+        """Cancel every worker."""
+        for worker in self._workers:
+            worker.cancel()
+
+    async def _read_all(self):
+        """Read every thread with a fixed number of workers, then mark the end of the queue."""
+        self._window = asyncio.Semaphore(2 * self._max_in_flight)
+        with ThreadPoolExecutor(max_workers=self._max_in_flight) as executor:
+            reader = _AsyncThreadReader(executor, self._max_in_flight, self._project_fields,
+                                        self._mime_index)
+            self._workers = [asyncio.ensure_future(self._work(reader))
+                             for _ in range(self._max_in_flight)]
+            try:
+                await asyncio.gather(*self._workers)
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self._cancel()
+                await asyncio.gather(*self._workers, return_exceptions=True)
+        self._prefetched.put(_END)
+
+    async def _work(self, reader):
+        """
+        Read threads until none are left, queueing each once it and every thread before it
+        have been read.
+        """
+        while True:
+            await self._window.acquire()
+            try:
+                index, folder = next(self._folders)
+            except StopIteration:
+                self._window.release()
+                return
+            try:
+                self._finished[index] = await reader.load_thread(folder)
+            except asyncio.CancelledError:  # pylint:disable=try-except-raise
+                # Before Python 3.8, cancelling is an Exception
+                raise
+            except Exception as error:  # pylint:disable=broad-except
+                # Raised again when the thread would have been taken
+                self._finished[index] = error
+            while self._next_index in self._finished:
+                self._prefetched.put(self._finished.pop(self._next_index))
+                self._next_index += 1
+
+
+def prefetch_threads(thread_folders, max_in_flight, project_fields=False, mime_index=None):
+    """
+    Read and decode the structure, urls and tweets of a list of threads with asyncio,
+    keeping at most `max_in_flight` reads outstanding. Threads are yielded in order as they
+    are read, and at most `2 * max_in_flight` are held ahead of the caller.
+
+    :param thread_folders:
+        root folders of the threads to read
+    :type thread_folders:
+        `list` of `str`
+    :param max_in_flight:
+        maximum number of files being read at once
+    :type max_in_flight:
+        `int`
+    :param project_fields:
+        `True` to keep only the fields of each tweet which are used by feature extraction
+    :type project_fields:
+        `bool`
+    :param mime_index:
+        index of previously detected MIME types, for the context documents of each thread
+    :type mime_index:
+        :class:`MimeIndex` or None
+    :rtype:
+        Generator[:class:`PrefetchedThreadFolder`]
+    """
+    return iter(_ThreadPrefetcher(thread_folders, max_in_flight, project_fields, mime_index))
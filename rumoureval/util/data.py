@@ -5,13 +5,30 @@ Manages importing data into basic Python structures.
 import logging
 import json
 import os
-import sys
 from time import time
-import magic
-from .lists import filter_none
 from .log import get_log_separator
+from .mime import MimeIndex
+from .shared_records import share_records
+from .snapshot import load_snapshot
 from ..pipeline.tweet_detail_extractor import TweetDetailExtractor
-from ..objects.tweet import Tweet
+from ..objects.thread_store import ThreadStore
+
+# Imported from this module before these were split into their own modules
+# pylint:disable=unused-import
+from .datasource import (
+    FIND_JSONL, get_datasource_archive, get_datasource_events, get_datasource_jsonl,
+    get_datasource_path, get_event_manifest, get_mime_index_path, get_output_path,
+    get_script_path, get_snapshot_path
+)
+from .thread_import import (
+    convert_to_jsonl, find_thread_folders, import_datasource_threads, import_thread,
+    import_threads, import_tweet_data, iter_datasource_threads, iter_thread_files,
+    read_annotation_data
+)
+from .snapshot_import import (
+    get_datasource_delta, get_datasource_fingerprint, import_snapshot, load_current_snapshot
+)
+# pylint:enable=unused-import
 
 
 LOGGER = logging.getLogger()
@@ -31,164 +48,7 @@ def size_mb(docs):
     return sum(len(s.encode('utf-8')) for s in docs) / 1e6
 
 
-def get_script_path():
-    """
-    Get the root path which the script was run from.
-
-    :rtype:
-        `str`
-    """
-    return os.path.dirname(os.path.realpath(sys.argv[0]))
-
-
-def get_output_path():
-    """
-    Get the path to which output should be saved.
-
-    :rtype:
-        `str`
-    """
-    return os.path.join(get_script_path(), '..', 'output')
-
-
-def get_datasource_path(datasource, annotations=False):
-    """
-    Get the path to input data.
-
-    :param datasource:
-        source of data to import
-    :type datasource:
-        either 'dev', 'train', or 'test'
-    :param annotations:
-        `True` for data annotations, `False` for data. Defaults to `False`
-    :type annotations:
-        `bool`
-    :rtype:
-        `str`
-    """
-    directory = datasource if not annotations else '{}-annotations'.format(datasource)
-    return os.path.join(get_script_path(), '..', 'data', directory)
-
-
-def import_thread(folder):
-    """
-    Imports a single twitter thread following a specific structure into a `dict`.
-    Assumes the following structure:
-
-    folder
-    |- structure.json
-    |- urls.dat
-    |- source-tweet
-        |- <tweet_id>.json
-    |- replies
-        |- <tweet_id>.json
-        |- ...
-    |- context
-        |- wikipedia
-        |- urls
-            |- <url_md5>
-            |- ...
-
-    :param folder:
-        folder name to retrieve source tweet from
-    :type folder:
-        `str`
-    :rtype:
-        `dict`
-    """
-    # pylint:disable=too-many-branches
-    thread = {}
-
-    if os.path.exists(os.path.join(folder, 'structure.json')):
-        with open(os.path.join(folder, 'structure.json')) as structure:
-            thread['structure'] = json.load(structure)
-
-    if os.path.exists(os.path.join(folder, 'urls.dat')):
-        with open(os.path.join(folder, 'urls.dat')) as url_dat:
-            thread['urls'] = []
-            for line in url_dat.readlines():
-                raw_url = line.split()
-                url = {
-                    'hash': raw_url[0],
-                    'short': raw_url[1],
-                    'full': raw_url[2],
-                }
-                thread['urls'].append(url)
-
-    if os.path.exists(os.path.join(folder, 'source-tweet')):
-        for child in os.listdir(os.path.join(folder, 'source-tweet')):
-            with open(os.path.join(folder, 'source-tweet', child)) as source_tweet:
-                thread['source'] = json.load(source_tweet)
-
-    thread['replies'] = {}
-    if os.path.exists(os.path.join(folder, 'replies')):
-        for child in os.listdir(os.path.join(folder, 'replies')):
-            with open(os.path.join(folder, 'replies', child)) as reply_tweet_file:
-                reply_tweet = json.load(reply_tweet_file)
-                thread['replies'][reply_tweet['id_str']] = reply_tweet
-
-    if os.path.exists(os.path.join(folder, 'context', 'wikipedia')):
-        with open(os.path.join(folder, 'context', 'wikipedia')) as wiki:
-            thread['wiki'] = wiki.read()
-    else:
-        thread['context/wiki'] = None
-
-    if os.path.exists(os.path.join(folder, 'context', 'urls')):
-        thread['context/urls'] = {}
-        for child in os.listdir(os.path.join(folder, 'context', 'urls')):
-            context_file_path = os.path.join(folder, 'context', 'urls', child)
-            if magic.from_file(context_file_path, mime=True) != 'text/html':
-                continue
-            with open(context_file_path) as url_context:
-                thread['context/urls'][child] = url_context.read()
-    else:
-        thread['context/urls'] = None
-
-    if os.path.exists(os.path.join(folder, 'urls-content')):
-        thread['urls-content'] = {}
-        for child in os.listdir(os.path.join(folder, 'urls-content')):
-            with open(os.path.join(folder, 'urls-content', child)) as url_content:
-                thread['urls-content'][child] = url_content.read()
-    else:
-        thread['urls-content'] = None
-
-    return thread
-
-
-def import_tweet_data(folder):
-    """
-    Imports raw tweet data from the given folder, recursively.
-
-    :param folder:
-        folder name to retrieve tweets from
-    :type folder:
-        `str`
-    :rtype:
-        `dict` or None
-    """
-    if not os.path.exists(folder):
-        LOGGER.debug('File/folder does not exist: %s', folder)
-        return None
-
-    if os.path.isfile(folder):
-        return None
-
-    tweet_data = []
-    children = os.listdir(folder)
-    if 'structure.json' in children:
-        # This is the root of a twitter thread
-        tweet_data.append(import_thread(folder))
-    else:
-        for child in children:
-            child_data = import_tweet_data(os.path.join(folder, child))
-            if child_data is not None:
-                tweet_data += child_data
-
-    tweet_data = filter_none(tweet_data)
-    return tweet_data
-
-
-def import_annotation_data(datasource):
+def import_annotation_data(datasource, use_snapshot=True, events=None):
     """
     Imports raw annotation data for the specified data source, indicating the annotation
     for each tweet ID
@@ -197,18 +57,43 @@ def import_annotation_data(datasource):
         source of data to import
     :type datasource:
         either 'dev', 'train', or 'test'
+    :param use_snapshot:
+        `True` to read annotations from an up to date snapshot of the data source, if one exists
+    :type use_snapshot:
+        `bool`
+    :param events:
+        events to import the annotations of, read from their per-event manifests. Defaults
+        to every event
+    :type events:
+        `list` of `str` or None
     :rtype:
         `dict`
     """
-    task_a_annotations = {}
-    task_b_annotations = {}
-    with open(os.path.join(get_datasource_path(datasource, annotations=True),
-                           'subtaskA.json')) as annotation_json:
-        task_a_annotations = json.load(annotation_json)
-    with open(os.path.join(get_datasource_path(datasource, annotations=True),
-                           'subtaskB.json')) as annotation_json:
-        task_b_annotations = json.load(annotation_json)
-    return task_a_annotations, task_b_annotations
+    if events:
+        manifest = get_event_manifest(datasource)
+        annotations = manifest.annotations(events)
+        if annotations is None:
+            # Annotations which are only archived are filtered after reading them in full
+            tweet_ids = manifest.tweet_ids(events)
+            annotations = tuple(
+                {tweet_id: label for tweet_id, label in task_annotations.items()
+                 if tweet_id in tweet_ids}
+                for task_annotations in read_annotation_data(datasource)
+            )
+        return annotations
+
+    if use_snapshot:
+        # Annotations are read from files which the fingerprint covers, so the threads of the
+        # snapshot are not checked
+        snapshot = load_snapshot(get_snapshot_path(datasource),
+                                 get_datasource_fingerprint(datasource))
+        if snapshot is not None:
+            annotations = snapshot.annotations()
+            snapshot.close()
+            if annotations is not None:
+                return annotations
+
+    return read_annotation_data(datasource)
 
 
 def build_tweet(tweet_data, tweet_id, structure, is_source=False):
@@ -235,23 +120,96 @@ def build_tweet(tweet_data, tweet_id, structure, is_source=False):
     :rtype:
         :class:`Tweet`
     """
-    children = [
-        build_tweet(
-            tweet_data,
-            child_tweet_id,
-            structure[child_tweet_id]
-        ) for child_tweet_id in structure
-    ]
-    children = filter_none(children)
-    if is_source:
-        return Tweet(tweet_data['source'], children=children, is_source=True)
-    elif tweet_id in tweet_data['replies']:
-        return Tweet(tweet_data['replies'][tweet_id], children=children)
-
-    return None
-
-
-def import_data(datasource):
+    store = ThreadStore.from_tree(tweet_data, tweet_id, structure, is_source=is_source)
+    return store.tweets[0] if store.tweets else None
+
+
+def build_thread(thread):
+    """
+    Creates the source Tweet of a thread, along with the full tree of its replies and an
+    index of every Tweet in the tree by its ID.
+
+    :param thread:
+        A single Twitter thread
+    :type thread:
+        `dict`
+    :rtype:
+        `tuple` of :class:`Tweet` and `dict` of `str` to :class:`Tweet`
+    """
+    store = ThreadStore.from_threads([thread])
+    return store.tweets[0], store.index()
+
+
+def build_source_tweet(thread):
+    """
+    Creates the source Tweet of a thread, along with the full tree of its replies.
+
+    :param thread:
+        A single Twitter thread
+    :type thread:
+        `dict`
+    :rtype:
+        :class:`Tweet`
+    """
+    return build_thread(thread)[0]
+
+
+def iter_threads(datasource, use_snapshot=True, include_context=True, project_fields=False):
+    """
+    Imports tweet data from the specified data source one thread at a time, so only a single
+    thread is held in memory by the import.
+
+    :param datasource:
+        source of data to import
+    :type datasource:
+        either 'dev', 'train', or 'test'
+    :param use_snapshot:
+        `True` to read threads from the packed snapshot of the data source, if it is
+        up to date. Stale snapshots are not rebuilt, since that requires a full import
+    :type use_snapshot:
+        `bool`
+    :param include_context:
+        `False` to skip the context documents of each thread
+    :type include_context:
+        `bool`
+    :param project_fields:
+        `True` to keep only the fields of each tweet which are used by feature extraction
+    :type project_fields:
+        `bool`
+    :rtype:
+        Generator[:class:`Tweet`]
+    """
+    jsonl = get_datasource_jsonl(datasource)
+    snapshot = None
+    if use_snapshot:
+        snapshot = load_current_snapshot(datasource,
+                                         include_context=include_context,
+                                         project_fields=project_fields,
+                                         jsonl=jsonl)
+
+    if snapshot is not None:
+        try:
+            for thread in snapshot.threads():
+                yield build_source_tweet(thread)
+        finally:
+            snapshot.close()
+        return
+
+    mime_index = MimeIndex.load(get_mime_index_path()) if include_context else None
+    try:
+        for thread in iter_datasource_threads(datasource,
+                                              include_context=include_context,
+                                              project_fields=project_fields,
+                                              mime_index=mime_index,
+                                              jsonl=jsonl):
+            yield build_source_tweet(thread)
+    finally:
+        if mime_index is not None:
+            mime_index.save(get_mime_index_path())
+
+
+def import_data(datasource, workers=None, use_snapshot=True, include_context=True,
+                project_fields=False, async_reads=None, events=None, share=False):
     """
     Imports raw tweet data from the specified data source, to be parsed later.
 
@@ -259,30 +217,80 @@ def import_data(datasource):
         source of data to import
     :type datasource:
         either 'dev', 'train', or 'test'
+    :param workers:
+        number of processes to import threads with. Defaults to a serial import
+    :type workers:
+        `int` or None
+    :param use_snapshot:
+        `True` to import from a packed snapshot of the data source, which is rebuilt
+        whenever the data source changes. `False` to always parse the raw data
+    :type use_snapshot:
+        `bool`
+    :param include_context:
+        `False` to skip the context documents of each thread
+    :type include_context:
+        `bool`
+    :param project_fields:
+        `True` to keep only the fields of each tweet which are used by feature extraction
+    :type project_fields:
+        `bool`
+    :param async_reads:
+        maximum number of files to read at once with asyncio. Defaults to serial reads
+    :type async_reads:
+        `int` or None
+    :param events:
+        events to import, found from their per-event manifests so other events are never
+        read. Requires the data source to be extracted, and bypasses snapshots. Defaults to
+        every event
+    :type events:
+        `list` of `str` or None
+    :param share:
+        `True` to keep a single copy of each user, shared by all of their tweets, and intern
+        the keys and repeated strings of every tweet
+    :type share:
+        `bool`
     :rtype:
         `list` of :class:`Tweet`
     """
+    # pylint:disable=too-many-arguments
     LOGGER.info(get_log_separator())
     LOGGER.info('Beginning `%s` data import', datasource)
     start_time = time()
-    source_folder = get_datasource_path(datasource)
-    tweet_data = import_tweet_data(source_folder)
-
-    parsed_tweets = [
-        build_tweet(
-            thread,
-            thread['source']['id_str'],
-            thread['structure'][thread['source']['id_str']],
-            is_source=True
-        ) for thread in tweet_data
-    ]
-
-    root_tweets = parsed_tweets[:]
-    for tweet in parsed_tweets:
-        parsed_tweets += list(tweet.children())
+    if events:
+        LOGGER.debug('Importing events: %s', ', '.join(events))
+        tweet_data = import_threads(get_event_manifest(datasource).thread_folders(events),
+                                    workers=workers,
+                                    include_context=include_context,
+                                    project_fields=project_fields,
+                                    async_reads=async_reads)
+    elif use_snapshot:
+        snapshot = import_snapshot(datasource,
+                                   workers=workers,
+                                   include_context=include_context,
+                                   project_fields=project_fields,
+                                   async_reads=async_reads,
+                                   jsonl=get_datasource_jsonl(datasource))
+        tweet_data = snapshot.load_threads()
+        snapshot.close()
+    else:
+        tweet_data = import_datasource_threads(datasource,
+                                               workers=workers,
+                                               include_context=include_context,
+                                               project_fields=project_fields,
+                                               async_reads=async_reads,
+                                               jsonl=get_datasource_jsonl(datasource))
+
+    if share:
+        records = share_records(tweet_data)
+        LOGGER.debug('Shared %d users across the tweets of %s', len(records.users), datasource)
+
+    # Roots first, then each level of replies in turn, as a breadth first walk of every
+    # thread at once
+    store = ThreadStore.from_threads(tweet_data)
+    parsed_tweets = [store.tweets[position] for position in store.breadth_first_order()]
 
     LOGGER.info('Took %0.3fs to import `%s` data', time() - start_time, datasource)
-    LOGGER.debug('Imported %d root tweets from %s', len(root_tweets), datasource)
+    LOGGER.debug('Imported %d root tweets from %s', len(store.source_positions()), datasource)
     LOGGER.debug('Imported %d child tweets from %s', len(parsed_tweets), datasource)
 
     return parsed_tweets
@@ -317,7 +325,8 @@ def output_data_by_class(tweets, annotations, task, prefix=None):
             sorted_tweets[annotation] = []
             sorted_tweet_text[annotation] = set()
         sorted_tweets[annotation].append(tweet.raw())
-        sorted_tweet_text[annotation] |= set(list(detail_extractor._tokenize(TweetDetailExtractor.get_parseable_tweet_text(tweet, task=task))))
+        sorted_tweet_text[annotation] |= set(list(detail_extractor._tokenize(
+            TweetDetailExtractor.get_parseable_tweet_text(tweet))))
 
     os.makedirs(get_output_path(), exist_ok=True)
     LOGGER.info('Tweet distribution for task {}{}:'.format(prefix, task))
@@ -334,5 +343,3 @@ def output_data_by_class(tweets, annotations, task, prefix=None):
             filename = '{0}_dict.txt'.format(annotation)
             with open(os.path.join(get_output_path(), filename), 'w') as file:
                 file.write('\n'.join(sorted(list(sorted_tweet_text[annotation]))))
-
-
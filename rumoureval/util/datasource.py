@@ -0,0 +1,193 @@
+"""
+Locates the files of each data source: its extracted folder, archive and JSON lines file,
+and the snapshots, manifests and indexes kept for it under the output folder.
+"""
+
+import logging
+import os
+import sys
+from .events import EventManifest, list_events
+from .manifest import latest_mtime
+from .thread_files import find_archive
+
+
+LOGGER = logging.getLogger()
+
+# Archives in `data-zip` which are not named after the folder they hold
+_ARCHIVE_ALIASES = {
+    'dev-annotations': ['dev_key'],
+}
+
+# JSON lines files found to be older than their data source folder, which are only warned of once
+_STALE_JSONL = set()
+
+# Default of `jsonl` arguments, for which the JSON lines file of the data source is looked up.
+# Imports look it up once and pass it on, as checking it against the folder walks the folder
+FIND_JSONL = object()
+
+
+def get_script_path():
+    """
+    Get the root path which the script was run from.
+
+    :rtype:
+        `str`
+    """
+    return os.path.dirname(os.path.realpath(sys.argv[0]))
+
+
+def get_output_path():
+    """
+    Get the path to which output should be saved.
+
+    :rtype:
+        `str`
+    """
+    return os.path.join(get_script_path(), '..', 'output')
+
+
+def get_datasource_path(datasource, annotations=False):
+    """
+    Get the path to input data.
+
+    :param datasource:
+        source of data to import
+    :type datasource:
+        either 'dev', 'train', or 'test'
+    :param annotations:
+        `True` for data annotations, `False` for data. Defaults to `False`
+    :type annotations:
+        `bool`
+    :rtype:
+        `str`
+    """
+    directory = datasource if not annotations else '{}-annotations'.format(datasource)
+    return os.path.join(get_script_path(), '..', 'data', directory)
+
+
+def get_datasource_archive(datasource, annotations=False):
+    """
+    Get the path to the compressed archive of input data, used when the data has not
+    been extracted under `data`.
+
+    :param datasource:
+        source of data to import
+    :type datasource:
+        either 'dev', 'train', or 'test'
+    :param annotations:
+        `True` for data annotations, `False` for data. Defaults to `False`
+    :type annotations:
+        `bool`
+    :rtype:
+        `str` or None
+    """
+    directory = datasource if not annotations else '{}-annotations'.format(datasource)
+    return find_archive(os.path.join(get_script_path(), '..', 'data-zip'),
+                        [directory] + _ARCHIVE_ALIASES.get(directory, []))
+
+
+def get_datasource_jsonl(datasource):
+    """
+    Get the path to the JSON lines file of input data, which is used in place of its folder
+    or archive when it exists. A file older than some of the extracted folder is stale, and
+    the folder is read instead. Checking this walks the extracted folder, so imports look the
+    file up once and pass it on.
+
+    :param datasource:
+        source of data to import
+    :type datasource:
+        either 'dev', 'train', or 'test'
+    :rtype:
+        `str` or None
+    """
+    folder = get_datasource_path(datasource)
+    path = '{}.jsonl'.format(folder)
+    for candidate in [path, '{}.gz'.format(path)]:
+        if not os.path.isfile(candidate):
+            continue
+        mtime = os.stat(candidate).st_mtime_ns
+        if os.path.isdir(folder) and latest_mtime(folder) > mtime:
+            if (candidate, mtime) not in _STALE_JSONL:
+                _STALE_JSONL.add((candidate, mtime))
+                LOGGER.warning('%s changed after %s was written, reading the folder instead',
+                               folder, candidate)
+            continue
+        return candidate
+    return None
+
+
+def get_snapshot_path(datasource, include_context=True, project_fields=False):
+    """
+    Get the path of the packed snapshot of a data source.
+
+    :param datasource:
+        source of data
+    :type datasource:
+        either 'dev', 'train', or 'test'
+    :param include_context:
+        `False` for the snapshot of the data source without context documents
+    :type include_context:
+        `bool`
+    :param project_fields:
+        `True` for the snapshot of the data source with projected tweets
+    :type project_fields:
+        `bool`
+    :rtype:
+        `str`
+    """
+    filename = datasource
+    if not include_context:
+        filename += '-nocontext'
+    if project_fields:
+        filename += '-projected'
+    return os.path.join(get_output_path(), 'snapshots', '{}.snapshot'.format(filename))
+
+
+def get_event_manifest(datasource):
+    """
+    Get the per-event manifests of an extracted data source, used to select some of its
+    events without walking the rest.
+
+    :param datasource:
+        source of data
+    :type datasource:
+        either 'dev', 'train', or 'test'
+    :rtype:
+        :class:`EventManifest`
+    """
+    folder = get_datasource_path(datasource)
+    if not os.path.isdir(folder):
+        raise ValueError('Selecting events requires `{}` data to be extracted'.format(datasource))
+    return EventManifest(os.path.join(get_output_path(), 'events', datasource),
+                         folder,
+                         get_datasource_path(datasource, annotations=True))
+
+
+def get_datasource_events(datasource, events):
+    """
+    Find which of a set of events a data source has, so one list of events can select from
+    several data sources.
+
+    :param datasource:
+        source of data
+    :type datasource:
+        either 'dev', 'train', or 'test'
+    :param events:
+        names of events
+    :type events:
+        `list` of `str`
+    :rtype:
+        `list` of `str`
+    """
+    available = list_events(get_datasource_path(datasource))
+    return [event for event in events if event in available]
+
+
+def get_mime_index_path():
+    """
+    Get the path of the index of MIME types detected for context documents.
+
+    :rtype:
+        `str`
+    """
+    return os.path.join(get_output_path(), 'mime_index.json')
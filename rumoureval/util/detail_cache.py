@@ -0,0 +1,160 @@
+"""
+Keeps the details extracted from tweets in memory within a budget of entries or bytes, so a
+long-running process does not grow without bound. The least recently used details are evicted
+first, and the cache may be shared by several threads.
+"""
+
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+
+
+# Counters of a cache, and the entries and estimated bytes it holds
+CacheStats = namedtuple('CacheStats', ['hits', 'misses', 'evictions', 'entries', 'bytes'])
+
+
+def estimate_size(details):
+    """
+    Estimate the bytes held by the details of a tweet, counting the items of its lists but not
+    any objects nested deeper.
+
+    :param details:
+        the value of each detail of a tweet
+    :type details:
+        `tuple`
+    :rtype:
+        `int`
+    """
+    size = sys.getsizeof(details)
+    for value in details:
+        size += sys.getsizeof(value)
+        if isinstance(value, list):
+            size += sum(sys.getsizeof(item) for item in value)
+    return size
+
+
+class DetailCache(object):
+    """A thread-safe cache of tweet details which evicts the least recently used details."""
+    # pylint:disable=too-many-instance-attributes
+
+    def __init__(self, max_entries=None, max_bytes=None, size_of=estimate_size):
+        """Initialize DetailCache.
+
+        :param max_entries:
+            most details to hold, or None for no limit
+        :type max_entries:
+            `int` or None
+        :param max_bytes:
+            most estimated bytes of details to hold, or None for no limit
+        :type max_bytes:
+            `int` or None
+        :param size_of:
+            function estimating the bytes held by the details of a tweet
+        :type size_of:
+            `callable`
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._size_of = size_of
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """
+        Get cached details, marking them as the most recently used.
+
+        :param key:
+            key of the details
+        :type key:
+            `tuple`
+        :param default:
+            value to return if the details are not cached
+        :rtype:
+            `tuple`, or `default`
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, details):
+        """
+        Cache details, evicting the least recently used details if the cache is over budget.
+
+        :param key:
+            key of the details
+        :type key:
+            `tuple`
+        :param details:
+            details of a tweet
+        :type details:
+            `tuple`
+        """
+        size = self._size_of(details) if self.max_bytes is not None else 0
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (details, size)
+            self._bytes += size
+            self._evict()
+
+    def resize(self, max_entries=None, max_bytes=None):
+        """
+        Change the budget of the cache, evicting details until it is within it. Sizes are only
+        estimated while there is a byte budget, so details cached before one is set count as
+        empty.
+
+        :param max_entries:
+            most details to hold, or None for no limit
+        :type max_entries:
+            `int` or None
+        :param max_bytes:
+            most estimated bytes of details to hold, or None for no limit
+        :type max_bytes:
+            `int` or None
+        """
+        with self._lock:
+            self.max_entries = max_entries
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def _evict(self):
+        """Evict the least recently used details until the cache is within its budget."""
+        while self._entries and (
+                (self.max_entries is not None and len(self._entries) > self.max_entries) or
+                (self.max_bytes is not None and self._bytes > self.max_bytes)):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        """Remove every cached detail, keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Get the counters of the cache.
+
+        :rtype:
+            :class:`CacheStats`
+        """
+        with self._lock:
+            return CacheStats(self.hits, self.misses, self.evictions, len(self._entries),
+                              self._bytes)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
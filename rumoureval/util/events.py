@@ -0,0 +1,262 @@
+"""
+Selects the events of a datasource, such as charliehebdo or ferguson, without walking the
+rest of it.
+
+A small manifest is kept for each event of a datasource under `output/events/<datasource>`.
+`index.json` maps each event to:
+
+    stat         digest of the modification times of the event's thread folders
+    threads      keys of the threads in the event, relative to the datasource
+    tweets       IDs of the tweets in the event
+    annotations  sizes and modification times of the annotation files the event's
+                 annotations were split from
+
+and `<event>.annotations.json` holds the task A and task B annotations of the event's tweets,
+so selecting an event reads neither the threads nor the annotations of any other event.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from .manifest import get_thread_key
+
+
+LOGGER = logging.getLogger()
+
+# Folders of a thread which hold its tweets, named by tweet ID
+_TWEET_FOLDERS = ['source-tweet', 'replies']
+
+
+def _write_json(path, value):
+    """Write a JSON file atomically."""
+    temporary_path = '{}.tmp'.format(path)
+    with open(temporary_path, 'w') as json_file:
+        json.dump(value, json_file)
+    os.replace(temporary_path, path)
+
+
+def _load_json(path):
+    """Read a JSON file, or None if it is missing or unreadable."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as json_file:
+            return json.load(json_file)
+    except ValueError:
+        return None
+
+
+def _stat_annotations(annotation_folder):
+    """Get the size and modification time of each annotation file."""
+    stats = []
+    for task in ['A', 'B']:
+        stat = os.stat(os.path.join(annotation_folder, 'subtask{}.json'.format(task)))
+        stats.append([stat.st_size, stat.st_mtime_ns])
+    return stats
+
+
+def _list_event(event_folder):
+    """
+    Find the thread folders of an event, and a digest of their modification times. Threads
+    are only listed one level below the event, as in the RumourEval data.
+    """
+    digest = hashlib.sha1()
+    thread_folders = []
+    for name in sorted(os.listdir(event_folder)):
+        thread_folder = os.path.join(event_folder, name)
+        if not os.path.isfile(os.path.join(thread_folder, 'structure.json')):
+            continue
+        thread_folders.append(thread_folder)
+        digest.update('{}:{}'.format(name, os.stat(thread_folder).st_mtime_ns).encode('utf-8'))
+        for subfolder in _TWEET_FOLDERS:
+            path = os.path.join(thread_folder, subfolder)
+            if os.path.isdir(path):
+                digest.update(':{}'.format(os.stat(path).st_mtime_ns).encode('utf-8'))
+        digest.update(b'\n')
+    return thread_folders, digest.hexdigest()
+
+
+def _list_tweet_ids(thread_folder):
+    """Get the IDs of the tweets of a thread from the names of their files."""
+    tweet_ids = []
+    for subfolder in _TWEET_FOLDERS:
+        path = os.path.join(thread_folder, subfolder)
+        if os.path.isdir(path):
+            tweet_ids += [os.path.splitext(name)[0] for name in sorted(os.listdir(path))]
+    return tweet_ids
+
+
+def list_events(datasource_folder):
+    """
+    List the events of a datasource.
+
+    :param datasource_folder:
+        folder of the datasource
+    :type datasource_folder:
+        `str`
+    :rtype:
+        `list` of `str`
+    """
+    if not os.path.isdir(datasource_folder):
+        return []
+    return sorted(
+        name for name in os.listdir(datasource_folder)
+        if os.path.isdir(os.path.join(datasource_folder, name)) and
+        not os.path.isfile(os.path.join(datasource_folder, name, 'structure.json'))
+    )
+
+
+class EventManifest(object):
+    """Per-event manifests of a datasource, brought up to date as events are selected."""
+
+    def __init__(self, manifest_folder, datasource_folder, annotation_folder):
+        """Initialize EventManifest.
+
+        :param manifest_folder:
+            folder the manifests are kept in
+        :type manifest_folder:
+            `str`
+        :param datasource_folder:
+            folder of the datasource
+        :type datasource_folder:
+            `str`
+        :param annotation_folder:
+            folder of the datasource's annotations
+        :type annotation_folder:
+            `str`
+        """
+        self._manifest_folder = manifest_folder
+        self._datasource_folder = datasource_folder
+        self._annotation_folder = annotation_folder
+        self._index_path = os.path.join(manifest_folder, 'index.json')
+        self._index = _load_json(self._index_path) or {'events': {}}
+
+    def _annotations_path(self, event):
+        """Get the path of the annotations of an event."""
+        return os.path.join(self._manifest_folder, '{}.annotations.json'.format(event))
+
+    def select(self, events):
+        """
+        Bring the manifests of a set of events up to date, rebuilding those whose threads
+        have changed, and warn about events which do not exist.
+
+        :param events:
+            names of the events
+        :type events:
+            `list` of `str`
+        :rtype:
+            `dict` of `str` to `dict`
+        """
+        annotation_stat = None
+        if os.path.isdir(self._annotation_folder):
+            annotation_stat = _stat_annotations(self._annotation_folder)
+
+        selected = {}
+        changed = False
+        stale = []
+        for event in events:
+            event_folder = os.path.join(self._datasource_folder, event)
+            if not os.path.isdir(event_folder):
+                LOGGER.warning('Event `%s` does not exist in %s', event, self._datasource_folder)
+                continue
+
+            thread_folders, stat = _list_event(event_folder)
+            entry = self._index['events'].get(event)
+            if entry is None or entry['stat'] != stat:
+                LOGGER.debug('Updating manifest of event `%s`', event)
+                entry = {
+                    'stat': stat,
+                    'threads': [get_thread_key(self._datasource_folder, thread_folder)
+                                for thread_folder in thread_folders],
+                    'tweets': [tweet_id for thread_folder in thread_folders
+                               for tweet_id in _list_tweet_ids(thread_folder)],
+                    'annotations': None,
+                }
+                self._index['events'][event] = entry
+                changed = True
+            if annotation_stat is not None and (
+                    entry['annotations'] != annotation_stat or
+                    not os.path.exists(self._annotations_path(event))):
+                stale.append(event)
+            selected[event] = entry
+
+        if stale:
+            self._split_annotations(stale, selected)
+            for event in stale:
+                selected[event]['annotations'] = annotation_stat
+        if changed or stale:
+            os.makedirs(self._manifest_folder, exist_ok=True)
+            _write_json(self._index_path, self._index)
+        return selected
+
+    def _split_annotations(self, events, selected):
+        """Write the annotations of each event from the full annotation files."""
+        annotations = []
+        for task in ['A', 'B']:
+            with open(os.path.join(self._annotation_folder,
+                                   'subtask{}.json'.format(task))) as annotation_json:
+                annotations.append(json.load(annotation_json))
+
+        os.makedirs(self._manifest_folder, exist_ok=True)
+        for event in events:
+            _write_json(self._annotations_path(event), [
+                {tweet_id: task[tweet_id] for tweet_id in selected[event]['tweets']
+                 if tweet_id in task}
+                for task in annotations
+            ])
+
+    def tweet_ids(self, events):
+        """
+        Get the IDs of the tweets of a set of events.
+
+        :param events:
+            names of the events
+        :type events:
+            `list` of `str`
+        :rtype:
+            `set` of `str`
+        """
+        return set(tweet_id for entry in self.select(events).values()
+                   for tweet_id in entry['tweets'])
+
+    def thread_folders(self, events):
+        """
+        Get the thread folders of a set of events.
+
+        :param events:
+            names of the events
+        :type events:
+            `list` of `str`
+        :rtype:
+            `list` of `str`
+        """
+        return [
+            os.path.join(self._datasource_folder, *key.split('/'))
+            for entry in self.select(events).values()
+            for key in entry['threads']
+        ]
+
+    def annotations(self, events):
+        """
+        Get the task A and task B annotations of the tweets of a set of events. Returns None
+        if the annotations of the datasource have not been extracted.
+
+        :param events:
+            names of the events
+        :type events:
+            `list` of `str`
+        :rtype:
+            `tuple` of `dict`, or None
+        """
+        selected = self.select(events)
+        if not os.path.isdir(self._annotation_folder):
+            return None
+
+        task_a_annotations = {}
+        task_b_annotations = {}
+        for event in selected:
+            event_annotations = _load_json(self._annotations_path(event))
+            task_a_annotations.update(event_annotations[0])
+            task_b_annotations.update(event_annotations[1])
+        return task_a_annotations, task_b_annotations
@@ -0,0 +1,333 @@
+"""
+Keeps the details extracted from tweets on disk, so later runs load them instead of
+tokenizing and stemming every tweet again.
+
+A feature cache file is laid out as:
+
+    magic (8 bytes)
+    fingerprint length (8 bytes, little endian)
+    fingerprint (ASCII)
+    one or more chunks of details, each of which is:
+        index length (8 bytes, little endian)
+        index (a pickled `list` of the key and pickled length of each detail)
+        details (each pickled on its own, in the order of the index)
+
+The fingerprint covers the settings of the extractor, the lexicons in `corpus/` and the code
+of the extractor, so a cache built by different settings or code is never loaded. It is read
+before the details, so a stale cache is rejected without unpickling it. Details are keyed by
+the tweet ID and a digest of the fields they are extracted from, so the details of a tweet
+which was edited are not found and are extracted again.
+
+Only the indexes are read to find which details are cached, and details are unpickled one by
+one as they are asked for. Each update appends a chunk of the details which were not yet
+cached, rather than rewriting the file. Details superseded by those of an edited tweet are
+pruned by rewriting the file once they outnumber the current details, and a stale file is
+replaced the same way, by renaming a new file over it. Writers hold an exclusive lock on the
+file where the platform supports it, and take in the chunks appended by other processes before
+adding their own. Chunks which cannot be read, such as those cut short by an interrupted
+update, are dropped by the next update.
+"""
+
+import gc
+import hashlib
+import logging
+import os
+import pickle
+import struct
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+LOGGER = logging.getLogger()
+
+FEATURE_CACHE_MAGIC = b'REFEAT02'
+_LENGTH = struct.Struct('<Q')
+
+# Details are pickled with a fixed protocol, so a cache written by a newer interpreter can be
+# read by the pinned Python 3.6
+FEATURE_CACHE_PROTOCOL = 4
+
+
+def fingerprint_extractor(settings, source_files):
+    """
+    Fingerprint the settings and code which details are extracted with.
+
+    :param settings:
+        settings of the extractor, which must have a stable `repr`
+    :type settings:
+        `tuple`
+    :param source_files:
+        files of the code and lexicons used by the extractor
+    :type source_files:
+        `list` of `str`
+    :rtype:
+        `str`
+    """
+    digest = hashlib.sha1()
+    digest.update(repr(settings).encode('utf-8'))
+    for path in sorted(source_files):
+        digest.update(os.path.basename(path).encode('utf-8'))
+        with open(path, 'rb') as source_file:
+            digest.update(hashlib.sha1(source_file.read()).digest())
+    return digest.hexdigest()
+
+
+@contextmanager
+def _locked_file(path):
+    """
+    Open a cache file for writing, creating it if it is missing, and hold an exclusive lock on
+    it. A file which was replaced while waiting for the lock is opened again.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    while True:
+        cache_file = open(path, 'a+b')
+        if fcntl is None:
+            break
+        fcntl.flock(cache_file, fcntl.LOCK_EX)
+        if os.path.exists(path) and os.path.samestat(os.fstat(cache_file.fileno()),
+                                                     os.stat(path)):
+            break
+        cache_file.close()
+    try:
+        yield cache_file
+    finally:
+        cache_file.close()
+
+
+class FeatureCache(object):
+    """
+    Details of tweets extracted with a single fingerprint, kept in a file. Only where each
+    detail is in the file is held in memory, and details are read when asked for.
+    """
+    # pylint:disable=too-many-instance-attributes
+
+    def __init__(self, path, fingerprint):
+        """Initialize FeatureCache.
+
+        :param path:
+            file the cache is kept in
+        :type path:
+            `str`
+        :param fingerprint:
+            fingerprint of the extractor
+        :type fingerprint:
+            `str`
+        """
+        self.path = path
+        self.fingerprint = fingerprint
+        self.superseded = 0
+        self._locations = None
+        self._digests = None
+        self._identity = None
+        self._end = None
+        self._truncated = False
+
+    @property
+    def keys(self):
+        """
+        Keys of the cached details, or None if the file has not been read yet.
+
+        :rtype:
+            `set` of (`int`, `str`) or None
+        """
+        return set(self._locations) if self._locations is not None else None
+
+    def read(self, keys):
+        """
+        Read the cached details of some tweets. Only the indexes appended since the file was
+        last read are read, and only the details asked for are unpickled. Nothing is read
+        from a file which is missing, unreadable or was built with another fingerprint.
+        Details cached under the ID of a tweet but another digest are stale, and are not read.
+
+        :param keys:
+            ID and digest of each tweet
+        :type keys:
+            `list` of (`int`, `str`)
+        :rtype:
+            `dict` of (`int`, `str`) to `tuple`, for the keys which are cached
+        """
+        if not os.path.exists(self.path):
+            self._reset()
+            return {}
+
+        details = {}
+        with open(self.path, 'rb') as cache_file:
+            self._refresh(cache_file)
+            locations = sorted((self._locations[key], key) for key in set(keys)
+                               if key in self._locations)
+
+            # Unpickling allocates many small containers which cannot form cycles yet
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                for (offset, length), key in locations:
+                    cache_file.seek(offset)
+                    try:
+                        details[key] = pickle.loads(cache_file.read(length))
+                    except Exception:  # pylint:disable=broad-except
+                        # Unpickling fails in many ways, such as on an unsupported protocol
+                        LOGGER.warning('Ignoring unreadable details in feature cache %s',
+                                       self.path)
+            finally:
+                if gc_enabled:
+                    gc.enable()
+        LOGGER.debug('Read %d of %d cached tweet details from %s',
+                     len(details), len(self._locations), self.path)
+        return details
+
+    def update(self, details):
+        """
+        Add newly extracted details to the cache. Details of keys which are not yet cached
+        are appended to the file, and a missing or stale file is replaced atomically.
+
+        :param details:
+            details by tweet ID and digest
+        :type details:
+            `dict` of (`int`, `str`) to `tuple`
+        """
+        with _locked_file(self.path) as cache_file:
+            self._refresh(cache_file)
+            details = {
+                key: properties for key, properties in details.items()
+                if key not in self._locations
+            }
+            if not details:
+                return
+
+            chunk = [(key, pickle.dumps(properties, protocol=FEATURE_CACHE_PROTOCOL))
+                     for key, properties in details.items()]
+            if self._end is None:
+                self._replace(chunk)
+                return
+
+            # Append after the last complete chunk, dropping a truncated end
+            if self._truncated:
+                cache_file.truncate(self._end)
+                self._truncated = False
+            cache_file.seek(self._end)
+            self._write_chunk(cache_file, chunk)
+            cache_file.flush()
+            self._identity = os.fstat(cache_file.fileno())
+
+            # Once most of the file is superseded details, keep only the current ones
+            if self.superseded > len(self._locations):
+                cache_file.seek(0)
+                self._replace(self._read_current(cache_file))
+
+    def _reset(self):
+        """Forget the contents of the file."""
+        self._locations = {}
+        self._digests = {}
+        self._identity = None
+        self._end = None
+        self._truncated = False
+        self.superseded = 0
+
+    def _refresh(self, cache_file):
+        """
+        Read the indexes of the chunks added to a file since it was last read, or of every
+        chunk if the file was replaced.
+        """
+        identity = os.fstat(cache_file.fileno())
+        if self._identity is not None and self._end is not None and \
+                os.path.samestat(identity, self._identity) and identity.st_size >= self._end:
+            if identity.st_size == self._end:
+                return
+            cache_file.seek(self._end)
+        else:
+            self._reset()
+            cache_file.seek(0)
+            if not self._read_header(cache_file):
+                return
+            self._end = cache_file.tell()
+        self._identity = identity
+
+        self._truncated = False
+        while cache_file.tell() < identity.st_size:
+            start = cache_file.tell()
+            try:
+                index = pickle.loads(cache_file.read(_LENGTH.unpack(
+                    cache_file.read(_LENGTH.size))[0]))
+                offset = cache_file.tell()
+                locations = []
+                for key, length in index:
+                    locations.append((key, (offset, length)))
+                    offset += length
+            except Exception:  # pylint:disable=broad-except
+                # Unpickling fails in many ways, such as on a truncated file or an unsupported
+                # protocol, and any of them leaves the rest of the file unreadable
+                offset = identity.st_size + 1
+            if offset > identity.st_size:
+                self._truncated = True
+                LOGGER.warning('Ignoring unreadable end of feature cache %s', self.path)
+                cache_file.seek(start)
+                break
+            cache_file.seek(offset)
+            self._end = offset
+            for key, location in locations:
+                self._add_location(key, location)
+
+    def _add_location(self, key, location):
+        """Record where a detail is, superseding the detail of the tweet with another digest."""
+        tweet_id, digest = key
+        previous = self._digests.get(tweet_id)
+        if previous is not None and previous != digest:
+            del self._locations[(tweet_id, previous)]
+            self.superseded += 1
+        self._digests[tweet_id] = digest
+        self._locations[key] = location
+
+    def _read_header(self, cache_file):
+        """Check the magic and fingerprint of a file, and whether it can be appended to."""
+        magic = cache_file.read(len(FEATURE_CACHE_MAGIC))
+        if not magic:
+            return False
+        if magic != FEATURE_CACHE_MAGIC:
+            LOGGER.warning('Ignoring feature cache %s, which is not a feature cache', self.path)
+            return False
+        length = _LENGTH.unpack(cache_file.read(_LENGTH.size))[0]
+        if cache_file.read(length).decode('ascii') != self.fingerprint:
+            LOGGER.info('Feature cache %s is stale, re-extracting features', self.path)
+            return False
+        return True
+
+    def _read_current(self, cache_file):
+        """Read the pickled details which are not superseded, in the order of the file."""
+        chunk = []
+        for (offset, length), key in sorted((location, key) for key, location in
+                                            self._locations.items()):
+            cache_file.seek(offset)
+            chunk.append((key, cache_file.read(length)))
+        return chunk
+
+    def _replace(self, chunk):
+        """Write a new file holding a single chunk of details, and rename it over the file."""
+        temporary_path = '{}.{}.tmp'.format(self.path, os.getpid())
+        fingerprint = self.fingerprint.encode('ascii')
+        with open(temporary_path, 'wb') as cache_file:
+            cache_file.write(FEATURE_CACHE_MAGIC)
+            cache_file.write(_LENGTH.pack(len(fingerprint)))
+            cache_file.write(fingerprint)
+            self._reset()
+            self._end = cache_file.tell()
+            self._write_chunk(cache_file, chunk)
+            cache_file.flush()
+            self._identity = os.fstat(cache_file.fileno())
+        os.replace(temporary_path, self.path)
+
+    def _write_chunk(self, cache_file, chunk):
+        """Write a chunk of pickled details at the end of the file, and record where they are."""
+        index = pickle.dumps([(key, len(packed)) for key, packed in chunk],
+                             protocol=FEATURE_CACHE_PROTOCOL)
+        cache_file.write(_LENGTH.pack(len(index)))
+        cache_file.write(index)
+        offset = self._end + _LENGTH.size + len(index)
+        for key, packed in chunk:
+            cache_file.write(packed)
+            self._add_location(key, (offset, len(packed)))
+            offset += len(packed)
+        self._end = offset
@@ -0,0 +1,122 @@
+"""
+Reads and writes corpora as JSON lines, one twitter thread per line, optionally gzipped.
+
+Each line holds a thread as :func:`import_thread` imports it, with the context documents of
+the thread inlined as text when they were converted, so a whole datasource is read with
+sequential reads of a single file. The reply structure of each thread is stored flat, as
+JSON encoders recurse through nested containers and fail on long chains of replies.
+"""
+
+import gzip
+import os
+from .snapshot import flatten_structure, unflatten_structure
+from .thread_files import LazyDocument
+from .tweet_json import TWEET_FIELDS, dumps, loads, project
+
+
+def _open(path, mode, compressed=None):
+    """Open a JSON lines file, which is gzipped if its name ends in `.gz`."""
+    if compressed is None:
+        compressed = path.endswith('.gz')
+    if compressed:
+        return gzip.open(path, mode)
+    return open(path, mode)
+
+
+def _map_context(thread, function):
+    """Apply a function to each context document of a thread, in place."""
+    if thread.get('wiki') is not None:
+        thread['wiki'] = function(thread['wiki'])
+    for key in ['context/urls', 'urls-content']:
+        if thread.get(key) is not None:
+            thread[key] = {name: function(document) for name, document in thread[key].items()}
+
+
+def write_jsonl(path, threads, include_context=False):
+    """
+    Write twitter threads to a JSON lines file, which is gzipped if its name ends in `.gz`.
+
+    :param path:
+        file to write to
+    :type path:
+        `str`
+    :param threads:
+        imported threads
+    :type threads:
+        iterable of `dict`
+    :param include_context:
+        `True` to inline the context documents of each thread
+    :type include_context:
+        `bool`
+    :rtype:
+        `int`
+    """
+    count = 0
+    temporary_path = '{}.tmp'.format(path)
+    try:
+        with _open(temporary_path, 'wb', compressed=path.endswith('.gz')) as jsonl:
+            for thread in threads:
+                record = dict(thread)
+                if isinstance(record.get('structure'), dict):
+                    record['structure'] = flatten_structure(record['structure'])
+                if include_context:
+                    _map_context(record, lambda document: document.read())
+                else:
+                    record.pop('wiki', None)
+                    record['context/wiki'] = None
+                    record['context/urls'] = None
+                    record['urls-content'] = None
+                jsonl.write(dumps(record))
+                jsonl.write(b'\n')
+                count += 1
+    except Exception:
+        # Leave no partial file behind, such as one cut short by a thread which fails to encode
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+    os.replace(temporary_path, path)
+    return count
+
+
+def iter_jsonl_threads(path, include_context=True, project_fields=False):
+    """
+    Read twitter threads from a JSON lines file, one at a time.
+
+    :param path:
+        file to read
+    :type path:
+        `str`
+    :param include_context:
+        `False` to skip the context documents of each thread
+    :type include_context:
+        `bool`
+    :param project_fields:
+        `True` to keep only the fields of each tweet which are used by feature extraction
+    :type project_fields:
+        `bool`
+    :rtype:
+        Generator[`dict`]
+    """
+    with _open(path, 'rb') as jsonl:
+        for line in jsonl:
+            if not line.strip():
+                continue
+
+            thread = loads(line)
+            if isinstance(thread.get('structure'), list):
+                thread['structure'] = unflatten_structure(thread['structure'])
+            if project_fields:
+                thread['source'] = project(thread['source'], TWEET_FIELDS)
+                thread['replies'] = {
+                    tweet_id: project(reply, TWEET_FIELDS)
+                    for tweet_id, reply in thread['replies'].items()
+                }
+
+            if include_context:
+                _map_context(thread, lambda document: LazyDocument(contents=document))
+            else:
+                thread.pop('wiki', None)
+                thread['context/wiki'] = None
+                thread['context/urls'] = None
+                thread['urls-content'] = None
+            yield thread
@@ -0,0 +1,256 @@
+"""
+Tracks the files of each twitter thread in a datasource, so imports can reuse threads
+which have not changed since they were last imported.
+
+A manifest maps the key of each thread, its folder relative to the datasource, to:
+
+    files    number of files in the thread
+    mtime    latest modification time of a file in the thread, in nanoseconds
+    stat     digest of the name, size and modification time of every file in the thread
+    content  digest of the name and contents of every file in the thread, or None until the
+             thread is first seen to change, as threads are imported rather than hashed
+             when they are added
+    folders  name, size and modification time of every folder in the thread, and of the
+             folder holding it, which change whenever a file is added, removed or replaced
+    paths    name, size and modification time of every file in the thread, which also
+             change when a file is edited in place
+"""
+
+import hashlib
+import os
+
+
+def _iter_thread_files(folder):
+    """Get the path relative to the thread and full path of every file in a thread, in order."""
+    for dirpath, dirnames, filenames in os.walk(folder):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            yield os.path.relpath(path, folder), path
+
+
+def get_thread_key(datasource_folder, thread_folder):
+    """
+    Get the key of a thread in a manifest.
+
+    :param datasource_folder:
+        folder of the datasource
+    :type datasource_folder:
+        `str`
+    :param thread_folder:
+        folder of the thread
+    :type thread_folder:
+        `str`
+    :rtype:
+        `str`
+    """
+    return os.path.relpath(thread_folder, datasource_folder).replace(os.sep, '/')
+
+
+def stat_thread(folder):
+    """
+    Summarize the files of a thread from their sizes and modification times.
+
+    :param folder:
+        folder of the thread
+    :type folder:
+        `str`
+    :rtype:
+        `dict`
+    """
+    digest = hashlib.sha1()
+    files = 0
+    mtime = 0
+    folders = [_stat_path(folder, os.pardir)]
+    for dirpath, dirnames, _ in os.walk(folder):
+        dirnames.sort()
+        folders.append(_stat_path(folder, os.path.relpath(dirpath, folder)))
+    paths = []
+    for name, path in _iter_thread_files(folder):
+        stat = os.stat(path)
+        digest.update('{}:{}:{}\n'.format(name, stat.st_size, stat.st_mtime_ns).encode('utf-8'))
+        paths.append((name, stat.st_size, stat.st_mtime_ns))
+        files += 1
+        mtime = max(mtime, stat.st_mtime_ns)
+    return {
+        'files': files,
+        'mtime': mtime,
+        'stat': digest.hexdigest(),
+        'content': None,
+        'folders': folders,
+        'paths': paths,
+    }
+
+
+def _stat_path(folder, name):
+    """Get the name, size and modification time of a path within a thread."""
+    stat = os.stat(os.path.join(folder, name))
+    return (name, stat.st_size, stat.st_mtime_ns)
+
+
+def is_thread_current(folder, entry, check_files=True):
+    """
+    Check that no file or folder of a thread has changed since its manifest entry was built,
+    with a stat of each path in the entry. Files which are added, removed or replaced are
+    found from the modification time of the folder holding them, and files which are edited
+    in place from their own size and modification time.
+
+    :param folder:
+        folder of the thread
+    :type folder:
+        `str`
+    :param entry:
+        manifest entry of the thread
+    :type entry:
+        `dict`
+    :param check_files:
+        `False` to only check the folders of the thread, with a few stats rather than one
+        per file, missing files which are edited in place
+    :type check_files:
+        `bool`
+    :rtype:
+        `bool`
+    """
+    if 'folders' not in entry:
+        return False
+    paths = entry['folders'] + entry['paths'] if check_files else entry['folders']
+    # Joined by hand, as this runs for every thread of a snapshot each time it is loaded
+    folder += os.sep
+    for name, size, mtime in paths:
+        try:
+            stat = os.stat(folder + name)
+        except OSError:
+            return False
+        if stat.st_size != size or stat.st_mtime_ns != mtime:
+            return False
+    return True
+
+
+def find_stale_threads(manifest, datasource_folder, check_files=True):
+    """
+    Find the threads of a manifest whose files may have changed since it was built.
+
+    :param manifest:
+        manifest of the last import
+    :type manifest:
+        `dict`
+    :param datasource_folder:
+        folder of the datasource
+    :type datasource_folder:
+        `str`
+    :param check_files:
+        `False` to only check the folders of each thread, see :func:`is_thread_current`
+    :type check_files:
+        `bool`
+    :rtype:
+        `list` of `str`
+    """
+    return [
+        key for key, entry in manifest.items()
+        if not is_thread_current(os.path.join(datasource_folder, key), entry,
+                                 check_files=check_files)
+    ]
+
+
+def latest_mtime(folder):
+    """
+    Get the latest modification time of a folder and of every file and folder within it, so
+    a file derived from the folder can be checked for changes made after it was written.
+
+    :param folder:
+        folder to check
+    :type folder:
+        `str`
+    :rtype:
+        `int` nanoseconds
+    """
+    mtime = os.stat(folder).st_mtime_ns
+    for dirpath, dirnames, filenames in os.walk(folder):
+        for name in dirnames + filenames:
+            mtime = max(mtime, os.stat(os.path.join(dirpath, name)).st_mtime_ns)
+    return mtime
+
+
+def hash_thread(folder):
+    """
+    Hash the names and contents of the files of a thread.
+
+    :param folder:
+        folder of the thread
+    :type folder:
+        `str`
+    :rtype:
+        `str`
+    """
+    digest = hashlib.sha1()
+    for name, path in _iter_thread_files(folder):
+        digest.update(name.encode('utf-8'))
+        with open(path, 'rb') as thread_file:
+            digest.update(thread_file.read())
+    return digest.hexdigest()
+
+
+def build_manifest(datasource_folder, thread_folders):
+    """
+    Summarize every thread in a datasource. Content hashes are left empty, to be filled by
+    :func:`compare_manifests` only for threads whose files appear to have changed.
+
+    :param datasource_folder:
+        folder of the datasource
+    :type datasource_folder:
+        `str`
+    :param thread_folders:
+        folders of the threads in the datasource
+    :type thread_folders:
+        `list` of `str`
+    :rtype:
+        `dict`
+    """
+    return {
+        get_thread_key(datasource_folder, thread_folder): stat_thread(thread_folder)
+        for thread_folder in thread_folders
+    }
+
+
+def compare_manifests(previous, current, datasource_folder):
+    """
+    Find the threads which were added, changed or removed between two manifests. Threads
+    whose sizes or modification times changed are hashed, and are only reported as changed
+    if their contents differ, so touched but identical threads are still reused. Added
+    threads are not hashed, as they are about to be imported, which reads every file anyway,
+    so a thread which had no hash yet is reported as changed. Content hashes are filled into
+    `current` as they are computed or carried over.
+
+    :param previous:
+        manifest of the last import
+    :type previous:
+        `dict`
+    :param current:
+        manifest of the datasource as it is now
+    :type current:
+        `dict`
+    :param datasource_folder:
+        folder of the datasource
+    :type datasource_folder:
+        `str`
+    :rtype:
+        `dict` of `str` to `list` of `str`
+    """
+    delta = {'added': [], 'changed': [], 'removed': [], 'unchanged': []}
+    for key, entry in current.items():
+        previous_entry = previous.get(key)
+        if previous_entry is None:
+            delta['added'].append(key)
+        elif previous_entry['stat'] == entry['stat']:
+            entry['content'] = previous_entry['content']
+            delta['unchanged'].append(key)
+        else:
+            entry['content'] = hash_thread(os.path.join(datasource_folder, key))
+            if previous_entry['content'] is not None and \
+                    entry['content'] == previous_entry['content']:
+                delta['unchanged'].append(key)
+            else:
+                delta['changed'].append(key)
+
+    delta['removed'] = [key for key in previous if key not in current]
+    return delta
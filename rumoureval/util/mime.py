@@ -0,0 +1,180 @@
+"""
+Detects the MIME types of context documents, sniffing their first bytes before falling back
+to libmagic, and remembers the results in a persistent index.
+
+Documents opening with an HTML doctype or tag are always reported as text/html. libmagic
+labels some of these application/javascript when a script block appears near the top (9 of
+the context documents in the training data), so those pages are now imported as context
+where they were skipped before.
+"""
+
+import json
+import os
+import magic
+
+
+# Number of bytes read from the start of a file to sniff its type
+SNIFF_LENGTH = 512
+
+# Leading bytes of common binary formats linked from tweets
+_SIGNATURES = [
+    (b'%PDF-', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'PK\x03\x04', 'application/zip'),
+]
+
+# Lower-cased openings of documents which are unambiguously HTML
+_HTML_OPENINGS = (b'<!doctype html', b'<html')
+
+
+def sniff_mime(head):
+    """
+    Determine the MIME type of a document from its first bytes, when they are unambiguous.
+    Leading whitespace and a byte order mark are skipped before looking for HTML.
+
+    :param head:
+        the first bytes of the document
+    :type head:
+        `bytes`
+    :rtype:
+        `str` or None
+    """
+    for signature, mime in _SIGNATURES:
+        if head.startswith(signature):
+            return mime
+
+    opening = head.lstrip(b'\xef\xbb\xbf \t\r\n').lower()
+    if opening.startswith(_HTML_OPENINGS):
+        return 'text/html'
+
+    return None
+
+
+def detect_file_mime(path):
+    """
+    Determine the MIME type of a file, only probing it with libmagic when its first bytes
+    are ambiguous.
+
+    :param path:
+        the file
+    :type path:
+        `str`
+    :rtype:
+        `str`
+    """
+    with open(path, 'rb') as document:
+        mime = sniff_mime(document.read(SNIFF_LENGTH))
+    return mime if mime is not None else magic.from_file(path, mime=True)
+
+
+def detect_buffer_mime(contents):
+    """
+    Determine the MIME type of the contents of a file, only probing them with libmagic
+    when their first bytes are ambiguous.
+
+    :param contents:
+        the file contents
+    :type contents:
+        `bytes`
+    :rtype:
+        `str`
+    """
+    mime = sniff_mime(contents[:SNIFF_LENGTH])
+    return mime if mime is not None else magic.from_buffer(contents, mime=True)
+
+
+class MimeIndex(object):
+    """
+    Persistent index of file paths to MIME types. Entries are keyed by path, and only reused
+    while the size and modification time of the file are unchanged.
+    """
+
+    def __init__(self, entries=None):
+        """Initialize MimeIndex.
+
+        :param entries:
+            paths mapped to their size, modification time and MIME type
+        :type entries:
+            `dict` or None
+        """
+        self._entries = entries if entries is not None else {}
+        self.added = {}
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an index from a file. Missing or unreadable files produce an empty index.
+
+        :param path:
+            index file
+        :type path:
+            `str`
+        :rtype:
+            :class:`MimeIndex`
+        """
+        if not os.path.exists(path):
+            return cls()
+
+        try:
+            with open(path) as index_file:
+                return cls(json.load(index_file))
+        except ValueError:
+            return cls()
+
+    def save(self, path):
+        """
+        Save the index to a file, if any entries were added since it was loaded.
+
+        :param path:
+            index file
+        :type path:
+            `str`
+        """
+        if not self.added:
+            return
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = '{}.tmp'.format(path)
+        with open(temporary_path, 'w') as index_file:
+            json.dump(self._entries, index_file)
+        os.replace(temporary_path, path)
+        self.added = {}
+
+    def merge(self, entries):
+        """
+        Add entries detected by another copy of the index, such as one in a worker process.
+
+        :param entries:
+            paths mapped to their size, modification time and MIME type
+        :type entries:
+            `dict`
+        """
+        self._entries.update(entries)
+        self.added.update(entries)
+
+    def mime(self, path):
+        """
+        Get the MIME type of a file, detecting it if the file is not in the index or has
+        changed since it was indexed.
+
+        :param path:
+            the file
+        :type path:
+            `str`
+        :rtype:
+            `str`
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        entry = self._entries.get(path)
+        if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2]
+
+        mime = detect_file_mime(path)
+        entry = [stat.st_size, stat.st_mtime_ns, mime]
+        self._entries[path] = entry
+        self.added[path] = entry
+        return mime
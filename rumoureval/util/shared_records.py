@@ -0,0 +1,140 @@
+"""
+Shares the values which repeat across the tweets of imported threads, so each is held once.
+
+The same accounts reply across many threads, and each reply carries its own copy of its
+user. Users are kept in a table keyed by user ID, and every tweet by a user refers to a single
+copy of each distinct version of that user. Versions are found by a hash of their fields, and
+the fields which did not change, such as the profile, are shared with the first version of the
+user, so a new version of a user whose counts changed holds little more than those counts. The
+keys of every tweet, and values such as `lang`, `source` and the users being replied to, are
+interned.
+"""
+
+import sys
+
+
+# Fields, at any level of a tweet, whose values repeat across many tweets
+INTERNED_FIELDS = frozenset([
+    'created_at',
+    'filter_level',
+    'in_reply_to_screen_name',
+    'in_reply_to_status_id_str',
+    'in_reply_to_user_id_str',
+    'iso_language_code',
+    'lang',
+    'location',
+    'result_type',
+    'screen_name',
+    'source',
+    'time_zone',
+])
+
+
+def freeze(value):
+    """
+    Convert a JSON value into a hashable value, which is equal for equal JSON values.
+
+    :param value:
+        a JSON value
+    :type value:
+        `dict`, `list`, `str`, `int`, `float`, `bool` or None
+    :rtype:
+        `frozenset`, `tuple`, or `value` itself
+    """
+    if isinstance(value, dict):
+        return frozenset((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class SharedRecords(object):
+    """Table of users and interned strings shared by the tweets of a set of threads."""
+
+    def __init__(self):
+        """Initialize SharedRecords."""
+        self.users = {}
+
+    def count_versions(self):
+        """
+        Count the distinct versions of every user in the table.
+
+        :rtype:
+            `int`
+        """
+        return sum(len(users) for versions in self.users.values() for users in versions.values())
+
+    def share_thread(self, thread):
+        """
+        Replace the tweets of a thread, in place, with copies that share users and strings
+        with every other thread shared through this table.
+
+        :param thread:
+            A single Twitter thread
+        :type thread:
+            `dict`
+        :rtype:
+            `dict`
+        """
+        if thread.get('source') is not None:
+            thread['source'] = self._share(thread['source'])
+        thread['replies'] = {sys.intern(tweet_id): self._share(tweet)
+                             for tweet_id, tweet in thread['replies'].items()}
+        return thread
+
+    def _share(self, value):
+        """Copy a JSON value with its keys and repeated fields interned."""
+        if isinstance(value, dict):
+            return {sys.intern(key): self._share_field(key, field)
+                    for key, field in value.items()}
+        if isinstance(value, list):
+            return [self._share(item) for item in value]
+        return value
+
+    def _share_field(self, key, value):
+        """Copy a field of a JSON object, sharing users and interning repeated values."""
+        if key == 'user' and isinstance(value, dict) and 'id_str' in value:
+            return self._share_user(value)
+        if key in INTERNED_FIELDS and isinstance(value, str):
+            return sys.intern(value)
+        return self._share(value)
+
+    def _share_user(self, value):
+        """
+        Get the shared copy of a version of a user. Users change their profiles and counts
+        between tweets, so each distinct version has its own copy, found by its hash.
+        """
+        versions = self.users.setdefault(value['id_str'], {})
+        users = versions.setdefault(hash(freeze(value)), [])
+        for user in users:
+            if user == value:
+                return user
+
+        # Fields which are unchanged since the first version are shared with it
+        first_users = next(iter(versions.values()))
+        first = first_users[0] if first_users else None
+        user = {}
+        for key, field in value.items():
+            if first is not None and key in first and first[key] == field:
+                user[sys.intern(key)] = first[key]
+            else:
+                user[sys.intern(key)] = self._share_field(key, field)
+        users.append(user)
+        return user
+
+
+def share_records(threads):
+    """
+    Share users and repeated strings across the tweets of a set of threads, in place.
+
+    :param threads:
+        imported threads
+    :type threads:
+        `list` of `dict`
+    :rtype:
+        :class:`SharedRecords`
+    """
+    records = SharedRecords()
+    for thread in threads:
+        records.share_thread(thread)
+    return records
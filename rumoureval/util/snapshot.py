@@ -0,0 +1,370 @@
+"""
+Packs an imported datasource into a single file which later runs memory-map instead of re-parsing.
+
+A snapshot is laid out as:
+
+    magic (8 bytes)
+    header length (8 bytes, little endian)
+    header (pickled `dict` of fingerprint, thread folders and record offsets)
+    records (one pickled record per thread, followed by the annotations and manifest)
+
+The header holds the folders of each thread from the manifest, which are checked on every
+load, while the full manifest is only unpickled when it is read.
+
+Each thread record is stored under a key, so an update of the snapshot can copy the packed
+records of unchanged threads without unpacking them. The reply structure of each thread is
+packed as a flat list of nodes, since pickle recurses through nested containers and fails on
+long chains of replies.
+
+Records are only unpickled when they are read, so a snapshot can be streamed one thread at
+a time. The mapping only spares a copy of the packed bytes: each process loading a snapshot
+unpickles its own copy of every thread it reads, and only the packed file is shared between
+processes through the page cache.
+"""
+
+import gc
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+from collections import deque
+
+
+SNAPSHOT_MAGIC = b'RESNAP01'
+SNAPSHOT_VERSION = 5
+_HEADER_LENGTH = struct.Struct('<Q')
+
+
+def fingerprint_folders(folders, options=None):
+    """
+    Fingerprint the contents of a set of folders from the modification time and size of the
+    entries directly within them, without walking any deeper. Files, such as archives, are
+    fingerprinted from their own modification time and size.
+
+    The modification time of a folder changes whenever an entry is added, removed or
+    replaced, so for data laid out as `<event>/<thread>`, a new or removed thread changes
+    the fingerprint. Changes within threads are found from the manifest of a snapshot
+    instead, see :func:`rumoureval.util.manifest.find_stale_threads`.
+
+    :param folders:
+        folders or files to fingerprint. Paths which do not exist are skipped
+    :type folders:
+        `list` of `str`
+    :param options:
+        additional values which should invalidate the fingerprint when they change
+    :type options:
+        `tuple` or None
+    :rtype:
+        `str`
+    """
+    digest = hashlib.sha1()
+    digest.update(repr((SNAPSHOT_VERSION, options)).encode('utf-8'))
+    for folder in folders:
+        if not os.path.exists(folder):
+            continue
+
+        if os.path.isfile(folder):
+            stat = os.stat(folder)
+            digest.update('{}:{}:{}\n'.format(os.path.basename(folder),
+                                              stat.st_mtime_ns,
+                                              stat.st_size).encode('utf-8'))
+            continue
+
+        digest.update('{}\n'.format(os.stat(folder).st_mtime_ns).encode('utf-8'))
+        for filename in sorted(os.listdir(folder)):
+            stat = os.stat(os.path.join(folder, filename))
+            digest.update('{}:{}:{}\n'.format(filename,
+                                              stat.st_mtime_ns,
+                                              stat.st_size).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def flatten_structure(structure):
+    """
+    Flatten the nested reply structure of a thread, breadth first, without recursing.
+
+    :param structure:
+        reply structure, mapping the ID of each tweet to the structure of its replies, or to
+        a list when it has none
+    :type structure:
+        `dict`
+    :rtype:
+        `list` of `tuple` of the index of the parent node (-1 at the top level), the tweet
+        ID, and the value of a tweet without replies, or an empty `dict` for a tweet with
+        replies, which are held by later nodes
+    """
+    nodes = []
+    queue = deque([(-1, structure)])
+    while queue:
+        parent, replies = queue.popleft()
+        for tweet_id, value in replies.items():
+            if isinstance(value, dict):
+                queue.append((len(nodes), value))
+                nodes.append((parent, tweet_id, {}))
+            else:
+                nodes.append((parent, tweet_id, value))
+    return nodes
+
+
+def unflatten_structure(nodes):
+    """
+    Rebuild the nested reply structure of a thread from :func:`flatten_structure`.
+
+    :param nodes:
+        flattened structure
+    :type nodes:
+        `list` of `tuple`
+    :rtype:
+        `dict`
+    """
+    structure = {}
+    values = []
+    for parent, tweet_id, value in nodes:
+        if isinstance(value, dict):
+            value = {}
+        (values[parent] if parent >= 0 else structure)[tweet_id] = value
+        values.append(value)
+    return structure
+
+
+class _FlatStructure(object):
+    """
+    A reply structure which is pickled flat, and unpickled back into nested containers.
+    """
+    # pylint:disable=too-few-public-methods
+
+    def __init__(self, structure):
+        self.structure = structure
+
+    def __reduce__(self):
+        return unflatten_structure, (flatten_structure(self.structure),)
+
+
+def pack_record(record):
+    """
+    Pack a record for a snapshot. The reply structure of a thread is packed flat, and is
+    nested again when the record is unpickled.
+
+    :param record:
+        the record
+    :type record:
+        `dict`
+    :rtype:
+        `bytes`
+    """
+    if isinstance(record, dict) and isinstance(record.get('structure'), dict):
+        record = dict(record, structure=_FlatStructure(record['structure']))
+    return pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def write_snapshot(path, fingerprint, records, annotations=None, manifest=None):
+    """
+    Pack imported threads and their annotations into a snapshot file.
+
+    :param path:
+        file to write the snapshot to
+    :type path:
+        `str`
+    :param fingerprint:
+        fingerprint of the data the snapshot was built from
+    :type fingerprint:
+        `str`
+    :param records:
+        key of each thread, with the thread packed by :func:`pack_record`
+    :type records:
+        `list` of `tuple` of `str` and `bytes`
+    :param annotations:
+        imported annotations, if any
+    :type annotations:
+        `tuple` of `dict` or None
+    :param manifest:
+        manifest of the threads the snapshot was built from, if any
+    :type manifest:
+        `dict` or None
+    """
+    annotation_record = pack_record(annotations)
+    manifest_record = pack_record(manifest)
+
+    # Offsets depend on the header length, and the header length depends on the offsets,
+    # so offsets are stored relative to the end of the header
+    offsets = []
+    position = 0
+    for key, record in records:
+        offsets.append((key, position, len(record)))
+        position += len(record)
+
+    folders = None
+    if manifest is not None:
+        folders = {key: {'folders': entry['folders']} for key, entry in manifest.items()}
+    header = pack_record({
+        'version': SNAPSHOT_VERSION,
+        'fingerprint': fingerprint,
+        'folders': folders,
+        'threads': offsets,
+        'annotations': (position, len(annotation_record)),
+        'manifest': (position + len(annotation_record), len(manifest_record)),
+    })
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = '{}.tmp'.format(path)
+    with open(temporary_path, 'wb') as snapshot:
+        snapshot.write(SNAPSHOT_MAGIC)
+        snapshot.write(_HEADER_LENGTH.pack(len(header)))
+        snapshot.write(header)
+        for _, record in records:
+            snapshot.write(record)
+        snapshot.write(annotation_record)
+        snapshot.write(manifest_record)
+
+    # Replace atomically so concurrent readers never map a partially written snapshot
+    os.replace(temporary_path, path)
+
+
+class Snapshot(object):
+    """A memory-mapped snapshot of an imported datasource."""
+
+    def __init__(self, path):
+        """Map a snapshot file.
+
+        :param path:
+            snapshot file
+        :type path:
+            `str`
+        """
+        with open(path, 'rb') as snapshot:
+            self._map = mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._map[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            self._map.close()
+            raise ValueError('Not a snapshot file: {}'.format(path))
+
+        header_start = len(SNAPSHOT_MAGIC) + _HEADER_LENGTH.size
+        header_length = _HEADER_LENGTH.unpack_from(self._map, len(SNAPSHOT_MAGIC))[0]
+        self._records_start = header_start + header_length
+        self._header = pickle.loads(self._map[header_start:self._records_start])
+        if not isinstance(self._header, dict) or \
+                self._header.get('version') != SNAPSHOT_VERSION:
+            self._map.close()
+            raise ValueError('Unsupported snapshot version: {}'.format(path))
+
+    @property
+    def fingerprint(self):
+        """Fingerprint of the data the snapshot was built from.
+
+        :rtype:
+            `str`
+        """
+        return self._header['fingerprint']
+
+    @property
+    def manifest(self):
+        """Manifest of the threads the snapshot was built from, if any.
+
+        :rtype:
+            `dict` or None
+        """
+        return self._record(*self._header['manifest'])
+
+    @property
+    def folder_manifest(self):
+        """
+        Manifest of the threads the snapshot was built from, if any, holding only the folders
+        of each thread, see :func:`rumoureval.util.manifest.is_thread_current`.
+
+        :rtype:
+            `dict` or None
+        """
+        return self._header['folders']
+
+    def __len__(self):
+        return len(self._header['threads'])
+
+    def _packed_record(self, offset, length):
+        start = self._records_start + offset
+        return self._map[start:start + length]
+
+    def _record(self, offset, length):
+        return pickle.loads(self._packed_record(offset, length))
+
+    def packed_threads(self):
+        """
+        Get the key and packed record of each thread in the snapshot, without unpacking them.
+
+        :rtype:
+            `dict` of `str` to `bytes`
+        """
+        return {
+            key: self._packed_record(offset, length)
+            for key, offset, length in self._header['threads']
+        }
+
+    def threads(self):
+        """
+        Get the threads in the snapshot, unpacking each as it is reached.
+
+        :rtype:
+            Generator[`dict`]
+        """
+        for _, offset, length in self._header['threads']:
+            yield self._record(offset, length)
+
+    def load_threads(self):
+        """
+        Get every thread in the snapshot.
+
+        :rtype:
+            `list` of `dict`
+        """
+        # Unpacking allocates many small containers at once, none of which can be part
+        # of a reference cycle yet, so pause garbage collection rather than rescanning them
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return list(self.threads())
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def annotations(self):
+        """
+        Get the annotations in the snapshot.
+
+        :rtype:
+            `tuple` of `dict` or None
+        """
+        return self._record(*self._header['annotations'])
+
+    def close(self):
+        """Unmap the snapshot."""
+        self._map.close()
+
+
+def load_snapshot(path, fingerprint=None):
+    """
+    Map a snapshot file, if it exists and matches the expected fingerprint.
+
+    :param path:
+        snapshot file
+    :type path:
+        `str`
+    :param fingerprint:
+        fingerprint of the current data, or `None` to map the snapshot even if it is stale
+    :type fingerprint:
+        `str` or None
+    :rtype:
+        :class:`Snapshot` or None
+    """
+    if not os.path.exists(path):
+        return None
+
+    try:
+        snapshot = Snapshot(path)
+    except (ValueError, pickle.UnpicklingError, struct.error, EOFError):
+        return None
+
+    if fingerprint is not None and snapshot.fingerprint != fingerprint:
+        snapshot.close()
+        return None
+
+    return snapshot
@@ -0,0 +1,256 @@
+"""
+Imports data sources through packed snapshots, which are rebuilt from the threads which
+changed since they were last built.
+"""
+
+import logging
+import os
+from .lists import filter_none
+from .datasource import (
+    FIND_JSONL, get_datasource_archive, get_datasource_jsonl, get_datasource_path,
+    get_snapshot_path
+)
+from .manifest import build_manifest, compare_manifests, find_stale_threads, get_thread_key
+from .snapshot import fingerprint_folders, load_snapshot, pack_record, write_snapshot
+from .thread_import import (
+    find_thread_folders, import_datasource_threads, import_threads, read_annotation_data
+)
+
+
+LOGGER = logging.getLogger()
+
+
+def get_datasource_fingerprint(datasource, jsonl=FIND_JSONL):
+    """
+    Fingerprint the tweet and annotation folders and archives of a data source,
+    to detect stale snapshots.
+
+    :param datasource:
+        source of data
+    :type datasource:
+        either 'dev', 'train', or 'test'
+    :param jsonl:
+        JSON lines file of the data source, as found by :func:`get_datasource_jsonl`
+    :type jsonl:
+        `str` or None
+    :rtype:
+        `str`
+    """
+    if jsonl is FIND_JSONL:
+        jsonl = get_datasource_jsonl(datasource)
+    return fingerprint_folders(filter_none([
+        jsonl,
+        get_datasource_path(datasource),
+        get_datasource_path(datasource, annotations=True),
+        get_datasource_archive(datasource),
+        get_datasource_archive(datasource, annotations=True),
+    ]))
+
+
+def load_current_snapshot(datasource, include_context=True, project_fields=False,
+                          jsonl=FIND_JSONL, fingerprint=None, check_files=True):
+    """
+    Maps the packed snapshot of a data source, if it is up to date. The snapshot of an
+    extracted data source is also checked against the size and modification time of the
+    folders and files of each thread in its manifest, since a file added to, removed from or
+    edited in a thread does not change the fingerprint.
+
+    :param datasource:
+        source of data
+    :type datasource:
+        either 'dev', 'train', or 'test'
+    :param include_context:
+        `False` for the snapshot of the data source without context documents
+    :type include_context:
+        `bool`
+    :param project_fields:
+        `True` for the snapshot of the data source with projected tweets
+    :type project_fields:
+        `bool`
+    :param jsonl:
+        JSON lines file of the data source, as found by :func:`get_datasource_jsonl`
+    :type jsonl:
+        `str` or None
+    :param fingerprint:
+        fingerprint of the data source, as found by :func:`get_datasource_fingerprint`.
+        Defaults to fingerprinting the data source
+    :type fingerprint:
+        `str` or None
+    :param check_files:
+        `False` to only check the folders of each thread, with a few stats per thread rather
+        than one per file. Files edited in place leave their folder unchanged, so they are
+        then only found by :func:`get_datasource_delta`
+    :type check_files:
+        `bool`
+    :rtype:
+        :class:`Snapshot` or None
+    """
+    # pylint:disable=too-many-arguments
+    if fingerprint is None:
+        fingerprint = get_datasource_fingerprint(datasource, jsonl=jsonl)
+    snapshot = load_snapshot(get_snapshot_path(datasource,
+                                               include_context=include_context,
+                                               project_fields=project_fields),
+                             fingerprint)
+    if snapshot is None or snapshot.folder_manifest is None:
+        return snapshot
+
+    manifest = snapshot.manifest if check_files else snapshot.folder_manifest
+    stale = find_stale_threads(manifest, get_datasource_path(datasource),
+                               check_files=check_files)
+    if stale:
+        LOGGER.debug('Snapshot of `%s` data is stale, %d threads may have changed',
+                     datasource, len(stale))
+        snapshot.close()
+        return None
+    return snapshot
+
+
+def import_snapshot(datasource, workers=None, include_context=True, project_fields=False,
+                    async_reads=None, jsonl=FIND_JSONL, check_files=True):
+    """
+    Maps the packed snapshot of a data source, building it first if it is missing or stale.
+
+    :param datasource:
+        source of data to import
+    :type datasource:
+        either 'dev', 'train', or 'test'
+    :param workers:
+        number of processes to import threads with if the snapshot must be rebuilt
+    :type workers:
+        `int` or None
+    :param include_context:
+        `False` to snapshot the data source without context documents
+    :type include_context:
+        `bool`
+    :param project_fields:
+        `True` to snapshot the data source with projected tweets
+    :type project_fields:
+        `bool`
+    :param async_reads:
+        maximum number of files to read at once with asyncio if threads must be imported
+    :type async_reads:
+        `int` or None
+    :param jsonl:
+        JSON lines file of the data source, as found by :func:`get_datasource_jsonl`
+    :type jsonl:
+        `str` or None
+    :param check_files:
+        `False` to only check the folders of each thread of the snapshot's manifest, missing
+        threads with files edited in place, see :func:`load_current_snapshot`
+    :type check_files:
+        `bool`
+    :rtype:
+        :class:`Snapshot`
+    """
+    # pylint:disable=too-many-arguments,too-many-locals
+    if jsonl is FIND_JSONL:
+        jsonl = get_datasource_jsonl(datasource)
+    fingerprint = get_datasource_fingerprint(datasource, jsonl=jsonl)
+    snapshot_path = get_snapshot_path(datasource,
+                                      include_context=include_context,
+                                      project_fields=project_fields)
+    snapshot = load_current_snapshot(datasource,
+                                     include_context=include_context,
+                                     project_fields=project_fields,
+                                     jsonl=jsonl,
+                                     fingerprint=fingerprint,
+                                     check_files=check_files)
+    if snapshot is not None:
+        LOGGER.debug('Using snapshot of `%s` data', datasource)
+        return snapshot
+
+    folder = get_datasource_path(datasource)
+    manifest = None
+    if jsonl is None and os.path.isdir(folder):
+        # Only threads added or changed since the last snapshot are imported
+        previous = load_snapshot(snapshot_path)
+        packed_threads = {}
+        previous_manifest = {}
+        if previous is not None:
+            packed_threads = previous.packed_threads()
+            previous_manifest = previous.manifest or {}
+        thread_folders = find_thread_folders(folder)
+        manifest = build_manifest(folder, thread_folders)
+        delta = compare_manifests(previous_manifest, manifest, folder)
+        reused = set(key for key in delta['unchanged'] if key in packed_threads)
+        LOGGER.debug('Updating snapshot of `%s` data: %d added, %d changed, %d removed threads',
+                     datasource, len(delta['added']), len(delta['changed']), len(delta['removed']))
+
+        keys = [get_thread_key(folder, thread_folder) for thread_folder in thread_folders]
+        imported = iter(import_threads(
+            [thread_folder for key, thread_folder in zip(keys, thread_folders)
+             if key not in reused],
+            workers=workers,
+            include_context=include_context,
+            project_fields=project_fields,
+            async_reads=async_reads
+        ))
+        records = [
+            (key, packed_threads[key] if key in reused else pack_record(next(imported)))
+            for key in keys
+        ]
+    else:
+        LOGGER.debug('Building snapshot of `%s` data', datasource)
+        previous = None
+        records = [
+            (str(i), pack_record(thread)) for i, thread in enumerate(
+                import_datasource_threads(datasource,
+                                          workers=workers,
+                                          include_context=include_context,
+                                          project_fields=project_fields,
+                                          async_reads=async_reads,
+                                          jsonl=jsonl) or [])
+        ]
+
+    annotations = None
+    if os.path.exists(get_datasource_path(datasource, annotations=True)) or \
+            get_datasource_archive(datasource, annotations=True) is not None:
+        annotations = read_annotation_data(datasource)
+    write_snapshot(snapshot_path, fingerprint, records, annotations, manifest=manifest)
+    if previous is not None:
+        previous.close()
+    return load_snapshot(snapshot_path, fingerprint)
+
+
+def get_datasource_delta(datasource, include_context=True, project_fields=False,
+                         jsonl=FIND_JSONL):
+    """
+    Finds the threads of an extracted data source which were added, changed or removed
+    since its snapshot was last built.
+
+    :param datasource:
+        source of data
+    :type datasource:
+        either 'dev', 'train', or 'test'
+    :param include_context:
+        `False` to compare against the snapshot without context documents
+    :type include_context:
+        `bool`
+    :param project_fields:
+        `True` to compare against the snapshot with projected tweets
+    :type project_fields:
+        `bool`
+    :param jsonl:
+        JSON lines file of the data source, as found by :func:`get_datasource_jsonl`
+    :type jsonl:
+        `str` or None
+    :rtype:
+        `dict` of `str` to `list` of `str`, or None if the data source is not extracted, or
+        is read from a JSON lines file
+    """
+    if jsonl is FIND_JSONL:
+        jsonl = get_datasource_jsonl(datasource)
+    folder = get_datasource_path(datasource)
+    if jsonl is not None or not os.path.isdir(folder):
+        return None
+
+    previous = load_snapshot(get_snapshot_path(datasource,
+                                               include_context=include_context,
+                                               project_fields=project_fields))
+    previous_manifest = {}
+    if previous is not None:
+        previous_manifest = previous.manifest or {}
+        previous.close()
+    manifest = build_manifest(folder, find_thread_folders(folder))
+    return compare_manifests(previous_manifest, manifest, folder)
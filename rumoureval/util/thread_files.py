@@ -0,0 +1,386 @@
+"""
+Provides access to the files of a twitter thread, whether extracted into a folder or
+stored in a compressed archive.
+"""
+
+import io
+import os
+import tarfile
+import zipfile
+from .mime import detect_buffer_mime, detect_file_mime
+from .tweet_json import loads, loads_tweet
+
+
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.bz2', '.gz')
+
+# Files and folders which only appear at the root of a twitter thread
+_THREAD_ENTRIES = frozenset([
+    'structure.json', 'urls.dat', 'source-tweet', 'replies', 'context', 'urls-content'
+])
+
+
+def get_thread_event(name):
+    """
+    Get the event of a twitter thread, the folder its thread folder is in.
+
+    :param name:
+        path of the thread folder, on disk or within an archive
+    :type name:
+        `str`
+    :rtype:
+        `str` or None
+    """
+    parts = [part for part in name.replace(os.sep, '/').split('/') if part]
+    return parts[-2] if len(parts) >= 2 else None
+
+
+def decode_text(contents):
+    """
+    Decode file contents as text mode `open` does, translating line endings.
+
+    :param contents:
+        file contents
+    :type contents:
+        `bytes`
+    :rtype:
+        `str`
+    """
+    return io.TextIOWrapper(io.BytesIO(contents), 'utf-8').read()
+
+
+class LazyDocument(object):
+    """A context document of a twitter thread, which is only read when accessed."""
+
+    def __init__(self, path=None, contents=None):
+        """Initialize LazyDocument.
+
+        :param path:
+            file the document is read from
+        :type path:
+            `str` or None
+        :param contents:
+            raw contents of the document, if it was already read out of an archive, or its
+            text, if it was already decoded
+        :type contents:
+            `bytes`, `str` or None
+        """
+        self.path = path
+        self._contents = contents
+
+    def read(self):
+        """
+        Read the document. The result is not kept, so each call reads the document again.
+
+        :rtype:
+            `str`
+        """
+        if isinstance(self._contents, str):
+            return self._contents
+        if self._contents is not None:
+            return decode_text(self._contents)
+        with open(self.path) as document:
+            return document.read()
+
+    def __str__(self):
+        return self.read()
+
+
+class ThreadFolder(object):
+    """Files of a twitter thread extracted into a folder."""
+
+    def __init__(self, folder, mime_index=None):
+        """Initialize ThreadFolder.
+
+        :param folder:
+            root folder of the thread
+        :type folder:
+            `str`
+        :param mime_index:
+            index of previously detected MIME types
+        :type mime_index:
+            :class:`MimeIndex` or None
+        """
+        self.name = folder
+        self._mime_index = mime_index
+
+    def _path(self, parts):
+        return os.path.join(self.name, *parts)
+
+    def exists(self, *parts):
+        """
+        Check if a file or folder exists in the thread.
+
+        :rtype:
+            `bool`
+        """
+        return os.path.exists(self._path(parts))
+
+    def listdir(self, *parts):
+        """
+        List the names of the entries in a folder of the thread.
+
+        :rtype:
+            `list` of `str`
+        """
+        return os.listdir(self._path(parts))
+
+    def read(self, *parts):
+        """
+        Read the contents of a file in the thread.
+
+        :rtype:
+            `str`
+        """
+        with open(self._path(parts)) as thread_file:
+            return thread_file.read()
+
+    def document(self, *parts):
+        """
+        Get a handle to a file in the thread, which is read when accessed.
+
+        :rtype:
+            :class:`LazyDocument`
+        """
+        return LazyDocument(path=self._path(parts))
+
+    def load_json(self, *parts):
+        """
+        Decode a JSON file in the thread.
+
+        :rtype:
+            json
+        """
+        with open(self._path(parts), 'rb') as thread_file:
+            return loads(thread_file.read())
+
+    def load_tweet(self, *parts, project_fields=False):
+        """
+        Decode a tweet JSON file in the thread.
+
+        :param project_fields:
+            `True` to keep only the fields used by feature extraction
+        :type project_fields:
+            `bool`
+        :rtype:
+            `dict`
+        """
+        with open(self._path(parts), 'rb') as thread_file:
+            return loads_tweet(thread_file.read(), project_fields=project_fields)
+
+    def mime(self, *parts):
+        """
+        Get the MIME type of a file in the thread.
+
+        :rtype:
+            `str`
+        """
+        if self._mime_index is not None:
+            return self._mime_index.mime(self._path(parts))
+        return detect_file_mime(self._path(parts))
+
+
+class ArchiveThread(object):
+    """Files of a twitter thread read out of an archive."""
+
+    def __init__(self, name, files):
+        """Initialize ArchiveThread.
+
+        :param name:
+            path of the thread root within the archive
+        :type name:
+            `str`
+        :param files:
+            paths relative to the thread root, mapped to their contents
+        :type files:
+            `dict` of `str` to `bytes`
+        """
+        self.name = name
+        self._files = files
+
+    def exists(self, *parts):
+        """
+        Check if a file or folder exists in the thread.
+
+        :rtype:
+            `bool`
+        """
+        path = '/'.join(parts)
+        return path in self._files or any(name.startswith(path + '/') for name in self._files)
+
+    def listdir(self, *parts):
+        """
+        List the names of the files in a folder of the thread.
+
+        :rtype:
+            `list` of `str`
+        """
+        prefix = '/'.join(parts) + '/'
+        return [name[len(prefix):] for name in self._files
+                if name.startswith(prefix) and '/' not in name[len(prefix):]]
+
+    def read(self, *parts):
+        """
+        Read the contents of a file in the thread.
+
+        :rtype:
+            `str`
+        """
+        return decode_text(self._files['/'.join(parts)])
+
+    def document(self, *parts):
+        """
+        Get a handle to a file in the thread, which is decoded when accessed.
+
+        :rtype:
+            :class:`LazyDocument`
+        """
+        return LazyDocument(contents=self._files['/'.join(parts)])
+
+    def load_json(self, *parts):
+        """
+        Decode a JSON file in the thread.
+
+        :rtype:
+            json
+        """
+        return loads(self._files['/'.join(parts)])
+
+    def load_tweet(self, *parts, project_fields=False):
+        """
+        Decode a tweet JSON file in the thread.
+
+        :param project_fields:
+            `True` to keep only the fields used by feature extraction
+        :type project_fields:
+            `bool`
+        :rtype:
+            `dict`
+        """
+        return loads_tweet(self._files['/'.join(parts)], project_fields=project_fields)
+
+    def mime(self, *parts):
+        """
+        Get the MIME type of a file in the thread.
+
+        :rtype:
+            `str`
+        """
+        return detect_buffer_mime(self._files['/'.join(parts)])
+
+
+def find_archive(folder, names):
+    """
+    Find an archive in a folder, by its name without an extension.
+
+    :param folder:
+        folder containing archives
+    :type folder:
+        `str`
+    :param names:
+        names the archive may have, in order of preference
+    :type names:
+        `list` of `str`
+    :rtype:
+        `str` or None
+    """
+    for name in names:
+        for extension in ARCHIVE_EXTENSIONS:
+            path = os.path.join(folder, name + extension)
+            if os.path.isfile(path):
+                return path
+    return None
+
+
+def iter_archive_files(path):
+    """
+    Read the files in a tar or zip archive, without extracting it. Tar archives are streamed,
+    so each member is decompressed once, in archive order.
+
+    :param path:
+        archive file
+    :type path:
+        `str`
+    :rtype:
+        Generator[`tuple` of `str` and `bytes`]
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.filename.endswith('/'):
+                    yield info.filename, archive.read(info)
+        return
+
+    with tarfile.open(path, 'r|*') as archive:
+        for member in archive:
+            if member.isfile():
+                yield member.name, archive.extractfile(member).read()
+
+
+def _split_thread_path(path):
+    """
+    Split the path of an archive member into the root of the thread containing it and
+    its path relative to that root.
+
+    :rtype:
+        `tuple` of `str` or None
+    """
+    parts = path.split('/')
+    for i, part in enumerate(parts):
+        if part in _THREAD_ENTRIES:
+            return '/'.join(parts[:i]), '/'.join(parts[i:])
+    return None
+
+
+def iter_archive_threads(path):
+    """
+    Read the twitter threads in an archive, one thread at a time. The files of each
+    thread are expected to be stored together, as `tar` and `zip` store folders.
+
+    :param path:
+        archive file
+    :type path:
+        `str`
+    :rtype:
+        Generator[:class:`ArchiveThread`]
+    """
+    root = None
+    files = {}
+    for name, contents in iter_archive_files(path):
+        split = _split_thread_path(name)
+        if split is None:
+            continue
+
+        if split[0] != root:
+            if 'structure.json' in files:
+                yield ArchiveThread(root, files)
+            root = split[0]
+            files = {}
+        files[split[1]] = contents
+
+    if 'structure.json' in files:
+        yield ArchiveThread(root, files)
+
+
+def read_archive_annotations(path):
+    """
+    Read the task A and task B annotations in an archive. Annotation files are found by the
+    prefixes `subtaskA` and `subtaskB`, since archived names may carry a datasource suffix.
+
+    :param path:
+        archive file
+    :type path:
+        `str`
+    :rtype:
+        `tuple` of `dict`
+    """
+    task_a_annotations = {}
+    task_b_annotations = {}
+    for name, contents in iter_archive_files(path):
+        filename = name.split('/')[-1]
+        if not filename.endswith('.json'):
+            continue
+        if filename.startswith('subtaskA'):
+            task_a_annotations = loads(contents)
+        elif filename.startswith('subtaskB'):
+            task_b_annotations = loads(contents)
+    return task_a_annotations, task_b_annotations
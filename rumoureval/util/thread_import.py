@@ -0,0 +1,474 @@
+"""
+Imports the raw threads of a data source from its JSON lines file, its extracted folder or
+its archive.
+"""
+
+import logging
+import json
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from .lists import filter_none
+from .mime import MimeIndex
+from .async_reader import prefetch_threads
+from .datasource import (
+    FIND_JSONL, get_datasource_archive, get_datasource_jsonl, get_datasource_path,
+    get_mime_index_path
+)
+from .jsonl import iter_jsonl_threads, write_jsonl
+from .snapshot import pack_record
+from .thread_files import (
+    ThreadFolder, get_thread_event, iter_archive_threads, read_archive_annotations
+)
+
+
+LOGGER = logging.getLogger()
+
+
+def import_thread(folder, include_context=True, mime_index=None, project_fields=False):
+    """
+    Imports a single twitter thread following a specific structure into a `dict`.
+    Assumes the following structure:
+
+    folder
+    |- structure.json
+    |- urls.dat
+    |- source-tweet
+        |- <tweet_id>.json
+    |- replies
+        |- <tweet_id>.json
+        |- ...
+    |- context
+        |- wikipedia
+        |- urls
+            |- <url_md5>
+            |- ...
+
+    Context documents are imported as :class:`LazyDocument` handles, which are only read
+    when accessed.
+
+    :param folder:
+        folder name to retrieve source tweet from, or the files of a thread read from an archive
+    :type folder:
+        `str` or :class:`ArchiveThread`
+    :param include_context:
+        `False` to skip the context documents of the thread entirely
+    :type include_context:
+        `bool`
+    :param mime_index:
+        index of previously detected MIME types, consulted before detecting the type of
+        each context document in a folder
+    :type mime_index:
+        :class:`MimeIndex` or None
+    :param project_fields:
+        `True` to keep only the fields of each tweet which are used by feature extraction
+    :type project_fields:
+        `bool`
+    :rtype:
+        `dict`
+    """
+    # pylint:disable=too-many-branches
+    thread = {}
+    files = ThreadFolder(folder, mime_index=mime_index) if isinstance(folder, str) else folder
+    thread['event'] = get_thread_event(files.name)
+
+    if files.exists('structure.json'):
+        thread['structure'] = files.load_json('structure.json')
+
+    if files.exists('urls.dat'):
+        thread['urls'] = []
+        for line in files.read('urls.dat').splitlines():
+            raw_url = line.split()
+            url = {
+                'hash': raw_url[0],
+                'short': raw_url[1],
+                'full': raw_url[2],
+            }
+            thread['urls'].append(url)
+
+    if files.exists('source-tweet'):
+        for child in files.listdir('source-tweet'):
+            thread['source'] = files.load_tweet('source-tweet', child,
+                                                project_fields=project_fields)
+
+    thread['replies'] = {}
+    if files.exists('replies'):
+        for child in files.listdir('replies'):
+            reply_tweet = files.load_tweet('replies', child, project_fields=project_fields)
+            thread['replies'][reply_tweet['id_str']] = reply_tweet
+
+    if not include_context:
+        thread['context/wiki'] = None
+        thread['context/urls'] = None
+        thread['urls-content'] = None
+        return thread
+
+    if files.exists('context', 'wikipedia'):
+        thread['wiki'] = files.document('context', 'wikipedia')
+    else:
+        thread['context/wiki'] = None
+
+    if files.exists('context', 'urls'):
+        thread['context/urls'] = {}
+        for child in files.listdir('context', 'urls'):
+            if files.mime('context', 'urls', child) != 'text/html':
+                continue
+            thread['context/urls'][child] = files.document('context', 'urls', child)
+    else:
+        thread['context/urls'] = None
+
+    if files.exists('urls-content'):
+        thread['urls-content'] = {}
+        for child in files.listdir('urls-content'):
+            thread['urls-content'][child] = files.document('urls-content', child)
+    else:
+        thread['urls-content'] = None
+
+    return thread
+
+
+def _import_thread_job(folder, include_context=True, mime_index=None, project_fields=False,
+                       packed=False):
+    """
+    Imports a single twitter thread, along with the MIME types detected while importing it,
+    so detections made in worker processes can be merged into the parent's index. Threads
+    imported by worker processes are packed by :func:`pack_record`, since pickling their
+    reply structure directly fails on long chains of replies.
+
+    :rtype:
+        `tuple` of `dict` or `bytes`, and `dict`
+    """
+    thread = import_thread(folder,
+                           include_context=include_context,
+                           mime_index=mime_index,
+                           project_fields=project_fields)
+    if packed:
+        thread = pack_record(thread)
+    return thread, mime_index.added if mime_index is not None else {}
+
+
+def find_thread_folders(folder):
+    """
+    Finds the root folder of each twitter thread within the given folder, recursively.
+
+    :param folder:
+        folder name to search for threads
+    :type folder:
+        `str`
+    :rtype:
+        `list` of `str`
+    """
+    if not os.path.isdir(folder):
+        return []
+
+    children = os.listdir(folder)
+    if 'structure.json' in children:
+        # This is the root of a twitter thread
+        return [folder]
+
+    thread_folders = []
+    for child in children:
+        thread_folders += find_thread_folders(os.path.join(folder, child))
+    return thread_folders
+
+
+def import_tweet_data(folder, workers=None, include_context=True, project_fields=False,
+                      async_reads=None):
+    """
+    Imports raw tweet data from the given folder, recursively.
+
+    :param folder:
+        folder name to retrieve tweets from
+    :type folder:
+        `str`
+    :param workers:
+        number of processes to import threads with. Threads are imported serially
+        when `None` or less than 2
+    :type workers:
+        `int` or None
+    :param include_context:
+        `False` to skip the context documents of each thread
+    :type include_context:
+        `bool`
+    :param project_fields:
+        `True` to keep only the fields of each tweet which are used by feature extraction
+    :type project_fields:
+        `bool`
+    :param async_reads:
+        maximum number of files to read at once with asyncio. Defaults to serial reads
+    :type async_reads:
+        `int` or None
+    :rtype:
+        `dict` or None
+    """
+    if not os.path.exists(folder):
+        LOGGER.debug('File/folder does not exist: %s', folder)
+        return None
+
+    if os.path.isfile(folder):
+        return None
+
+    return import_threads(find_thread_folders(folder),
+                          workers=workers,
+                          include_context=include_context,
+                          project_fields=project_fields,
+                          async_reads=async_reads)
+
+
+def import_threads(thread_folders, workers=None, include_context=True, project_fields=False,
+                   async_reads=None):
+    """
+    Imports raw tweet data from a list of thread folders, in order.
+
+    :param thread_folders:
+        root folders of the threads to import
+    :type thread_folders:
+        `list` of `str`
+    :param workers:
+        number of processes to import threads with. Threads are imported serially
+        when `None` or less than 2
+    :type workers:
+        `int` or None
+    :param include_context:
+        `False` to skip the context documents of each thread
+    :type include_context:
+        `bool`
+    :param project_fields:
+        `True` to keep only the fields of each tweet which are used by feature extraction
+    :type project_fields:
+        `bool`
+    :param async_reads:
+        maximum number of files to read at once with asyncio, when not importing with
+        worker processes. Files are read serially when `None`
+    :type async_reads:
+        `int` or None
+    :rtype:
+        `list` of `dict`
+    """
+    mime_index = MimeIndex.load(get_mime_index_path()) if include_context else None
+    thread_importer = partial(_import_thread_job,
+                              include_context=include_context,
+                              mime_index=mime_index,
+                              project_fields=project_fields)
+    if workers is not None and workers > 1 and len(thread_folders) > 1:
+        # Executor.map yields results in the order of thread_folders, so the
+        # import order matches a serial import regardless of which worker finishes first
+        chunksize = max(1, len(thread_folders) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = [
+                (pickle.loads(packed_thread), detected_mimes)
+                for packed_thread, detected_mimes in executor.map(
+                    partial(thread_importer, packed=True), thread_folders, chunksize=chunksize)
+            ]
+    elif async_reads is not None and async_reads > 0:
+        results = [
+            thread_importer(thread_files)
+            for thread_files in prefetch_threads(thread_folders,
+                                                 async_reads,
+                                                 project_fields=project_fields,
+                                                 mime_index=mime_index)
+        ]
+    else:
+        results = [thread_importer(thread_folder) for thread_folder in thread_folders]
+
+    tweet_data = []
+    for thread, detected_mimes in results:
+        tweet_data.append(thread)
+        if mime_index is not None:
+            mime_index.merge(detected_mimes)
+
+    if mime_index is not None:
+        mime_index.save(get_mime_index_path())
+
+    tweet_data = filter_none(tweet_data)
+    return tweet_data
+
+
+def iter_thread_files(datasource):
+    """
+    Finds the files of each twitter thread in a data source, from its folder if it has been
+    extracted, or else from its archive.
+
+    :param datasource:
+        source of data to import
+    :type datasource:
+        either 'dev', 'train', or 'test'
+    :rtype:
+        Generator[`str` or :class:`ArchiveThread`]
+    """
+    folder = get_datasource_path(datasource)
+    if os.path.isdir(folder):
+        yield from find_thread_folders(folder)
+        return
+
+    archive = get_datasource_archive(datasource)
+    if archive is None:
+        LOGGER.debug('File/folder does not exist: %s', folder)
+        return
+
+    yield from iter_archive_threads(archive)
+
+
+def iter_datasource_threads(datasource, include_context=True, project_fields=False,
+                            mime_index=None, jsonl=FIND_JSONL):
+    """
+    Imports raw tweet data from the specified data source one thread at a time, from its
+    JSON lines file if it has one, else from its folder if it has been extracted, or else
+    from its archive.
+
+    :param datasource:
+        source of data to import
+    :type datasource:
+        either 'dev', 'train', or 'test'
+    :param include_context:
+        `False` to skip the context documents of each thread
+    :type include_context:
+        `bool`
+    :param project_fields:
+        `True` to keep only the fields of each tweet which are used by feature extraction
+    :type project_fields:
+        `bool`
+    :param mime_index:
+        index of previously detected MIME types, for the context documents of each thread
+    :type mime_index:
+        :class:`MimeIndex` or None
+    :param jsonl:
+        JSON lines file of the data source, as found by :func:`get_datasource_jsonl`
+    :type jsonl:
+        `str` or None
+    :rtype:
+        Generator[`dict`]
+    """
+    if jsonl is FIND_JSONL:
+        jsonl = get_datasource_jsonl(datasource)
+    if jsonl is not None:
+        yield from iter_jsonl_threads(jsonl,
+                                      include_context=include_context,
+                                      project_fields=project_fields)
+        return
+
+    for thread_files in iter_thread_files(datasource):
+        yield import_thread(thread_files,
+                            include_context=include_context,
+                            mime_index=mime_index,
+                            project_fields=project_fields)
+
+
+def import_datasource_threads(datasource, workers=None, include_context=True,
+                              project_fields=False, async_reads=None, jsonl=FIND_JSONL):
+    """
+    Imports raw tweet data from the specified data source, from its JSON lines file if it
+    has one, else from its folder if it has been extracted, or else from its archive.
+
+    :param datasource:
+        source of data to import
+    :type datasource:
+        either 'dev', 'train', or 'test'
+    :param workers:
+        number of processes to import extracted threads with
+    :type workers:
+        `int` or None
+    :param include_context:
+        `False` to skip the context documents of each thread
+    :type include_context:
+        `bool`
+    :param project_fields:
+        `True` to keep only the fields of each tweet which are used by feature extraction
+    :type project_fields:
+        `bool`
+    :param async_reads:
+        maximum number of files to read at once with asyncio from an extracted data source.
+        Defaults to serial reads
+    :type async_reads:
+        `int` or None
+    :param jsonl:
+        JSON lines file of the data source, as found by :func:`get_datasource_jsonl`
+    :type jsonl:
+        `str` or None
+    :rtype:
+        `list` of `dict`
+    """
+    # pylint:disable=too-many-arguments
+    if jsonl is FIND_JSONL:
+        jsonl = get_datasource_jsonl(datasource)
+    folder = get_datasource_path(datasource)
+    if jsonl is None and os.path.isdir(folder):
+        return import_tweet_data(folder,
+                                 workers=workers,
+                                 include_context=include_context,
+                                 project_fields=project_fields,
+                                 async_reads=async_reads)
+    return list(iter_datasource_threads(datasource,
+                                        include_context=include_context,
+                                        project_fields=project_fields,
+                                        jsonl=jsonl))
+
+
+def convert_to_jsonl(datasource, compress=False, include_context=False):
+    """
+    Converts the folder or archive of a data source to a JSON lines file next to it, which
+    later imports read in its place.
+
+    :param datasource:
+        source of data to convert
+    :type datasource:
+        either 'dev', 'train', or 'test'
+    :param compress:
+        `True` to gzip the file
+    :type compress:
+        `bool`
+    :param include_context:
+        `True` to inline the context documents of each thread
+    :type include_context:
+        `bool`
+    :rtype:
+        `str` or None
+    """
+    path = '{}.jsonl'.format(get_datasource_path(datasource))
+    if compress:
+        path += '.gz'
+
+    # Read from the original files, so an existing conversion is never converted again
+    mime_index = MimeIndex.load(get_mime_index_path()) if include_context else None
+    threads = (
+        import_thread(thread_files, include_context=include_context, mime_index=mime_index)
+        for thread_files in iter_thread_files(datasource)
+    )
+    count = write_jsonl(path, threads, include_context=include_context)
+    if mime_index is not None:
+        mime_index.save(get_mime_index_path())
+    if count == 0:
+        os.remove(path)
+        return None
+
+    LOGGER.info('Converted %d `%s` threads to %s', count, datasource, path)
+    return path
+
+
+def read_annotation_data(datasource):
+    """
+    Reads raw annotation data for the specified data source from its annotation files,
+    or from their archive if they have not been extracted.
+
+    :param datasource:
+        source of data to import
+    :type datasource:
+        either 'dev', 'train', or 'test'
+    :rtype:
+        `tuple` of `dict`
+    """
+    if not os.path.isdir(get_datasource_path(datasource, annotations=True)):
+        archive = get_datasource_archive(datasource, annotations=True)
+        if archive is not None:
+            return read_archive_annotations(archive)
+
+    task_a_annotations = {}
+    task_b_annotations = {}
+    with open(os.path.join(get_datasource_path(datasource, annotations=True),
+                           'subtaskA.json')) as annotation_json:
+        task_a_annotations = json.load(annotation_json)
+    with open(os.path.join(get_datasource_path(datasource, annotations=True),
+                           'subtaskB.json')) as annotation_json:
+        task_b_annotations = json.load(annotation_json)
+    return task_a_annotations, task_b_annotations
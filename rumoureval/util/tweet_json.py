@@ -0,0 +1,126 @@
+"""
+Decodes tweet JSON, using the fastest installed JSON library, and projects tweets down to
+the fields used by feature extraction.
+"""
+
+import json
+
+try:
+    import orjson
+    JSON_BACKEND = 'orjson'
+    _loads = orjson.loads  # pylint:disable=no-member
+    _dumps = orjson.dumps  # pylint:disable=no-member
+except ImportError:
+    try:
+        import ujson
+        JSON_BACKEND = 'ujson'
+        _loads = ujson.loads
+
+        def _dumps(value):
+            """Encode a value as UTF-8 JSON with ujson."""
+            return ujson.dumps(value, ensure_ascii=False).encode('utf-8')
+    except ImportError:
+        JSON_BACKEND = 'json'
+        _loads = json.loads
+
+        def _dumps(value):
+            """Encode a value as UTF-8 JSON with the standard library."""
+            return json.dumps(value, ensure_ascii=False).encode('utf-8')
+
+
+# Fields of a tweet which are kept when projecting. Nested `dict`s select fields of
+# nested objects, and `True` keeps a field whole
+TWEET_FIELDS = {
+    'id': True,
+    'id_str': True,
+    'text': True,
+    'created_at': True,
+    'in_reply_to_status_id_str': True,
+    'retweet_count': True,
+    'favorite_count': True,
+    'hashtags': True,
+    'user_mentions': True,
+    'user': {
+        'id_str': True,
+        'created_at': True,
+        'screen_name': True,
+        'verified': True,
+    },
+    'entities': {
+        'hashtags': True,
+        'user_mentions': True,
+    },
+}
+
+
+def loads(data):
+    """
+    Decode a JSON document.
+
+    :param data:
+        the document
+    :type data:
+        `bytes` or `str`
+    :rtype:
+        json
+    """
+    return _loads(data)
+
+
+def dumps(value):
+    """
+    Encode a JSON document on a single line.
+
+    :param value:
+        the document
+    :type value:
+        json
+    :rtype:
+        `bytes`
+    """
+    return _dumps(value)
+
+
+def project(raw, fields):
+    """
+    Keep only the selected fields of a decoded JSON object.
+
+    :param raw:
+        the decoded object
+    :type raw:
+        `dict`
+    :param fields:
+        fields to keep, with nested `dict`s selecting fields of nested objects
+    :type fields:
+        `dict`
+    :rtype:
+        `dict`
+    """
+    projected = {}
+    for name, selection in fields.items():
+        if name not in raw:
+            continue
+        value = raw[name]
+        if selection is not True and isinstance(value, dict):
+            value = project(value, selection)
+        projected[name] = value
+    return projected
+
+
+def loads_tweet(data, project_fields=False):
+    """
+    Decode a tweet.
+
+    :param data:
+        the tweet JSON
+    :type data:
+        `bytes` or `str`
+    :param project_fields:
+        `True` to keep only the fields in `TWEET_FIELDS`
+    :type project_fields:
+        `bool`
+    :rtype:
+        `dict`
+    """
+    tweet = _loads(data)
+    return project(tweet, TWEET_FIELDS) if project_fields else tweet
@@ -0,0 +1,96 @@
+"""
+Parses the creation times of tweets and users, which the Twitter API always gives in a single
+fixed format, such as `Wed Jan 07 11:07:51 +0000 2015`.
+"""
+
+import dateutil.parser
+import dateutil.tz
+
+
+SECONDS_PER_DAY = 86400
+
+_MONTHS = {
+    'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
+    'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12,
+}
+
+
+def _days_from_civil(year, month, day):
+    """
+    Count the days from 1970-01-01 to a date in the proleptic Gregorian calendar, without
+    creating a `datetime`.
+
+    :rtype:
+        `int`
+    """
+    # Count years from March, so leap days fall at the end of each year
+    if month <= 2:
+        year -= 1
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def _parse_fixed(created_at):
+    """Parse a creation time in the Twitter API format, or None if it is in another format."""
+    parts = created_at.split(' ')
+    if len(parts) != 6 or parts[4] != '+0000' or parts[1] not in _MONTHS:
+        return None
+    clock = parts[3].split(':')
+    if len(clock) != 3:
+        return None
+    try:
+        days = _days_from_civil(int(parts[5]), _MONTHS[parts[1]], int(parts[2]))
+        return days * SECONDS_PER_DAY + int(clock[0]) * 3600 + int(clock[1]) * 60 + int(clock[2])
+    except ValueError:
+        return None
+
+
+def parse_created_at(created_at):
+    """
+    Parse the creation time of a tweet or user into seconds since the epoch. Times which are
+    not in the Twitter API format are parsed with dateutil, as UTC if they have no time zone.
+
+    :param created_at:
+        creation time from the Twitter API
+    :type created_at:
+        `str` or None
+    :rtype:
+        `int`, or None if there is no creation time or it cannot be parsed
+    """
+    if not created_at:
+        return None
+    timestamp = _parse_fixed(created_at)
+    if timestamp is not None:
+        return timestamp
+
+    try:
+        parsed = dateutil.parser.parse(created_at)
+    except (ValueError, OverflowError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dateutil.tz.tzutc())
+    return int(parsed.timestamp())
+
+
+def age_in_days(created_at, now):
+    """
+    Get the number of whole days between two times, as `timedelta.days` does. An age cannot
+    be given when either time is unknown, so a `ValueError` is raised instead.
+
+    :param created_at:
+        seconds since the epoch of the earlier time
+    :type created_at:
+        `int` or None
+    :param now:
+        seconds since the epoch of the later time
+    :type now:
+        `int` or None
+    :rtype:
+        `int`
+    """
+    if created_at is None or now is None:
+        raise ValueError('Cannot take an age from an unknown creation time')
+    return (now - created_at) // SECONDS_PER_DAY
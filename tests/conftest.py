@@ -0,0 +1,128 @@
+"""Fixtures which lay out small datasources on disk, in place of the real data."""
+
+import json
+import os
+import sys
+import pytest
+
+
+def make_tweet(tweet_id, text, reply_to=None):
+    """Make the JSON of a tweet, with the fields read by import and feature extraction.
+
+    :param tweet_id:
+        ID of the tweet
+    :type tweet_id:
+        `int`
+    :param text:
+        text of the tweet
+    :type text:
+        `str`
+    :param reply_to:
+        ID of the tweet it replies to, if any
+    :type reply_to:
+        `int` or None
+    :rtype:
+        `dict`
+    """
+    return {
+        'id': tweet_id,
+        'id_str': str(tweet_id),
+        'text': text,
+        'created_at': 'Wed Jan 07 11:07:51 +0000 2015',
+        'in_reply_to_status_id': reply_to,
+        'entities': {'hashtags': [], 'user_mentions': [], 'urls': []},
+        'favorite_count': 0,
+        'retweet_count': 0,
+        'user': {
+            'id': 1,
+            'id_str': '1',
+            'screen_name': 'user',
+            'created_at': 'Mon Jan 05 11:07:51 +0000 2015',
+            'verified': False,
+        },
+    }
+
+
+def write_json(path, value):
+    """Write a value to a JSON file, creating its folder."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as json_file:
+        # Encoded in one shot, which nests deeper than encoding to a file
+        json_file.write(json.dumps(value))
+
+
+def write_thread(datasource_folder, event, source_id, structure, texts=None):
+    """Write a thread in the layout of the extracted data.
+
+    :param datasource_folder:
+        folder of the datasource
+    :type datasource_folder:
+        `str`
+    :param event:
+        event of the thread
+    :type event:
+        `str`
+    :param source_id:
+        ID of the source tweet
+    :type source_id:
+        `int`
+    :param structure:
+        IDs of the replies to each tweet, as in `structure.json`
+    :type structure:
+        `dict`
+    :param texts:
+        text of tweets by ID. Defaults to text made from each ID
+    :type texts:
+        `dict` or None
+    :rtype:
+        `str` folder of the thread
+    """
+    texts = texts or {}
+    folder = os.path.join(datasource_folder, event, str(source_id))
+    write_json(os.path.join(folder, 'structure.json'), structure)
+    write_json(os.path.join(folder, 'source-tweet', '{}.json'.format(source_id)),
+               make_tweet(source_id, texts.get(source_id, 'tweet {}'.format(source_id))))
+
+    # Walk the structure iteratively, since it may be too deep to recurse through
+    parents = [(source_id, structure[str(source_id)])]
+    while parents:
+        parent_id, replies = parents.pop()
+        for reply_id, reply_structure in replies.items():
+            reply_id = int(reply_id)
+            write_json(os.path.join(folder, 'replies', '{}.json'.format(reply_id)),
+                       make_tweet(reply_id, texts.get(reply_id, 'tweet {}'.format(reply_id)),
+                                  reply_to=parent_id))
+            if isinstance(reply_structure, dict):
+                parents.append((reply_id, reply_structure))
+    return folder
+
+
+def chain_structure(source_id, depth):
+    """Build the structure of a thread which is a single chain of replies.
+
+    :param source_id:
+        ID of the source tweet, each reply taking the next ID
+    :type source_id:
+        `int`
+    :param depth:
+        number of replies
+    :type depth:
+        `int`
+    :rtype:
+        `dict`
+    """
+    leaf = []
+    for tweet_id in range(source_id + depth, source_id, -1):
+        leaf = {str(tweet_id): leaf}
+    return {str(source_id): leaf}
+
+
+@pytest.fixture
+def data_root(tmp_path, monkeypatch):
+    """
+    Point data and output paths at a temporary folder, which are found relative to the
+    script being run.
+    """
+    (tmp_path / 'rumoureval').mkdir()
+    monkeypatch.setattr(sys, 'argv', [str(tmp_path / 'rumoureval' / '__main__.py')])
+    return tmp_path
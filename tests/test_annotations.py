@@ -0,0 +1,70 @@
+"""Tests of indexing annotations by integer tweet ID."""
+
+import numpy as np
+import pytest
+from rumoureval.objects.tweet import Tweet
+from rumoureval.util.annotations import AnnotationIndex, get_tweet_ids
+from rumoureval.util.data import import_data
+from .conftest import make_tweet, write_thread
+
+
+ANNOTATIONS = {'300': 'query', '100': 'support', '200': 'comment', '101': 'support'}
+
+
+def test_labels_are_coded_in_order():
+    """Labels are coded by their sorted order, or by the order they are given in."""
+    index = AnnotationIndex.from_dict(ANNOTATIONS)
+    assert index.labels == ['comment', 'query', 'support']
+    assert index.tweet_ids.tolist() == [100, 101, 200, 300]
+    assert index.codes.dtype == np.int8
+    assert index.codes.tolist() == [2, 2, 0, 1]
+
+    labels = ['support', 'deny', 'query', 'comment']
+    index = AnnotationIndex.from_dict(ANNOTATIONS, labels=labels)
+    assert index.labels == labels
+    assert index.codes.tolist() == [0, 0, 3, 2]
+
+
+def test_lookups_match_the_dict():
+    """Labels are found by string tweet ID, or for many integer tweet IDs at once."""
+    index = AnnotationIndex.from_dict(ANNOTATIONS)
+    assert len(index) == len(ANNOTATIONS)
+    for tweet_id, label in ANNOTATIONS.items():
+        assert tweet_id in index
+        assert index[tweet_id] == label
+    assert '102' not in index and '999' not in index
+    with pytest.raises(KeyError):
+        index['102']  # pylint:disable=pointless-statement
+
+    tweet_ids = np.array([300, 100, 300, 200], dtype=np.int64)
+    assert index.labels_for(tweet_ids).tolist() == ['query', 'support', 'query', 'comment']
+    with pytest.raises(KeyError):
+        index.labels_for(np.array([100, 999], dtype=np.int64))
+
+
+def test_one_vs_rest():
+    """Relabelling as one label versus the rest keeps every tweet."""
+    query = AnnotationIndex.from_dict(ANNOTATIONS).one_vs_rest('query')
+    assert query.labels == ['not_query', 'query']
+    assert [query[tweet_id] for tweet_id in ['100', '200', '300']] == \
+        ['not_query', 'not_query', 'query']
+    assert set(AnnotationIndex.from_dict(ANNOTATIONS).one_vs_rest('deny').labels_for(
+        np.array([100, 300], dtype=np.int64))) == {'not_deny'}
+
+
+def test_tweet_ids_are_read_from_their_stores(data_root):
+    """The IDs of imported tweets, and of tweets in stores of their own, are found in order."""
+    write_thread(str(data_root / 'data' / 'dev'), 'event', 100, {'100': {'101': {}}})
+    write_thread(str(data_root / 'data' / 'dev'), 'event', 200, {'200': {}})
+    tweets = import_data('dev', include_context=False, use_snapshot=False)
+    expected = [int(tweet['id_str']) for tweet in tweets]
+    assert get_tweet_ids(tweets).tolist() == expected
+    assert get_tweet_ids(tweets[::-1]).tolist() == expected[::-1]
+
+    mixed = [tweets[0], Tweet(make_tweet(300, 'tweet')), tweets[-1]]
+    assert get_tweet_ids(mixed).tolist() == [expected[0], 300, expected[-1]]
+    assert get_tweet_ids([]).dtype == np.int64
+
+    index = AnnotationIndex.from_dict(ANNOTATIONS)
+    assert index.labels_for(mixed).tolist() == \
+        [ANNOTATIONS[tweet['id_str']] for tweet in mixed]
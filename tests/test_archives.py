@@ -0,0 +1,65 @@
+"""Tests of importing datasources straight out of their archives."""
+
+import os
+import shutil
+import tarfile
+import zipfile
+import pytest
+from rumoureval.util.data import import_annotation_data, import_data
+from rumoureval.util.thread_files import iter_archive_threads
+from .conftest import write_json, write_thread
+
+
+def write_archive(path, folder):
+    """Archive the files of a folder, under its name, as a tar or zip archive by extension."""
+    root = os.path.dirname(folder)
+    names = sorted(os.path.relpath(os.path.join(parent, name), root)
+                   for parent, _, names in os.walk(folder) for name in names)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if path.endswith('.zip'):
+        with zipfile.ZipFile(path, 'w') as archive:
+            for name in names:
+                archive.write(os.path.join(root, name), name)
+    else:
+        with tarfile.open(path, 'w:bz2') as archive:
+            for name in names:
+                archive.add(os.path.join(root, name), name)
+
+
+def describe(tweets):
+    """Describe imported tweets by their IDs, texts and parents."""
+    return [(tweet['id_str'], tweet['text'], tweet.parent()['id_str'] if tweet.parent() else None)
+            for tweet in tweets]
+
+
+@pytest.mark.parametrize('extension', ['.tar.bz2', '.zip'])
+def test_archived_threads_match_extracted_threads(data_root, extension):
+    """Threads read out of an archive import as they do from the extracted folder."""
+    datasource_folder = str(data_root / 'data' / 'dev')
+    write_thread(datasource_folder, 'event-a', 100, {'100': {'101': {'102': []}, '103': []}})
+    write_thread(datasource_folder, 'event-b', 200, {'200': {'201': []}})
+    with open(os.path.join(datasource_folder, 'README.txt'), 'w') as readme:
+        readme.write('not a thread')
+    extracted = describe(import_data('dev', include_context=False, use_snapshot=False))
+
+    write_archive(str(data_root / 'data-zip' / ('dev' + extension)), datasource_folder)
+    shutil.rmtree(datasource_folder)
+    threads = list(iter_archive_threads(str(data_root / 'data-zip' / ('dev' + extension))))
+    assert [thread.name for thread in threads] == ['dev/event-a/100', 'dev/event-b/200']
+    assert sorted(threads[0].listdir('replies')) == ['101.json', '102.json', '103.json']
+    assert threads[1].exists('source-tweet') and not threads[1].exists('context')
+
+    assert describe(import_data('dev', include_context=False, use_snapshot=False)) == extracted
+
+
+@pytest.mark.parametrize('extension', ['.tar.bz2', '.zip'])
+def test_archived_annotations_are_found_by_prefix(data_root, extension):
+    """Annotation files in an archive are found by their task prefix, whatever their suffix."""
+    annotations_folder = str(data_root / 'data' / 'dev-annotations')
+    write_json(os.path.join(annotations_folder, 'subtaskA_dev.json'), {'100': 'support'})
+    write_json(os.path.join(annotations_folder, 'subtaskB_dev.json'), {'100': 'true'})
+    write_archive(str(data_root / 'data-zip' / ('dev_key' + extension)), annotations_folder)
+    shutil.rmtree(annotations_folder)
+
+    assert import_annotation_data('dev', use_snapshot=False) == \
+        ({'100': 'support'}, {'100': 'true'})
@@ -0,0 +1,60 @@
+"""Tests of importing threads with asyncio."""
+
+import asyncio
+import pytest
+from rumoureval.util import async_reader
+from rumoureval.util.data import find_thread_folders, import_threads
+from .conftest import write_thread
+
+
+def test_async_import_within_running_event_loop(data_root):
+    """Threads are read with asyncio from code which is already running an event loop."""
+    datasource_folder = str(data_root / 'data' / 'dev')
+    write_thread(datasource_folder, 'event', 100, {'100': {'101': {'102': []}}})
+    write_thread(datasource_folder, 'event', 200, {'200': {'201': []}})
+    thread_folders = sorted(find_thread_folders(datasource_folder))
+    serial = import_threads(thread_folders, include_context=False)
+
+    async def import_in_loop():
+        """Import threads as a notebook cell would, from within the running loop."""
+        return import_threads(thread_folders, include_context=False, async_reads=4)
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(import_in_loop()) == serial
+    finally:
+        loop.close()
+
+
+def test_prefetch_holds_a_bounded_number_of_threads(data_root, monkeypatch):
+    """Threads are yielded in order, with only a few read ahead of the caller."""
+    datasource_folder = str(data_root / 'data' / 'dev')
+    for source_id in range(100, 120):
+        write_thread(datasource_folder, 'event', source_id, {str(source_id): {}})
+    thread_folders = sorted(find_thread_folders(datasource_folder))
+    read = []
+    list_thread = async_reader._list_thread  # pylint:disable=protected-access
+
+    def record_listing(folder):
+        """List a thread, recording that it was read."""
+        read.append(folder)
+        return list_thread(folder)
+    monkeypatch.setattr(async_reader, '_list_thread', record_listing)
+
+    prefetched = async_reader.prefetch_threads(thread_folders, 2)
+    taken = [next(prefetched).name for _ in range(3)]
+    assert taken == thread_folders[:3]
+    assert len(read) <= 3 + 2 * 2
+    prefetched.close()
+    assert len(read) < len(thread_folders)
+
+
+def test_prefetch_raises_errors_in_order(data_root):
+    """A thread which cannot be read raises once the threads before it have been taken."""
+    datasource_folder = str(data_root / 'data' / 'dev')
+    write_thread(datasource_folder, 'event', 100, {'100': {}})
+    thread_folders = sorted(find_thread_folders(datasource_folder))
+    prefetched = async_reader.prefetch_threads(thread_folders + ['missing'], 2)
+    assert next(prefetched).name == thread_folders[0]
+    with pytest.raises(OSError):
+        next(prefetched)
@@ -0,0 +1,86 @@
+"""Tests of keeping the details of tweets in memory within a budget."""
+
+import threading
+from rumoureval.util.detail_cache import CacheStats, DetailCache, estimate_size
+
+
+def test_least_recently_used_details_are_evicted():
+    """Details read or written most recently are kept once the cache is over its budget."""
+    cache = DetailCache(max_entries=2)
+    cache.put(1, ('one',))
+    cache.put(2, ('two',))
+    assert cache.get(1) == ('one',)
+    cache.put(3, ('three',))
+    assert 1 in cache and 2 not in cache and 3 in cache
+
+    cache.put(1, ('one again',))
+    cache.put(4, ('four',))
+    assert cache.get(1) == ('one again',)
+    assert cache.get(3) is None
+    assert cache.get(3, ()) == ()
+    assert cache.stats() == CacheStats(hits=2, misses=2, evictions=2, entries=2, bytes=0)
+
+
+def test_byte_budget():
+    """Details are evicted once their estimated bytes are over budget."""
+    cache = DetailCache(max_bytes=30, size_of=lambda details: details[0])
+    cache.put('a', (10,))
+    cache.put('b', (10,))
+    cache.put('b', (15,))
+    assert cache.stats().bytes == 25 and len(cache) == 2
+    cache.put('c', (10,))
+    assert 'a' not in cache and cache.stats().bytes == 25
+
+    # A single entry larger than the budget does not stay
+    cache.put('d', (40,))
+    assert len(cache) == 0 and cache.stats().bytes == 0
+    assert cache.stats().evictions == 4
+
+
+def test_resize():
+    """Shrinking the budget evicts at once, and sizes are only counted under a byte budget."""
+    cache = DetailCache()
+    for key in range(10):
+        cache.put(key, ('detail', [key]))
+    assert cache.stats().bytes == 0
+    cache.resize(max_entries=4)
+    assert sorted(key for key in range(10) if key in cache) == [6, 7, 8, 9]
+
+    # Details cached without a byte budget count as empty, and are evicted in turn
+    cache.resize(max_bytes=2 * estimate_size(('detail', [10])))
+    for key in range(10, 12):
+        cache.put(key, ('detail', [key]))
+    assert sorted(key for key in range(12) if key in cache) == [6, 7, 8, 9, 10, 11]
+    cache.put(12, ('detail', [12]))
+    assert sorted(key for key in range(13) if key in cache) == [11, 12]
+
+    cache.clear()
+    assert len(cache) == 0 and cache.stats().evictions > 0
+
+
+def test_estimated_size_counts_list_items():
+    """The estimated size of details counts the items of their lists."""
+    short = estimate_size(('text', ['a'], 1))
+    assert estimate_size(('text', ['a', 'b', 'c'], 1)) > short > estimate_size(('text', 1))
+
+
+def test_concurrent_puts_stay_within_budget():
+    """Threads sharing a cache leave it within its budget, with consistent counters."""
+    cache = DetailCache(max_entries=50)
+
+    def put_details(offset):
+        """Cache and read back details under keys of this thread."""
+        for key in range(offset, offset + 500):
+            cache.put(key, (key,))
+            cache.get(key)
+    threads = [threading.Thread(target=put_details, args=(offset,))
+               for offset in range(0, 4000, 500)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.stats()
+    assert stats.entries == len(cache) == 50
+    assert stats.evictions == 4000 - 50
+    assert stats.hits + stats.misses == 4000
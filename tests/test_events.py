@@ -0,0 +1,78 @@
+"""Tests of selecting the events of a datasource through their manifests."""
+
+import json
+import os
+import shutil
+import zipfile
+from rumoureval.util.data import import_annotation_data, import_data
+from rumoureval.util.datasource import get_datasource_events
+from .conftest import write_json, write_thread
+
+
+ANNOTATIONS = (
+    {'100': 'support', '101': 'query', '200': 'support', '201': 'deny'},
+    {'100': 'true', '200': 'false'},
+)
+
+
+def write_datasource(data_root):
+    """Write a datasource of two events, each of a single thread, and its annotations."""
+    datasource_folder = str(data_root / 'data' / 'dev')
+    write_thread(datasource_folder, 'event-a', 100, {'100': {'101': []}})
+    write_thread(datasource_folder, 'event-b', 200, {'200': {'201': []}})
+    for task, annotations in zip('AB', ANNOTATIONS):
+        write_json(str(data_root / 'data' / 'dev-annotations' / 'subtask{}.json'.format(task)),
+                   annotations)
+    return datasource_folder
+
+
+def test_selected_events_are_imported_alone(data_root):
+    """Only the threads of the selected events are imported, listed in their manifests."""
+    datasource_folder = write_datasource(data_root)
+    assert get_datasource_events('dev', ['event-b', 'missing']) == ['event-b']
+
+    tweets = import_data('dev', include_context=False, use_snapshot=False, events=['event-b'])
+    assert sorted(tweet['id_str'] for tweet in tweets) == ['200', '201']
+    with open(str(data_root / 'output' / 'events' / 'dev' / 'index.json')) as index_json:
+        index = json.load(index_json)
+    assert list(index['events']) == ['event-b']
+    assert index['events']['event-b']['threads'] == ['event-b/200']
+    assert index['events']['event-b']['tweets'] == ['200', '201']
+
+    # A thread added to an event is found by its manifest
+    thread_folder = write_thread(datasource_folder, 'event-b', 300, {'300': {}})
+    stat = os.stat(thread_folder)
+    os.utime(thread_folder, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    tweets = import_data('dev', include_context=False, use_snapshot=False, events=['event-b'])
+    assert sorted(tweet['id_str'] for tweet in tweets) == ['200', '201', '300']
+
+
+def test_annotations_are_split_by_event(data_root):
+    """Annotations are filtered to the selected events, and split again once they change."""
+    write_datasource(data_root)
+    assert import_annotation_data('dev', use_snapshot=False, events=['event-a']) == \
+        ({'100': 'support', '101': 'query'}, {'100': 'true'})
+    assert os.path.isfile(
+        str(data_root / 'output' / 'events' / 'dev' / 'event-a.annotations.json'))
+
+    relabelled = dict(ANNOTATIONS[0], **{'101': 'comment'})
+    annotations_path = str(data_root / 'data' / 'dev-annotations' / 'subtaskA.json')
+    write_json(annotations_path, relabelled)
+    stat = os.stat(annotations_path)
+    os.utime(annotations_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert import_annotation_data('dev', use_snapshot=False, events=['event-a', 'event-b']) == \
+        ({'100': 'support', '101': 'comment', '200': 'support', '201': 'deny'},
+         {'100': 'true', '200': 'false'})
+
+
+def test_archived_annotations_are_filtered_by_event(data_root):
+    """Annotations which are only archived are read in full, then filtered to the events."""
+    write_datasource(data_root)
+    shutil.rmtree(str(data_root / 'data' / 'dev-annotations'))
+    os.makedirs(str(data_root / 'data-zip'))
+    with zipfile.ZipFile(str(data_root / 'data-zip' / 'dev_key.zip'), 'w') as archive:
+        for task, annotations in zip('AB', ANNOTATIONS):
+            archive.writestr('subtask{}_dev.json'.format(task), json.dumps(annotations))
+
+    assert import_annotation_data('dev', use_snapshot=False, events=['event-b']) == \
+        ({'200': 'support', '201': 'deny'}, {'200': 'false'})
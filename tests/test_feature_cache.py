@@ -0,0 +1,174 @@
+"""Tests of the on-disk cache of extracted tweet details."""
+
+import os
+from rumoureval.pipeline import tweet_detail_extractor
+from rumoureval.pipeline.tweet_detail_extractor import TWEET_DETAIL_CACHE, TweetDetailExtractor
+from rumoureval.util.data import import_data
+from rumoureval.util.feature_cache import FeatureCache
+from .conftest import write_thread
+
+
+# Keys of the details of three tweets, by tweet ID and digest
+ONE, TWO, THREE = (1, 'a1'), (2, 'b2'), (3, 'c3')
+
+
+def test_update_appends_only_new_details(tmp_path):
+    """Details which are already cached are not written again."""
+    path = str(tmp_path / 'details.cache')
+    FeatureCache(path, 'a').update({ONE: {'text': 'one'}})
+    size = os.path.getsize(path)
+
+    cache = FeatureCache(path, 'a')
+    cache.update({ONE: {'text': 'one'}})
+    assert os.path.getsize(path) == size
+    cache.update({TWO: {'text': 'two'}})
+    assert os.path.getsize(path) > size
+    assert FeatureCache(path, 'a').read([ONE, TWO, THREE]) == {
+        ONE: {'text': 'one'}, TWO: {'text': 'two'}
+    }
+
+
+def test_stale_and_truncated_caches(tmp_path):
+    """A cache built with another fingerprint is ignored, and a truncated end is dropped."""
+    path = str(tmp_path / 'details.cache')
+    FeatureCache(path, 'a').update({ONE: {'text': 'one'}})
+    assert FeatureCache(path, 'b').read([ONE]) == {}
+
+    FeatureCache(path, 'a').update({TWO: {'text': 'two'}})
+    with open(path, 'ab') as cache_file:
+        cache_file.write(b'\x80\x04\x95')
+    cache = FeatureCache(path, 'a')
+    assert cache.read([ONE, TWO]) == {ONE: {'text': 'one'}, TWO: {'text': 'two'}}
+    cache.update({THREE: {'text': 'three'}})
+    assert sorted(FeatureCache(path, 'a').read([ONE, TWO, THREE])) == [ONE, TWO, THREE]
+
+
+def test_unsupported_protocol_is_dropped(tmp_path):
+    """Details pickled with a protocol this interpreter cannot read are dropped as stale."""
+    path = str(tmp_path / 'details.cache')
+    FeatureCache(path, 'a').update({ONE: {'text': 'one'}})
+    with open(path, 'ab') as cache_file:
+        cache_file.write(b'\x80\x63\x95')
+    cache = FeatureCache(path, 'a')
+    assert cache.read([ONE, TWO]) == {ONE: {'text': 'one'}}
+    cache.update({TWO: {'text': 'two'}})
+    assert FeatureCache(path, 'a').read([ONE, TWO]) == {ONE: {'text': 'one'}, TWO: {'text': 'two'}}
+
+
+def test_cache_holds_only_keys(tmp_path):
+    """Details are read from the file when asked for, rather than held in memory."""
+    path = str(tmp_path / 'details.cache')
+    cache = FeatureCache(path, 'a')
+    cache.update({ONE: {'text': 'one'}, TWO: {'text': 'two'}})
+    assert cache.keys == {ONE, TWO}
+    assert not hasattr(cache, 'details')
+    assert cache.read([TWO, THREE]) == {TWO: {'text': 'two'}}
+    assert cache.read([THREE]) == {}
+
+
+def test_superseded_details_are_pruned(tmp_path):
+    """Details of edited tweets are dropped once they outnumber the current details."""
+    path = str(tmp_path / 'details.cache')
+    cache = FeatureCache(path, 'a')
+    cache.update({ONE: {'text': 'one'}, TWO: {'text': 'two'}})
+    cache.update({(1, 'a2'): {'text': 'one, edited'}})
+    assert cache.superseded == 1
+    assert cache.read([ONE, (1, 'a2')]) == {(1, 'a2'): {'text': 'one, edited'}}
+    cache.update({(2, 'b3'): {'text': 'two, edited'}, (1, 'a3'): {'text': 'one, again'}})
+    assert cache.superseded == 0
+    assert cache.keys == {(1, 'a3'), (2, 'b3')}
+    assert FeatureCache(path, 'a').read([(1, 'a3'), (2, 'b3')]) == {
+        (1, 'a3'): {'text': 'one, again'}, (2, 'b3'): {'text': 'two, edited'}
+    }
+
+    # The file holds only the current details
+    compacted_path = str(tmp_path / 'compacted.cache')
+    FeatureCache(compacted_path, 'a').update(
+        {(2, 'b3'): {'text': 'two, edited'}, (1, 'a3'): {'text': 'one, again'}})
+    assert os.path.getsize(path) == os.path.getsize(compacted_path)
+    assert sorted(os.listdir(str(tmp_path))) == ['compacted.cache', 'details.cache']
+
+
+def test_writers_keep_each_others_details(tmp_path):
+    """Details appended by another writer are read, and kept by later updates."""
+    path = str(tmp_path / 'details.cache')
+    first, second = FeatureCache(path, 'a'), FeatureCache(path, 'a')
+    first.update({ONE: {'text': 'one'}})
+    second.update({TWO: {'text': 'two'}})
+    first.update({THREE: {'text': 'three'}})
+    assert first.keys == {ONE, TWO, THREE}
+    assert FeatureCache(path, 'a').read([ONE, TWO, THREE]) == {
+        ONE: {'text': 'one'}, TWO: {'text': 'two'}, THREE: {'text': 'three'}
+    }
+
+    # A writer whose file was replaced reads the new file, rather than appending to the old
+    FeatureCache(path, 'b').update({ONE: {'text': 'one'}})
+    first.update({TWO: {'text': 'two'}})
+    assert FeatureCache(path, 'a').read([ONE, TWO]) == {TWO: {'text': 'two'}}
+
+
+def test_classifications_share_a_cache(data_root):
+    """Task B details are cached once, whatever the classifications they are extracted with."""
+    write_thread(str(data_root / 'data' / 'dev'), 'event', 100,
+                 {'100': {'101': [], '102': []}}, texts={101: 'reply'})
+    tweets = import_data('dev', include_context=False, use_snapshot=False)
+    folder = str(data_root / 'output' / 'features')
+
+    for classifications in [{'101': 'support', '102': 'query'}, {'101': 'deny', '102': 'deny'}]:
+        TWEET_DETAIL_CACHE.clear()
+        details = TweetDetailExtractor(task='B', classifications=classifications,
+                                       cache_folder=folder).transform(tweets)
+    assert len(os.listdir(folder)) == 1
+    assert details['child_denies'].tolist() == [2, 2, 2]
+    assert details['denies_percentage'].tolist() == [1.0, 1.0, 1.0]
+
+
+def test_extractor_settings_keep_separate_caches(data_root, monkeypatch):
+    """Switching extractor settings does not invalidate the cache of other settings."""
+    write_thread(str(data_root / 'data' / 'dev'), 'event', 100,
+                 {'100': {'101': []}}, texts={101: '#tag reply'})
+    tweets = import_data('dev', include_context=False, use_snapshot=False)
+    folder = str(data_root / 'output' / 'features')
+
+    def transform(strip_hashtags):
+        """Extract details in a fresh process, as far as the caches are concerned."""
+        TWEET_DETAIL_CACHE.clear()
+        tweet_detail_extractor._FEATURE_CACHES.clear()  # pylint:disable=protected-access
+        extractor = TweetDetailExtractor(strip_hashtags=strip_hashtags, cache_folder=folder)
+        return extractor.transform(tweets)
+
+    transform(False)
+    transform(True)
+    assert len(os.listdir(folder)) == 2
+
+    # Both settings are now read from disk, without extracting any details
+    monkeypatch.setattr(TweetDetailExtractor, '_extract', None)
+    assert list(transform(False)['text_stemmed'])[1] == ['#tag', 'repli']
+    assert list(transform(True)['text_stemmed'])[1] == ['repli']
+
+
+def test_edited_tweets_are_extracted_again(data_root):
+    """The cached details of a tweet whose JSON was edited are not read."""
+    folder = str(data_root / 'data' / 'dev')
+    write_thread(folder, 'event', 100, {'100': {'101': []}}, texts={101: 'is this true'})
+    features_folder = str(data_root / 'output' / 'features')
+
+    def transform():
+        """Extract details in a fresh process, as far as the caches are concerned."""
+        TWEET_DETAIL_CACHE.clear()
+        tweet_detail_extractor._FEATURE_CACHES.clear()  # pylint:disable=protected-access
+        tweets = import_data('dev', include_context=False, use_snapshot=False)
+        return TweetDetailExtractor(cache_folder=features_folder).transform(tweets)
+
+    assert list(transform()['negative_words'])[1] == []
+    write_thread(folder, 'event', 100, {'100': {'101': []}}, texts={101: 'fake hoax'})
+    assert list(transform()['negative_words'])[1] == ['fake', 'hoax']
+
+
+def test_fingerprint_covers_extraction_code():
+    """Every module which shapes the extracted details is part of the fingerprint."""
+    names = [os.path.basename(path) for path in
+             tweet_detail_extractor.get_extractor_source_files()]
+    for name in ['tweet_detail_extractor.py', 'lexicon_matcher.py', 'tweet_features.py',
+                 'tweet_time.py', 'opinion.py']:
+        assert name in names
@@ -0,0 +1,58 @@
+"""Tests of reading datasources from JSON lines files."""
+
+import json
+import os
+from rumoureval.util import datasource
+from rumoureval.util.data import (
+    convert_to_jsonl, get_datasource_delta, get_datasource_jsonl, import_data
+)
+from .conftest import chain_structure, make_tweet, write_thread
+
+
+def test_stale_jsonl_falls_back_to_folder(data_root):
+    """A JSON lines file older than an edit of the extracted folder is not read."""
+    datasource_folder = str(data_root / 'data' / 'dev')
+    folder = write_thread(datasource_folder, 'event', 100, {'100': {'101': []}})
+    path = convert_to_jsonl('dev')
+    assert get_datasource_jsonl('dev') == path
+    assert get_datasource_delta('dev', include_context=False) is None
+
+    reply_path = os.path.join(folder, 'replies', '101.json')
+    with open(reply_path, 'w') as reply_file:
+        json.dump(make_tweet(101, 'edited reply', reply_to=100), reply_file)
+    stat = os.stat(path)
+    os.utime(reply_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    assert get_datasource_jsonl('dev') is None
+    assert get_datasource_delta('dev', include_context=False) is not None
+    tweets = import_data('dev', include_context=False, use_snapshot=False)
+    assert {tweet['id']: tweet['text'] for tweet in tweets}[101] == 'edited reply'
+
+
+def test_jsonl_imports_deep_reply_chain(data_root):
+    """A chain of replies too deep to encode recursively is converted and read back."""
+    datasource_folder = str(data_root / 'data' / 'dev')
+    write_thread(datasource_folder, 'event', 100, chain_structure(100, 800))
+
+    path = convert_to_jsonl('dev')
+    assert not os.path.exists('{}.tmp'.format(path))
+    tweets = import_data('dev', include_context=False, use_snapshot=False)
+    assert len(tweets) == 801
+    assert [tweet.depth for tweet in tweets] == list(range(801))
+    assert tweets[-1].root is tweets[0]
+
+
+def test_jsonl_checked_once_per_import(data_root, monkeypatch):
+    """The extracted folder is only walked once to check its JSON lines file is current."""
+    datasource_folder = str(data_root / 'data' / 'dev')
+    write_thread(datasource_folder, 'event', 100, {'100': {'101': []}})
+    convert_to_jsonl('dev')
+
+    walks = []
+    latest_mtime = datasource.latest_mtime
+    monkeypatch.setattr(datasource, 'latest_mtime', lambda folder: walks.append(folder) or
+                        latest_mtime(folder))
+    for use_snapshot in [True, True, False]:
+        del walks[:]
+        assert len(import_data('dev', include_context=False, use_snapshot=use_snapshot)) == 2
+        assert len(walks) == 1
@@ -0,0 +1,48 @@
+"""Tests of matching tokens against several lexicons at once."""
+
+import random
+from rumoureval.corpus import opinion
+from rumoureval.corpus.opinion import LEXICONS
+from rumoureval.pipeline.lexicon_matcher import LexiconMatcher
+from rumoureval.pipeline.tweet_detail_extractor import STEMMER
+
+
+def match_each(lexicons, tokens):
+    """Match tokens against each lexicon in turn, as the extractor did with a loop per lexicon."""
+    return [[token for token in tokens if token in words] for _, words in lexicons]
+
+
+def test_matches_follow_lexicon_and_token_order():
+    """Tokens in several lexicons are matched by each, in the order they occur."""
+    matcher = LexiconMatcher([('one', frozenset(['a', 'b'])), ('two', frozenset(['b', 'c']))])
+    assert matcher.names == ['one', 'two']
+    assert matcher.match(['c', 'b', 'x', 'a', 'b']) == [['b', 'a', 'b'], ['c', 'b', 'b']]
+    assert matcher.match([]) == [[], []]
+
+
+def test_normalized_lexicons():
+    """Words of the lexicons are normalized as the tokens are."""
+    matcher = LexiconMatcher([('words', frozenset(['Running']))], normalize=str.lower)
+    assert matcher.match(['running', 'Running']) == [['running']]
+
+
+def test_matches_agree_with_a_loop_per_lexicon():
+    """Matching the stemmed lexicons at once finds what a loop per lexicon finds."""
+    stemmed = [(name, frozenset(STEMMER.stem(word) for word in words))
+               for name, words in LEXICONS]
+    vocabulary = sorted(set().union(*(words for _, words in stemmed)))
+    matcher = LexiconMatcher(LEXICONS, normalize=STEMMER.stem)
+
+    generator = random.Random(0)
+    for _ in range(200):
+        tokens = [generator.choice(vocabulary) if generator.random() < 0.5 else
+                  'token{}'.format(generator.randrange(10)) for _ in range(generator.randrange(30))]
+        assert matcher.match(tokens) == match_each(stemmed, tokens)
+
+
+def test_every_lexicon_is_listed():
+    """Each lexicon defined in the opinion corpus is matched."""
+    defined = [value for value in vars(opinion).values() if isinstance(value, frozenset)]
+    listed = [words for _, words in LEXICONS]
+    assert len(defined) == len(listed)
+    assert all(any(words is lexicon for lexicon in listed) for words in defined)
@@ -0,0 +1,54 @@
+"""Tests of MIME detection of context documents."""
+
+import magic
+from rumoureval.util import mime
+from rumoureval.util.mime import MimeIndex, detect_buffer_mime, sniff_mime
+
+
+def test_sniffed_documents_skip_libmagic(monkeypatch):
+    """Documents with unambiguous openings are typed without probing them with libmagic."""
+    def probe(*args, **kwargs):
+        raise AssertionError('libmagic should not be probed')
+    monkeypatch.setattr(mime.magic, 'from_buffer', probe)
+
+    assert detect_buffer_mime(b'%PDF-1.4\n') == 'application/pdf'
+    assert detect_buffer_mime(b'\x89PNG\r\n\x1a\n\x00') == 'image/png'
+    assert detect_buffer_mime(b'\xef\xbb\xbf\r\n\t<!DOCTYPE html>\n<html>') == 'text/html'
+    assert detect_buffer_mime(b' <HTML lang="en">') == 'text/html'
+
+
+def test_html_with_leading_scripts_is_html():
+    """Pages libmagic reads as JavaScript because of an early script are sniffed as HTML."""
+    page = (b'\n<!DOCTYPE html>\n<html><head><script>\n'
+            b'var config = {"page": "news"}; function load() { return config; }\n'
+            b'</script></head><body></body></html>\n')
+    assert sniff_mime(page) == 'text/html'
+    assert detect_buffer_mime(page) == 'text/html'
+
+
+def test_ambiguous_documents_fall_back_to_libmagic():
+    """Documents without a known opening are typed by libmagic."""
+    contents = b'plain words, and nothing more\n'
+    assert sniff_mime(contents) is None
+    assert sniff_mime(b'<div>html fragment</div>') is None
+    assert detect_buffer_mime(contents) == magic.from_buffer(contents, mime=True)
+
+
+def test_index_detects_changed_files_again(tmp_path):
+    """Indexed types are reused until the file changes, and survive saving and loading."""
+    document = tmp_path / 'document'
+    document.write_bytes(b'<html><body></body></html>')
+    index_path = str(tmp_path / 'index' / 'mime_index.json')
+
+    index = MimeIndex()
+    assert index.mime(str(document)) == 'text/html'
+    index.save(index_path)
+    assert index.added == {}
+
+    index = MimeIndex.load(index_path)
+    assert index.mime(str(document)) == 'text/html'
+    assert index.added == {}
+
+    document.write_bytes(b'%PDF-1.4\n')
+    assert index.mime(str(document)) == 'application/pdf'
+    assert list(index.added) == [str(document)]
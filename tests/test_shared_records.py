@@ -0,0 +1,62 @@
+"""Tests of sharing users and strings across the tweets of imported threads."""
+
+import copy
+from rumoureval.util.shared_records import SharedRecords, freeze, share_records
+from .conftest import make_tweet
+
+
+def make_thread(source_id, *replies):
+    """Make a thread from its source tweet ID and its replies, as imported."""
+    return {
+        'source': make_tweet(source_id, 'tweet {}'.format(source_id)),
+        'replies': {reply['id_str']: reply for reply in replies},
+    }
+
+
+def test_identical_users_are_shared():
+    """Every tweet by an unchanged user refers to a single copy of that user."""
+    threads = [make_thread(100, make_tweet(101, 'reply', 100)),
+               make_thread(200, make_tweet(201, 'reply', 200))]
+    records = share_records(threads)
+
+    users = [threads[0]['source']['user'], threads[0]['replies']['101']['user'],
+             threads[1]['source']['user'], threads[1]['replies']['201']['user']]
+    assert all(user is users[0] for user in users)
+    assert list(records.users) == ['1']
+    assert records.count_versions() == 1
+    assert threads[1]['replies']['201'] == make_tweet(201, 'reply', 200)
+
+
+def test_changed_users_share_unchanged_fields():
+    """A user whose counts changed has a new version, sharing the fields which did not."""
+    tweets = [make_tweet(tweet_id, 'reply', 100) for tweet_id in range(100, 103)]
+    for tweet in tweets:
+        tweet['user']['entities'] = {'description': {'urls': []}}
+    tweets[1]['user']['followers_count'] = 10
+    tweets[2]['user']['followers_count'] = 10
+    thread = copy.deepcopy({'source': tweets[0],
+                            'replies': {tweet['id_str']: tweet for tweet in tweets[1:]}})
+    records = SharedRecords()
+    records.share_thread(thread)
+
+    shared = [records.users['1'][hash(freeze(tweet['user']))] for tweet in tweets]
+    assert shared[1] is shared[2]
+    assert thread['replies']['101']['user'] is thread['replies']['102']['user']
+    first, changed = shared[0][0], shared[1][0]
+    assert first is not changed
+    assert 'followers_count' not in first and changed['followers_count'] == 10
+    assert changed['entities'] is first['entities']
+    assert changed == tweets[1]['user']
+    assert records.count_versions() == 2
+
+
+def test_repeated_strings_are_interned():
+    """Keys and repeated fields of tweets refer to a single copy of each string."""
+    threads = [make_thread(100), make_thread(200)]
+    for thread in threads:
+        # Joined at run time, so the strings are not constants interned by the compiler
+        thread['source']['lang'] = ''.join(['e', 'n'])
+    share_records(threads)
+    assert threads[0]['source']['lang'] is threads[1]['source']['lang']
+    keys = [list(thread['source'])[0] for thread in threads]
+    assert keys[0] is keys[1]
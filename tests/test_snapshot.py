@@ -0,0 +1,113 @@
+"""Tests of importing datasources through packed snapshots."""
+
+import json
+import os
+from rumoureval.util import manifest
+from rumoureval.util.data import (
+    get_datasource_delta, get_snapshot_path, import_data, import_snapshot
+)
+from .conftest import chain_structure, make_tweet, write_thread
+
+
+HASH_THREAD = manifest.hash_thread
+
+
+def test_snapshot_reimports_reply_edited_in_place(data_root):
+    """A reply rewritten in place is found by checking every file, though no folder changes."""
+    datasource_folder = str(data_root / 'data' / 'dev')
+    folder = write_thread(datasource_folder, 'event', 100, {'100': {'101': [], '102': []}})
+    tweets = import_data('dev', include_context=False)
+    assert os.path.exists(get_snapshot_path('dev', include_context=False))
+    assert {tweet['id']: tweet['text'] for tweet in tweets}[101] == 'tweet 101'
+
+    reply_path = os.path.join(folder, 'replies', '101.json')
+    stat = os.stat(reply_path)
+    with open(reply_path, 'w') as reply_file:
+        json.dump(make_tweet(101, 'edited reply', reply_to=100), reply_file)
+    os.utime(reply_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    # Checking only the folders of each thread misses the edit
+    assert get_datasource_delta('dev', include_context=False)['changed'] == ['event/100']
+    snapshot = import_snapshot('dev', include_context=False, check_files=False)
+    assert next(snapshot.threads())['replies']['101']['text'] == 'tweet 101'
+    snapshot.close()
+
+    tweets = import_data('dev', include_context=False)
+    assert {tweet['id']: tweet['text'] for tweet in tweets}[101] == 'edited reply'
+
+    # The updated snapshot is current, and is read without importing the thread again
+    assert get_datasource_delta('dev', include_context=False)['changed'] == []
+    tweets = import_data('dev', include_context=False)
+    assert {tweet['id']: tweet['text'] for tweet in tweets}[101] == 'edited reply'
+
+
+def test_snapshot_hashes_threads_once_they_change(data_root, monkeypatch):
+    """Added threads are imported without hashing them, and touched threads are hashed."""
+    folder = write_thread(str(data_root / 'data' / 'dev'), 'event', 100, {'100': {'101': []}})
+
+    def hash_thread(folder):
+        """Fail, as added threads are read once, to import them."""
+        raise AssertionError('{} was hashed'.format(folder))
+    monkeypatch.setattr(manifest, 'hash_thread', hash_thread)
+    import_snapshot('dev', include_context=False).close()
+    monkeypatch.setattr(manifest, 'hash_thread', HASH_THREAD)
+
+    def touch(path):
+        """Move the modification time of a file forward, leaving its contents alone."""
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    # A thread without a hash is imported again the first time it is touched, and hashed
+    touch(os.path.join(folder, 'structure.json'))
+    assert get_datasource_delta('dev', include_context=False)['changed'] == ['event/100']
+    import_snapshot('dev', include_context=False).close()
+
+    # Once hashed, touching the thread again leaves it unchanged
+    touch(os.path.join(folder, 'structure.json'))
+    delta = get_datasource_delta('dev', include_context=False)
+    assert (delta['changed'], delta['unchanged']) == ([], ['event/100'])
+
+
+def test_snapshot_imports_reply_added_to_thread(data_root):
+    """A reply added to an existing thread changes its folder, and is imported."""
+    datasource_folder = str(data_root / 'data' / 'dev')
+    folder = write_thread(datasource_folder, 'event', 100, {'100': {'101': []}})
+    assert len(import_data('dev', include_context=False)) == 2
+
+    replies_folder = os.path.join(folder, 'replies')
+    stat = os.stat(replies_folder)
+    with open(os.path.join(replies_folder, '102.json'), 'w') as reply_file:
+        json.dump(make_tweet(102, 'added reply', reply_to=100), reply_file)
+    with open(os.path.join(folder, 'structure.json'), 'w') as structure_file:
+        json.dump({'100': {'101': [], '102': []}}, structure_file)
+    os.utime(replies_folder, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    tweets = import_data('dev', include_context=False)
+    assert {tweet['id']: tweet['text'] for tweet in tweets}[102] == 'added reply'
+
+
+def test_snapshot_imports_added_thread(data_root):
+    """A thread added to an existing event is imported."""
+    datasource_folder = str(data_root / 'data' / 'dev')
+    write_thread(datasource_folder, 'event', 100, {'100': {'101': []}})
+    assert len(import_data('dev', include_context=False)) == 2
+
+    write_thread(datasource_folder, 'event', 200, {'200': {'201': []}})
+    assert len(import_data('dev', include_context=False)) == 4
+
+
+def test_snapshot_imports_deep_reply_chain(data_root):
+    """A chain of replies too deep to pickle recursively is snapshotted and read back."""
+    datasource_folder = str(data_root / 'data' / 'dev')
+    write_thread(datasource_folder, 'event', 100, chain_structure(100, 800))
+
+    for _ in range(2):
+        tweets = import_data('dev', include_context=False)
+        assert len(tweets) == 801
+        assert [tweet.depth for tweet in tweets] == list(range(801))
+        assert tweets[-1].root is tweets[0]
+        assert tweets[-1].parent() is tweets[-2]
+
+    # Threads imported by worker processes are sent back to the parent flat as well
+    tweets = import_data('dev', workers=2, use_snapshot=False, include_context=False)
+    assert [tweet.depth for tweet in tweets] == list(range(801))
@@ -0,0 +1,80 @@
+"""Tests of thread stores and the tweets viewing them."""
+
+import gc
+import weakref
+from rumoureval.objects.thread_store import slim_tweets
+from rumoureval.objects.tweet import Tweet
+from rumoureval.pipeline.tweet_detail_extractor import TWEET_DETAIL_CACHE, TweetDetailExtractor
+from rumoureval.util.data import import_data
+from .conftest import write_thread
+
+
+def import_replies(data_root):
+    """Import a thread of replies, some of them to other replies."""
+    write_thread(str(data_root / 'data' / 'dev'), 'event', 100,
+                 {'100': {'101': {'103': []}, '102': []}},
+                 texts={101: '#tag reply to @user?', 103: 'a reply... to a reply!'})
+    return import_data('dev', include_context=False, use_snapshot=False)
+
+
+def test_slimmed_tweets_extract_same_details(data_root):
+    """Details of slimmed tweets are extracted again, with any settings, as before slimming."""
+    tweets = import_replies(data_root)
+    extractors = [
+        TweetDetailExtractor(task='A'),
+        TweetDetailExtractor(task='A', strip_hashtags=True, strip_mentions=True),
+        TweetDetailExtractor(task='B', classifications={'101': 'support', '102': 'query'}),
+    ]
+    TWEET_DETAIL_CACHE.clear()
+    expected = [extractor.transform(tweets) for extractor in extractors]
+
+    assert slim_tweets([tweet for tweet in tweets if not tweet.is_source]) == 3
+    assert 'in_reply_to_status_id' not in tweets[1]
+    assert tweets[1]['created_at'] == 'Wed Jan 07 11:07:51 +0000 2015'
+    assert tweets[1]['user']['created_at'] == 'Mon Jan 05 11:07:51 +0000 2015'
+    rebuilt = Tweet(tweets[1].raw())
+    assert (rebuilt.timestamp, rebuilt.account_timestamp) == \
+        (tweets[1].timestamp, tweets[1].account_timestamp)
+    TWEET_DETAIL_CACHE.clear()
+    for extractor, details in zip(extractors, expected):
+        slimmed_details = extractor.transform(tweets)
+        for name in details.keys():
+            assert list(slimmed_details[name]) == list(details[name])
+
+
+def test_slimmed_tweets_are_freed_without_collection(data_root):
+    """Once slimmed, tweets and their store are freed as soon as they are no longer held."""
+    tweets = import_replies(data_root)
+    slim_tweets([tweet for tweet in tweets if not tweet.is_source])
+
+    # Tweets which are reached again after being freed are created once more
+    assert [tweet['id'] for tweet in tweets[0].children()] == [101, 102]
+    reply = tweets[-1]
+    assert reply.parent() is tweets[1]
+    assert reply.root is tweets[0]
+
+    store = weakref.ref(tweets[0].store)
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        del tweets, reply
+        assert store() is None
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def test_tweets_built_by_hand():
+    """Tweets may still be built from their JSON and replies, and marked as sources."""
+    grandchild = Tweet({'id': 3, 'text': 'c'})
+    child = Tweet({'id': 2, 'text': 'b'}, children=[grandchild])
+    sibling = Tweet({'id': 4, 'text': 'd'})
+    tweet = Tweet({'id': 1, 'text': 'a'}, children=[child, sibling])
+    tweet.is_source = True
+
+    assert tweet.is_source and not child.is_source
+    assert list(tweet.children()) == [child, sibling]
+    assert grandchild.parent() is child and child.parent() is tweet
+    assert grandchild.root is tweet and tweet.root is tweet
+    assert [x.depth for x in (tweet, child, grandchild)] == [0, 1, 2]
+    assert grandchild['text'] == 'c' and grandchild.store is tweet.store
@@ -0,0 +1,49 @@
+"""Tests of the columns of details extracted from tweets."""
+
+import numpy as np
+from rumoureval.pipeline.tweet_detail_extractor import (
+    CHILD_DETAILS, TWEET_DETAIL_CACHE, TWEET_DETAILS, TweetDetailExtractor, build_columns
+)
+from rumoureval.util.data import import_data
+from .conftest import write_thread
+
+
+def test_boolean_details_keep_their_sign(data_root):
+    """Boolean details of 1 or -1 are held as small integers, so -1 does not become true."""
+    write_thread(str(data_root / 'data' / 'dev'), 'event', 100, {'100': {'101': []}},
+                 texts={100: 'is it true?', 101: 'see http://example.com'})
+    tweets = import_data('dev', include_context=False, use_snapshot=False)
+    TWEET_DETAIL_CACHE.clear()
+    details = TweetDetailExtractor(task='A').transform(tweets)
+
+    for name, kind in TWEET_DETAILS:
+        if kind is bool:
+            assert details[name].dtype == np.int8
+    assert details['verified'].tolist() == [-1, -1]
+    assert details['ends_with_question'].tolist() == [1, -1]
+    assert details['is_root'].tolist() == [0, 1]
+    assert details['depth'].tolist() == [0, 1]
+    assert list(details['text_stemmed'])[0] == ['is', 'it', 'true', '?']
+
+
+def test_columns_follow_detail_order():
+    """Each value of a row of details lands in the column of the detail at its position."""
+    rows = [
+        tuple([value] if kind is list else str(value) if kind is str else value
+              for value, (_, kind) in enumerate(TWEET_DETAILS, offset))
+        for offset in (0, 10)
+    ]
+    columns = build_columns(rows, tuple(range(len(CHILD_DETAILS))))
+
+    assert len(columns) == 2
+    for index, (name, kind) in enumerate(TWEET_DETAILS):
+        expected = [index, index + 10]
+        if kind is list:
+            assert list(columns[name]) == [[value] for value in expected]
+        elif kind is str:
+            assert list(columns[name]) == [str(value) for value in expected]
+        else:
+            assert columns[name].tolist() == expected
+    for index, (name, _) in enumerate(CHILD_DETAILS):
+        assert columns[name].tolist() == [index, index]
+    assert len(build_columns([], (0,) * len(CHILD_DETAILS))['depth']) == 0
@@ -0,0 +1,59 @@
+"""Tests of parsing the creation times of tweets and users."""
+
+from datetime import datetime, timezone
+import dateutil.parser
+import pytest
+from rumoureval.objects.tweet import Tweet
+from rumoureval.pipeline.tweet_detail_extractor import TWEET_DETAIL_CACHE, TweetDetailExtractor
+from rumoureval.util.tweet_time import age_in_days, parse_created_at
+from .conftest import make_tweet
+
+
+def test_api_times_match_dateutil():
+    """Times in the Twitter API format are parsed as dateutil parses them."""
+    for created_at in ['Wed Jan 07 11:07:51 +0000 2015', 'Thu Feb 29 00:00:00 +0000 2024',
+                       'Sun Dec 31 23:59:59 +0000 1899', 'Mon Mar 01 12:30:05 +0000 2100']:
+        expected = dateutil.parser.parse(created_at).timestamp()
+        assert parse_created_at(created_at) == int(expected)
+
+
+def test_other_formats_fall_back_to_dateutil():
+    """Times in other formats are parsed by dateutil, as UTC when they have no time zone."""
+    assert parse_created_at('2015-01-07T11:07:51+01:00') == \
+        int(datetime(2015, 1, 7, 10, 7, 51, tzinfo=timezone.utc).timestamp())
+    assert parse_created_at('2015-01-07 11:07:51') == \
+        int(datetime(2015, 1, 7, 11, 7, 51, tzinfo=timezone.utc).timestamp())
+
+
+def test_unknown_times_have_no_timestamp():
+    """Missing and unparseable times are None, rather than a time such as the epoch."""
+    for created_at in [None, '', 'not a time', 'Wed Foo 07 11:07:51 +0000 2015']:
+        assert parse_created_at(created_at) is None
+
+
+def test_age_in_days():
+    """Ages are whole days, rounded down as `timedelta.days` is."""
+    joined = parse_created_at('Mon Jan 05 11:07:51 +0000 2015')
+    for created_at, days in [('Wed Jan 07 11:07:51 +0000 2015', 2),
+                             ('Wed Jan 07 11:07:50 +0000 2015', 1),
+                             ('Mon Jan 05 11:07:50 +0000 2015', -1)]:
+        assert age_in_days(joined, parse_created_at(created_at)) == days
+    with pytest.raises(ValueError):
+        age_in_days(None, joined)
+    with pytest.raises(ValueError):
+        age_in_days(joined, None)
+
+
+def test_tweets_without_times():
+    """Tweets and users without a creation time have no timestamp, nor an account age."""
+    raw_tweet = make_tweet(100, 'tweet')
+    assert Tweet(raw_tweet).timestamp == parse_created_at(raw_tweet['created_at'])
+    del raw_tweet['created_at']
+    del raw_tweet['user']['created_at']
+    tweet = Tweet(raw_tweet)
+    assert tweet.timestamp is None
+    assert tweet.account_timestamp is None
+
+    TWEET_DETAIL_CACHE.clear()
+    with pytest.raises(ValueError):
+        TweetDetailExtractor(task='A').transform([tweet])